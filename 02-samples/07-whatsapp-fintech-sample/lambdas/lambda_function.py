@@ -3,9 +3,14 @@ import json
 import logging
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
 
 from strands_agent import StrandsAgent
 from utils.dynamo import DynamoDB
+from utils.history import ConversationHistory
 from utils.whatsapp import WhatsappService
 from utils.locales import MESSAGES
 
@@ -18,80 +23,98 @@ logger.setLevel(logging.INFO)
 # DynamoDB table name
 user_history_table = os.environ["USER_HISTORY_TABLE"]
 locale = os.environ["LOCALE"]
+# Phone numbers processed in parallel within one SNS batch
+max_concurrent_phones = int(os.environ.get("MAX_CONCURRENT_PHONES", "4"))
+
+# Clients, agent template and worker threads are created once per container and reused by warm invocations
+whatsapp_client = boto3.client("socialmessaging")
+bedrock = StrandsAgent()
+executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent_phones))
+_thread_state = threading.local()
+
+
+def new_history_store():
+    return ConversationHistory(user_history_table, DynamoDB())
 
 
-def process_record(record):
+def get_history_store():
+    """boto3 resources are not thread safe: each worker thread keeps its own history store."""
+    store = getattr(_thread_state, "history_store", None)
+    if store is None:
+        store = _thread_state.history_store = new_history_store()
+    return store
+
+
+def parse_record(record):
     sns = record.get("Sns", {})
     sns_message = json.loads(sns.get("Message", "{}"), parse_float=decimal.Decimal)
     print(f"sns_message: {sns_message}")
-
-    whatsapp_info = WhatsappService(sns_message)
-    dynamo = DynamoDB()
-    bedrock = StrandsAgent()
-
-    for message in whatsapp_info.messages:
-        message_type = message.message.get("type")
-        print("type:", message_type)
-
-        if message_type == "text":
-            data = {
-                "message": message.message,
-                "id": message.message_id,
-                "phone_number": message.phone_number,
-                "phone_number_id": message.phone_number_id,
-                "metadata": message.metadata,
-            }
-        else:
-            data = {
-                "message": MESSAGES[locale]["error"],
-                "phone_number_id": message.phone_number_id,
-                "metadata": message.metadata,
-            }
-            logger.error("Error on input. Not text")
-            return {
-                "statusCode": 500,
-                "body": json.dumps(
-                    "Error processing input type. Video, audio, image not supported yet."
-                ),
-            }
-
-        # get history
-        history = dynamo.query_by_day(user_history_table, message.phone_number)
-        # print(f'History: {history}')
-        hist_build = (
-            history[0] if history != [] else None
-        ) 
-        print(f"History after Build: {hist_build}")
-
-        # invoking agent
-        llm_response, agent_messages, sys_prompt = bedrock.agent_invoke(
-            message.get_text(), hist_build
-        )
-        # logger.info(f'LLM answer: {llm_response}')
-
-        # Creating new row with bedrock response (for logging)
-        row = message.build_whatsapp_row(
-            phone_number=message.phone_number,
-            messages=agent_messages,
-            role="assistant",
-            meta_phone_number_id=message.meta_phone_number_id,
-            id=message.message_id,
-            phone_number_id=message.phone_number_id,
-            timestamp=message.timestamp,
-            system_prompt=sys_prompt,
-        )
-
-        # Insert Log on Dynamo (LLM answer)
-        ret = dynamo.insert_user_message(user_history_table, row)
-
-        data["message"] = remove_thinking_tags(
-            llm_response.message["content"][0]["text"]
-        )
-        logger.info(f"Data after processing: {data}")
-
-        whatsapp_info.text_reply(
-            data["phone_number"], data["id"], data["phone_number_id"], data["message"]
-        )
+    return WhatsappService(sns_message, client=whatsapp_client)
+
+
+def process_message(whatsapp_info, message):
+    message_type = message.message.get("type")
+    print("type:", message_type)
+
+    if message_type == "text":
+        data = {
+            "message": message.message,
+            "id": message.message_id,
+            "phone_number": message.phone_number,
+            "phone_number_id": message.phone_number_id,
+            "metadata": message.metadata,
+        }
+    else:
+        data = {
+            "message": MESSAGES[locale]["error"],
+            "phone_number_id": message.phone_number_id,
+            "metadata": message.metadata,
+        }
+        logger.error("Error on input. Not text")
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                "Error processing input type. Video, audio, image not supported yet."
+            ),
+        }
+
+    # get history (keyed query: today's snapshot + deltas for this phone number)
+    history_store = get_history_store()
+    hist_build = history_store.load(message.phone_number)
+    print(f"History after Build: {hist_build}")
+
+    # invoking agent
+    llm_response, agent_messages, sys_prompt = bedrock.agent_invoke(
+        message.get_text(), hist_build
+    )
+    # logger.info(f'LLM answer: {llm_response}')
+
+    # Store the turn on Dynamo (delta with the new messages, periodically a full snapshot)
+    history_store.append(
+        message.phone_number,
+        agent_messages,
+        sys_prompt,
+        hist_build,
+        meta_phone_number_id=message.meta_phone_number_id,
+        id=message.message_id,
+        phone_number_id=message.phone_number_id,
+        timestamp=message.timestamp,
+    )
+
+    data["message"] = remove_thinking_tags(
+        llm_response.message["content"][0]["text"]
+    )
+    logger.info(f"Data after processing: {data}")
+
+    whatsapp_info.text_reply(
+        data["phone_number"], data["id"], data["phone_number_id"], data["message"]
+    )
+
+
+def process_phone_messages(messages):
+    """Process one phone number's messages in arrival order."""
+    for whatsapp_info, message in messages:
+        process_message(whatsapp_info, message)
 
 
 def remove_thinking_tags(text):
@@ -109,8 +132,29 @@ def remove_thinking_tags(text):
 def lambda_handler(event, context):
     try:
         records = event.get("Records", [])
+
+        # Group messages by phone number, keeping their order within each conversation
+        by_phone = {}
         for record in records:
-            process_record(record)
+            whatsapp_info = parse_record(record)
+            for message in whatsapp_info.messages:
+                by_phone.setdefault(message.phone_number, []).append((whatsapp_info, message))
+
+        # Conversations are independent: process different phone numbers in parallel
+        failed = False
+        futures = {
+            executor.submit(process_phone_messages, messages): phone_number
+            for phone_number, messages in by_phone.items()
+        }
+        for future, phone_number in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error processing messages from {phone_number}: {str(e)}")
+                failed = True
+
+        if failed:
+            return {"statusCode": 500, "body": json.dumps("Error processing request")}
         return {"statusCode": 200, "body": json.dumps("Success")}
     except Exception as e:
         logger.error(f"Error processing event: {str(e)}")
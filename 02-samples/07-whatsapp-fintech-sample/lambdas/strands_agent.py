@@ -2,6 +2,7 @@ import os
 import logging
 
 from strands import Agent
+from strands.models import BedrockModel
 
 from tools.cards import get_transactions, put_payment
 from tools.promo import get_promotions, get_day_of_week
@@ -15,29 +16,34 @@ logger = logging.getLogger()
 
 
 class StrandsAgent():
-    def __init__(self):
-        self.agent = Agent(
-            system_prompt=MESSAGES[STARTUP_LOCALE]["system"],
-            tools=[get_transactions, put_payment, get_promotions, get_day_of_week],
-            model=DEFAULT_MODEL,
-        )
-    def get_agent_with_history(self, messages, system_prompt):
-        self.agent = Agent(
-            messages=messages,
-            system_prompt=system_prompt,
-            tools=[get_transactions, put_payment, get_promotions, get_day_of_week],
-            model=DEFAULT_MODEL,
+    """
+    Agent template reused across invocations of a warm Lambda container.
+
+    The Bedrock model client and the tool list are built once; every invocation
+    gets its own lightweight Agent seeded with the conversation history, so
+    invocations for different phone numbers can run concurrently.
+    """
+    def __init__(self, model=None):
+        self.model = model if model else BedrockModel(model_id=DEFAULT_MODEL)
+        self.tools = [get_transactions, put_payment, get_promotions, get_day_of_week]
+
+    def get_agent_with_history(self, messages=None, system_prompt=None):
+        return Agent(
+            messages=list(messages) if messages else [],
+            system_prompt=system_prompt if system_prompt else MESSAGES[STARTUP_LOCALE]["system"],
+            tools=self.tools,
+            model=self.model,
         )
 
     def agent_invoke(self, user_prompt, history=None):
         try:
             if history is not None:
-                self.get_agent_with_history(messages=history["messages"], system_prompt=history["system_prompt"])
-                result = self.agent(user_prompt)
+                agent = self.get_agent_with_history(messages=history["messages"], system_prompt=history["system_prompt"])
             else:
-                result = self.agent(user_prompt)
+                agent = self.get_agent_with_history()
+            result = agent(user_prompt)
             logger.info(f"Agent result: {result}")
-            return result, self.agent.messages, self.agent.system_prompt
+            return result, agent.messages, agent.system_prompt
         except Exception as e:
             logger.info(f"Error during agent invocation: {e}")
-            raise
\ No newline at end of file
+            raise
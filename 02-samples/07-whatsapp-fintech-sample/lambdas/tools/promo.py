@@ -1,14 +1,22 @@
 import boto3
+import decimal
 import os
+import threading
 
 from strands import tool
 from boto3.dynamodb.conditions import Key
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 DEFAULT_LOCALE=os.environ['LOCALE']
-dynamodb_resource=boto3.resource('dynamodb')
 dynamodb_table=os.getenv('PROMO_TABLE')
+_thread_state = threading.local()
+
+# Promotions only change with the weekday: cache them per (locale, weekday) until local midnight.
+# Misses (no promotion even after seeding) are cached too, but only for a few minutes.
+NEGATIVE_CACHE_SECONDS = 300
+_promotions_cache = {}
+_promotions_cache_lock = threading.Lock()
 
 translations = {
     "pt_BR": {
@@ -35,12 +43,22 @@ translations = {
     }
 }
 
+def new_dynamodb_resource():
+    return boto3.resource('dynamodb')
+
+def get_dynamodb_resource():
+    """boto3 resources are not thread safe: each worker thread keeps its own."""
+    resource = getattr(_thread_state, "dynamodb_resource", None)
+    if resource is None:
+        resource = _thread_state.dynamodb_resource = new_dynamodb_resource()
+    return resource
+
 def get_translation(key, **kwargs):
     return translations[DEFAULT_LOCALE][key].format(**kwargs)
 
 def read_dynamodb(table_name: str, pk_value: str):
     try:
-        table = dynamodb_resource.Table(table_name)
+        table = get_dynamodb_resource().Table(table_name)
         # Create expression
         key_expression = Key('week_day').eq(pk_value)
         query_data = table.query(KeyConditionExpression=key_expression)
@@ -50,6 +68,7 @@ def read_dynamodb(table_name: str, pk_value: str):
         print(f'Exception: {err}')
 
 def load_data(week_day):
+    """Seed the table with the week's promotions in one batch and return the given day's items."""
     try:
         promotions = [
             {"week_day": 0, "promo1": get_translation("promo1_platinum"), "promo2": get_translation("promo2_diamond")},
@@ -61,14 +80,27 @@ def load_data(week_day):
             {"week_day": 6, "promo1": get_translation("promo2_diamond"), "promo2": get_translation("promo2_brinde")}
         ]
         
-        table = dynamodb_resource.Table(dynamodb_table)
+        table = get_dynamodb_resource().Table(dynamodb_table)
+
+        with table.batch_writer() as batch:
+            for promo in promotions:
+                batch.put_item(Item=promo)
 
-        for promo in promotions:
-            response = table.put_item(Item=promo)
+        # Same shape as a query result (numbers come back from DynamoDB as Decimal)
+        return [
+            {**promo, "week_day": decimal.Decimal(promo["week_day"])}
+            for promo in promotions if promo["week_day"] == week_day
+        ]
     except Exception as err:
         print(f'Error inserting on table: {dynamodb_table}.')
         print(f'Exception: {err}')
 
+def _cache_expiry(now, found):
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    if found:
+        return midnight
+    return min(midnight, now + timedelta(seconds=NEGATIVE_CACHE_SECONDS))
+
 @tool
 def get_promotions() -> str:
     """
@@ -79,11 +111,21 @@ def get_promotions() -> str:
     #print(f'env-var table: {dynamodb_table}')
     # Day of the week
     week_day = get_day_of_week()
+    cache_key = (DEFAULT_LOCALE, week_day)
+    now = datetime.now()
+
+    with _promotions_cache_lock:
+        cached = _promotions_cache.get(cache_key)
+    if cached and cached[1] > now:
+        return cached[0]
     
     response = read_dynamodb(dynamodb_table, week_day)
-    if not response:
-        load_data(week_day)
-        response = read_dynamodb(dynamodb_table, week_day)
+    if response == []:
+        response = load_data(week_day)
+    if response is not None:
+        # Errors (None) are not cached, empty results are cached briefly
+        with _promotions_cache_lock:
+            _promotions_cache[cache_key] = (response, _cache_expiry(now, bool(response)))
     return response
 
 @tool
@@ -1,15 +1,16 @@
 import boto3
 import logging
 from datetime import datetime
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
 
 
 logger = logging.getLogger(__name__)
 
 
 class DynamoDB:
-    def __init__(self) -> None:
-        self.client = boto3.resource('dynamodb')
+    def __init__(self, client=None) -> None:
+        self.client = client if client else boto3.resource('dynamodb')
 
     def save_item_ddb(self, table, item):
         try:
@@ -36,16 +37,61 @@ class DynamoDB:
         try:
             dynamo_table = self.client.Table(table)
             current_day = datetime.now().strftime("%Y/%m/%d")
-            response = dynamo_table.scan(
-                FilterExpression=Key('phone_number').eq(phone_number) & Key('day').eq(current_day)
+            # Keyed query on the table's phone_number (HASH) + day (RANGE) key, no full-table scan
+            response = dynamo_table.query(
+                KeyConditionExpression=Key('phone_number').eq(phone_number) & Key('day').eq(current_day)
             )
             logger.info("Query by day successful: %s", response)
-            #print("Query by day successful: %s", response)
             return response['Items']
         except Exception as e:
             logger.error("Error querying by day from DynamoDB: %s", e)
             raise
 
+    def query_by_prefix(self, table, key, keyvalue, sort_key, prefix):
+        try:
+            dynamo_table = self.client.Table(table)
+            query = {
+                "KeyConditionExpression": Key(key).eq(keyvalue) & Key(sort_key).begins_with(prefix),
+                "ScanIndexForward": True
+            }
+            items = []
+            scanned = 0
+            # A query returns at most 1 MB per call, follow the pages until the last one
+            while True:
+                response = dynamo_table.query(**query)
+                items.extend(response['Items'])
+                scanned += response['ScannedCount']
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query["ExclusiveStartKey"] = response['LastEvaluatedKey']
+            logger.info("Query by prefix successful: %s items", len(items))
+            return items, scanned
+        except Exception as e:
+            logger.error("Error querying by prefix from DynamoDB: %s", e)
+            raise
+
+    def save_item_if_absent(self, table, item, key):
+        """Put the item unless one with the same key exists. Returns False on a conflict."""
+        try:
+            dynamo_table = self.client.Table(table)
+            dynamo_table.put_item(Item=item, ConditionExpression=Attr(key).not_exists())
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            logger.error("Error saving item to DynamoDB: %s", e)
+            raise
+
+    def delete_items(self, table, keys):
+        try:
+            dynamo_table = self.client.Table(table)
+            with dynamo_table.batch_writer() as batch:
+                for key in keys:
+                    batch.delete_item(Key=key)
+        except Exception as e:
+            logger.error("Error deleting items from DynamoDB: %s", e)
+            raise
+
     def insert_user_message(self, table, row):
         try:
             
@@ -0,0 +1,151 @@
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.dynamo import DynamoDB
+
+
+logger = logging.getLogger(__name__)
+
+# Sort key of a delta item: "<day>#<sequence>", next to the "<day>" snapshot item
+DELTA_SEPARATOR = "#"
+
+
+class ConversationHistory:
+    """
+    Daily conversation history of a phone number, stored as a snapshot plus deltas.
+
+    Items share the table's phone_number (HASH) + day (RANGE) key:
+    - "<day>": snapshot with the full message list up to `last_seq`
+    - "<day>#<seq>": delta with only the messages added by one turn
+
+    Loading is a single keyed query on phone_number + day prefix, returning the
+    snapshot and the deltas written since. Every `snapshot_every` turns the
+    deltas are folded into a new snapshot and deleted, so the items read per
+    message stay bounded no matter how large the table grows.
+    """
+
+    def __init__(self, table: str, dynamo: Optional[DynamoDB] = None, snapshot_every: int = 10) -> None:
+        self.table = table
+        self.dynamo = dynamo if dynamo else DynamoDB()
+        self.snapshot_every = snapshot_every
+
+    @staticmethod
+    def current_day() -> str:
+        return datetime.now().strftime("%Y/%m/%d")
+
+    def load(self, phone_number: str, day: Optional[str] = None) -> Optional[Dict]:
+        """
+        Today's history for a phone number.
+
+        Returns:
+            None without history, otherwise a dict with "messages", "system_prompt",
+            plus the bookkeeping append() needs ("day", "last_seq", "snapshot_seq",
+            "deltas" and the "prior_messages" the agent is seeded with)
+        """
+        try:
+            day = day or self.current_day()
+            items, scanned = self.dynamo.query_by_prefix(self.table, "phone_number", phone_number, "day", day)
+            logger.info("Loaded %s history items (%s read) for %s", len(items), scanned, phone_number)
+            if not items:
+                return None
+
+            snapshot = {}
+            deltas = []
+            for item in items:
+                if item["day"] == day:
+                    snapshot = item
+                elif item["day"].startswith(day + DELTA_SEPARATOR):
+                    deltas.append(item)
+
+            snapshot_seq = int(snapshot.get("last_seq", 0))
+            messages = list(snapshot.get("messages", []))
+            system_prompt = snapshot.get("system_prompt")
+            last_seq = snapshot_seq
+            pending = []
+            for delta in sorted(deltas, key=lambda d: int(d["seq"])):
+                pending.append(delta["day"])
+                # Deltas already folded into the snapshot are left over from an interrupted compaction
+                if int(delta["seq"]) <= snapshot_seq:
+                    continue
+                messages.extend(delta.get("messages", []))
+                system_prompt = delta.get("system_prompt", system_prompt)
+                last_seq = int(delta["seq"])
+
+            if not messages and system_prompt is None:
+                return None
+            return {
+                "messages": messages,
+                "system_prompt": system_prompt,
+                "day": day,
+                "last_seq": last_seq,
+                "snapshot_seq": snapshot_seq,
+                "deltas": pending,
+                "prior_messages": list(messages),
+            }
+        except Exception as e:
+            logger.error("Error loading conversation history: %s", e)
+            raise
+
+    def append(self, phone_number: str, messages: List[Dict], system_prompt: str,
+               history: Optional[Dict] = None, **metadata) -> None:
+        """
+        Record a turn: the agent's full message list after answering.
+
+        Writes a delta with only the new messages, or a full snapshot when there is
+        no history yet, the snapshot is due, or the agent's messages no longer start
+        with the loaded history (e.g. the conversation manager trimmed them).
+
+        Args:
+            phone_number: Customer phone number
+            messages: agent.messages after the turn
+            system_prompt: agent.system_prompt
+            history: The dict returned by load() for this turn, if any
+            metadata: Extra attributes stored on the item for logging (message id, timestamps...)
+        """
+        try:
+            day = history["day"] if history else self.current_day()
+            prior = history["prior_messages"] if history else []
+            seq = history["last_seq"] + 1 if history else 1
+            snapshot_seq = history["snapshot_seq"] if history else 0
+
+            is_delta = (
+                history is not None
+                and seq - snapshot_seq < self.snapshot_every
+                and system_prompt == history["system_prompt"]
+                and len(messages) >= len(prior)
+                and messages[:len(prior)] == prior
+            )
+            item = {
+                "phone_number": phone_number,
+                "session_time": int(time.time()),
+                **metadata,
+            }
+
+            if is_delta:
+                item.update({
+                    "day": f"{day}{DELTA_SEPARATOR}{seq:06d}",
+                    "seq": seq,
+                    "messages": messages[len(prior):],
+                })
+                if self.dynamo.save_item_if_absent(self.table, item, "day"):
+                    return
+                # Another invocation wrote this turn concurrently: fall back to a snapshot (last writer wins)
+                logger.info("Delta %s already exists for %s, writing a snapshot", seq, phone_number)
+
+            item.update({
+                "day": day,
+                "last_seq": seq,
+                "messages": messages,
+                "system_prompt": system_prompt,
+            })
+            item.pop("seq", None)
+            self.dynamo.save_item_ddb(self.table, item)
+            if history and history["deltas"]:
+                self.dynamo.delete_items(
+                    self.table, [{"phone_number": phone_number, "day": key} for key in history["deltas"]]
+                )
+        except Exception as e:
+            logger.error("Error saving conversation history: %s", e)
+            raise
@@ -0,0 +1,103 @@
+"""
+Local check that loading conversation history costs the same number of item reads
+no matter how large the WhatsAppUserHistory table grows.
+
+Fills the DynamoDB stand-in with other users' history, replays conversations
+through ConversationHistory and compares the items read per message with the
+previous scan-based lookup. Also checks that the snapshot + deltas round trip
+returns exactly the agent's message list.
+
+Usage:
+    python local/check_history_reads.py --sizes 1000 10000 50000 --turns 25
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambdas"))
+
+from boto3.dynamodb.conditions import Key  # noqa: E402
+
+from fake_dynamodb import FakeDynamoResource  # noqa: E402
+from utils.dynamo import DynamoDB  # noqa: E402
+from utils.history import ConversationHistory  # noqa: E402
+
+TABLE = "WhatsAppUserHistory"
+SYSTEM_PROMPT = "You will be a personal financial assistant."
+
+
+def agent_turn(messages, turn):
+    """What agent.messages looks like after one more question and answer."""
+    return messages + [
+        {"role": "user", "content": [{"text": f"Question {turn}: what are today's promotions?"}]},
+        {"role": "assistant", "content": [{"text": f"Answer {turn}: " + "promotion details " * 20}]},
+    ]
+
+
+def fill_table(table, rows):
+    """Other customers' snapshots, spread over past days."""
+    for i in range(rows):
+        table.put_item(Item={
+            "phone_number": f"55119{i // 30:07d}",
+            "day": f"2024/{i % 12 + 1:02d}/{i % 30 + 1:02d}",
+            "last_seq": 1,
+            "messages": agent_turn([], 0),
+            "system_prompt": SYSTEM_PROMPT,
+        })
+
+
+def legacy_reads(table, phone_number, day):
+    """Items read by the previous query_by_day (scan with a filter)."""
+    response = table.scan(FilterExpression=Key("phone_number").eq(phone_number) & Key("day").eq(day))
+    return response["ScannedCount"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check history reads per message against table size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--turns", type=int, default=25)
+    parser.add_argument("--snapshot-every", type=int, default=10)
+    args = parser.parse_args()
+
+    per_size = []
+    for size in args.sizes:
+        resource = FakeDynamoResource()
+        table = resource.create_table(TABLE, "phone_number", "day")
+        fill_table(table, size)
+        store = ConversationHistory(TABLE, DynamoDB(client=resource), snapshot_every=args.snapshot_every)
+
+        phone_number = "5511999999999"
+        messages = []
+        max_reads = 0
+        bytes_written = 0
+        full_bytes = 0
+        for turn in range(1, args.turns + 1):
+            before = table.read_items
+            history = store.load(phone_number)
+            max_reads = max(max_reads, table.read_items - before)
+            assert (history["messages"] if history else []) == messages, f"history differs at turn {turn}"
+
+            messages = agent_turn(messages, turn)
+            partition = table.partitions.get(phone_number, {})
+            before_items = {key: json.dumps(item, default=str) for key, item in partition.items()}
+            store.append(phone_number, messages, SYSTEM_PROMPT, history, id=f"wamid.{turn}")
+            after_items = {key: json.dumps(item, default=str) for key, item in table.partitions[phone_number].items()}
+            bytes_written += sum(len(v) for k, v in after_items.items() if before_items.get(k) != v)
+            full_bytes += len(json.dumps({"messages": messages, "system_prompt": SYSTEM_PROMPT}))
+
+        legacy = legacy_reads(table, phone_number, ConversationHistory.current_day())
+        per_size.append(max_reads)
+        print(f"table={len(table):6d} items  history reads/message: max {max_reads:3d}  "
+              f"(scan: {legacy:6d})  written {bytes_written / 1024:7.1f} KB "
+              f"vs {full_bytes / 1024:7.1f} KB for full rewrites")
+
+        assert max_reads <= args.snapshot_every, "history reads exceed one snapshot + its deltas"
+
+    assert len(set(per_size)) == 1, f"history reads per message changed with table size: {per_size}"
+    print("OK: items read per message are independent of table size")
+
+
+if __name__ == "__main__":
+    main()
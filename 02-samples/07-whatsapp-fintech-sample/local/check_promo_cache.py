@@ -0,0 +1,77 @@
+"""
+Local check of the get_promotions cache against the in-memory DynamoDB stand-in.
+
+- first question of the day on an empty table: one query + one batch write
+- repeated questions: zero DynamoDB round trips
+- a miss (no promotion for the day) is cached too, for NEGATIVE_CACHE_SECONDS
+
+Usage:
+    python local/check_promo_cache.py --questions 20
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambdas"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("PROMO_TABLE", "PromotionsList")
+os.environ.setdefault("LOCALE", "en_US")
+
+from fake_dynamodb import FakeDynamoResource  # noqa: E402
+from tools import promo  # noqa: E402
+
+
+def round_trips(table):
+    return table.read_requests + table.write_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check DynamoDB round trips of get_promotions")
+    parser.add_argument("--questions", type=int, default=20)
+    args = parser.parse_args()
+
+    resource = FakeDynamoResource()
+    table = resource.create_table(promo.dynamodb_table, "week_day")
+    promo.new_dynamodb_resource = lambda: resource
+
+    first = promo.get_promotions()
+    print(f"first question, empty table: {round_trips(table)} round trips, {len(table)} promotions seeded")
+    assert table.read_requests == 1 and table.write_requests == 1, "expected one query and one batch write"
+
+    before = round_trips(table)
+    for _ in range(args.questions):
+        assert promo.get_promotions() == first
+    print(f"{args.questions} repeated questions: {round_trips(table) - before} round trips")
+    assert round_trips(table) == before, "cached promotions should not hit DynamoDB"
+
+    # A new container with a seeded table: a single query, then cached
+    promo._promotions_cache.clear()
+    before = round_trips(table)
+    assert promo.get_promotions() == first, "seeded promotions differ from the query result"
+    promo.get_promotions()
+    print(f"new container, seeded table: {round_trips(table) - before} round trip")
+    assert round_trips(table) - before == 1
+
+    # A day without promotions is cached as a miss
+    promo._promotions_cache.clear()
+    table.partitions.clear()
+    load_data = promo.load_data
+    promo.load_data = lambda week_day: []
+    before = round_trips(table)
+    assert promo.get_promotions() == [] and promo.get_promotions() == []
+    promo.load_data = load_data
+    print(f"day without promotions, asked twice: {round_trips(table) - before} round trip")
+    assert round_trips(table) - before == 1
+
+    now = datetime(2025, 3, 14, 23, 58)
+    assert promo._cache_expiry(now, True) == datetime(2025, 3, 15)
+    assert promo._cache_expiry(now, False) == datetime(2025, 3, 15)
+    assert promo._cache_expiry(datetime(2025, 3, 14, 9, 0), False) == datetime(2025, 3, 14, 9, 5)
+    print("OK: promotions are served from the cache until local midnight")
+
+
+if __name__ == "__main__":
+    main()
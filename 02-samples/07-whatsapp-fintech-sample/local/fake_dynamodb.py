@@ -0,0 +1,167 @@
+"""
+In-memory stand-in for the boto3 DynamoDB resource, for running the Lambda code locally.
+
+Supports the calls the Lambda makes (Table(), put_item, get_item, delete_item,
+query, scan, batch_writer) with boto3.dynamodb.conditions expressions, and
+counts what real DynamoDB would bill: items read (ScannedCount) and writes.
+"""
+
+import copy
+from contextlib import contextmanager
+
+from boto3.dynamodb.conditions import AttributeBase, ConditionBase
+from botocore.exceptions import ClientError
+
+
+def _evaluate(condition, item):
+    if isinstance(condition, AttributeBase):
+        return item.get(condition.name)
+    if not isinstance(condition, ConditionBase):
+        return condition
+    expression = condition.get_expression()
+    operator = expression['operator']
+    values = expression['values']
+    if operator == 'AND':
+        return all(_evaluate(value, item) for value in values)
+    if operator == 'OR':
+        return any(_evaluate(value, item) for value in values)
+    if operator == 'NOT':
+        return not _evaluate(values[0], item)
+    if operator == 'attribute_exists':
+        return values[0].name in item
+    if operator == 'attribute_not_exists':
+        return values[0].name not in item
+    left = _evaluate(values[0], item)
+    if left is None:
+        return False
+    right = [_evaluate(value, item) for value in values[1:]]
+    if operator == 'begins_with':
+        return str(left).startswith(right[0])
+    if operator == 'BETWEEN':
+        return right[0] <= left <= right[1]
+    return {
+        '=': lambda a, b: a == b,
+        '<>': lambda a, b: a != b,
+        '<': lambda a, b: a < b,
+        '<=': lambda a, b: a <= b,
+        '>': lambda a, b: a > b,
+        '>=': lambda a, b: a >= b,
+    }[operator](left, right[0])
+
+
+class FakeTable:
+    def __init__(self, name, hash_key, range_key=None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.partitions = {}
+        self.read_items = 0
+        self.read_requests = 0
+        self.write_requests = 0
+
+    def __len__(self):
+        return sum(len(partition) for partition in self.partitions.values())
+
+    def _range_value(self, item):
+        return item.get(self.range_key) if self.range_key else None
+
+    def _check(self, condition, existing, operation):
+        if condition is not None and not _evaluate(condition, existing or {}):
+            raise ClientError(
+                {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed'}},
+                operation
+            )
+
+    def put_item(self, Item, ConditionExpression=None):
+        partition = self.partitions.setdefault(Item[self.hash_key], {})
+        self._check(ConditionExpression, partition.get(self._range_value(Item)), 'PutItem')
+        self.write_requests += 1
+        partition[self._range_value(Item)] = copy.deepcopy(Item)
+        return {}
+
+    def get_item(self, Key):
+        self.read_requests += 1
+        item = self.partitions.get(Key[self.hash_key], {}).get(self._range_value(Key))
+        self.read_items += 1 if item else 0
+        return {'Item': copy.deepcopy(item)} if item else {}
+
+    def delete_item(self, Key):
+        self.write_requests += 1
+        self.partitions.get(Key[self.hash_key], {}).pop(self._range_value(Key), None)
+        return {}
+
+    def query(self, KeyConditionExpression, FilterExpression=None, ScanIndexForward=True, IndexName=None, **kwargs):
+        if IndexName is not None:
+            raise NotImplementedError("Secondary indexes are not supported by the stand-in")
+        self.read_requests += 1
+        # DynamoDB reads every item matched by the key condition, before any filter
+        candidates = []
+        for partition in self.partitions.values():
+            for item in partition.values():
+                if _evaluate(KeyConditionExpression, item):
+                    candidates.append(item)
+        candidates.sort(key=self._range_value, reverse=not ScanIndexForward)
+        return self._response(candidates, FilterExpression)
+
+    def scan(self, FilterExpression=None, **kwargs):
+        self.read_requests += 1
+        candidates = [item for partition in self.partitions.values() for item in partition.values()]
+        return self._response(candidates, FilterExpression)
+
+    def _response(self, candidates, filter_expression):
+        self.read_items += len(candidates)
+        items = [copy.deepcopy(item) for item in candidates
+                 if filter_expression is None or _evaluate(filter_expression, item)]
+        return {'Items': items, 'Count': len(items), 'ScannedCount': len(candidates)}
+
+    @contextmanager
+    def batch_writer(self):
+        batch = _BatchWriter(self)
+        yield batch
+        batch.flush()
+
+
+class _BatchWriter:
+    """Buffers writes and sends them 25 at a time, like BatchWriteItem."""
+
+    def __init__(self, table):
+        self.table = table
+        self.pending = []
+
+    def put_item(self, Item):
+        self.pending.append(('put', Item))
+        self._flush_full()
+
+    def delete_item(self, Key):
+        self.pending.append(('delete', Key))
+        self._flush_full()
+
+    def _flush_full(self):
+        if len(self.pending) >= 25:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.table.write_requests += 1
+        for operation, value in self.pending:
+            if operation == 'put':
+                self.table.partitions.setdefault(value[self.table.hash_key], {})[
+                    self.table._range_value(value)] = copy.deepcopy(value)
+            else:
+                self.table.partitions.get(value[self.table.hash_key], {}).pop(self.table._range_value(value), None)
+        self.pending = []
+
+
+class FakeDynamoResource:
+    """Stand-in for boto3.resource('dynamodb')."""
+
+    def __init__(self):
+        self.tables = {}
+
+    def create_table(self, name, hash_key, range_key=None):
+        self.tables[name] = FakeTable(name, hash_key, range_key)
+        return self.tables[name]
+
+    def Table(self, name):
+        return self.tables[name]
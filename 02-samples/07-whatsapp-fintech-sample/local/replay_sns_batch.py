@@ -0,0 +1,206 @@
+"""
+Local harness for the WhatsApp Lambda: replays batches of synthetic SNS events
+through lambda_handler with stand-ins for Bedrock, DynamoDB and WhatsApp.
+
+Reports:
+- cold init: importing lambda_function (module-level clients and agent template)
+- per-record init: what the previous code built for every record (WhatsApp and
+  DynamoDB clients, an Agent with its own Bedrock client, twice with history)
+  versus re-seeding the warm agent template
+- per-message latency and batch wall time, sequential vs concurrent phone numbers
+
+and checks that replies for each phone number go out in arrival order.
+
+Usage:
+    python local/replay_sns_batch.py --phones 8 --messages-per-phone 3 --model-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "lambdas"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("USER_HISTORY_TABLE", "WhatsAppUserHistory")
+os.environ.setdefault("PROMO_TABLE", "PromotionsList")
+os.environ.setdefault("LOCALE", "en_US")
+os.environ.setdefault("DEFAULT_MODEL", "us.amazon.nova-pro-v1:0")
+
+from strands.models.model import Model  # noqa: E402
+
+from fake_dynamodb import FakeDynamoResource  # noqa: E402
+
+
+class FakeModel(Model):
+    """Answers every prompt with a short text after a simulated model latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        question = messages[-1]["content"][0].get("text", "")
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": f"<thinking>...</thinking>You asked: {question}"}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+class FakeWhatsAppClient:
+    """Stand-in for boto3.client("socialmessaging") recording the replies sent."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_whatsapp_message(self, originationPhoneNumberId, metaApiVersion, message):
+        time.sleep(self.latency)
+        body = json.loads(message)
+        with self.lock:
+            self.sent.append((body["to"].lstrip("+"), body["context"]["message_id"]))
+        return {"messageId": f"reply-{len(self.sent)}"}
+
+
+def sns_record(phone_number, message_id, text):
+    webhook_entry = {
+        "changes": [{
+            "field": "messages",
+            "value": {
+                "metadata": {"phone_number_id": "123456"},
+                "messages": [{
+                    "from": phone_number, "id": message_id, "timestamp": str(int(time.time())),
+                    "type": "text", "text": {"body": text},
+                }],
+            },
+        }]
+    }
+    message = {
+        "context": {"MetaPhoneNumberIds": [{
+            "arn": "arn:aws:social-messaging:us-east-1:123456789012:phone-number-id/abc123",
+            "metaPhoneNumberId": "123456",
+        }]},
+        "whatsAppWebhookEntry": json.dumps(webhook_entry),
+    }
+    return {"Sns": {"Message": json.dumps(message)}}
+
+
+def build_batch(batch, phones, messages_per_phone):
+    """Messages of different phone numbers interleaved, as they arrive."""
+    records = []
+    for turn in range(messages_per_phone):
+        for phone in range(phones):
+            records.append(sns_record(f"55119{phone:08d}", f"wamid.{batch}.{phone}.{turn}",
+                                      f"Question {turn} about my card"))
+    return {"Records": records}
+
+
+def summarize(label, timings, wall):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"  {label:<24} batch {wall * 1000:8.1f} ms   per message p50 {statistics.median(timings) * 1000:7.1f} ms  "
+          f"p95 {p95 * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic SNS batches through the WhatsApp Lambda")
+    parser.add_argument("--phones", type=int, default=8)
+    parser.add_argument("--messages-per-phone", type=int, default=3)
+    parser.add_argument("--batches", type=int, default=3)
+    parser.add_argument("--model-latency-ms", type=float, default=300)
+    parser.add_argument("--reply-latency-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    import lambda_function
+    cold_import = time.perf_counter() - start
+
+    import boto3
+    from strands import Agent
+    from strands_agent import StrandsAgent, DEFAULT_MODEL
+
+    resource = FakeDynamoResource()
+    resource.create_table(lambda_function.user_history_table, "phone_number", "day")
+    whatsapp = FakeWhatsAppClient(args.reply_latency_ms / 1000)
+    lambda_function.whatsapp_client = whatsapp
+    lambda_function.bedrock = StrandsAgent(model=FakeModel(args.model_latency_ms / 1000))
+    lambda_function.new_history_store = lambda: lambda_function.ConversationHistory(
+        lambda_function.user_history_table, lambda_function.DynamoDB(client=resource))
+
+    # What the previous code created for every record (no network calls are made here)
+    template = StrandsAgent()
+    tools = template.tools
+    start = time.perf_counter()
+    boto3.client("socialmessaging")
+    boto3.resource("dynamodb")
+    Agent(model=DEFAULT_MODEL, tools=tools)
+    Agent(model=DEFAULT_MODEL, tools=tools, messages=[])
+    per_record_before = time.perf_counter() - start
+    start = time.perf_counter()
+    template.get_agent_with_history(messages=[], system_prompt="prompt")
+    per_record_now = time.perf_counter() - start
+
+    print(f"cold init (import lambda_function): {cold_import * 1000:8.1f} ms")
+    print(f"per-record init: {per_record_before * 1000:.1f} ms before, {per_record_now * 1000:.2f} ms re-seeding the template")
+
+    timings = []
+    process_message = lambda_function.process_message
+
+    def timed_process_message(whatsapp_info, message):
+        start = time.perf_counter()
+        try:
+            return process_message(whatsapp_info, message)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    lambda_function.process_message = timed_process_message
+
+    print(f"{args.phones} phones x {args.messages_per_phone} messages per batch, "
+          f"model {args.model_latency_ms:.0f} ms, reply {args.reply_latency_ms:.0f} ms")
+    concurrent_executor = lambda_function.executor
+    for mode, executor in (("sequential", ThreadPoolExecutor(max_workers=1)), ("concurrent", concurrent_executor)):
+        lambda_function.executor = executor
+        for batch in range(args.batches):
+            timings.clear()
+            event = build_batch(f"{mode}{batch}", args.phones, args.messages_per_phone)
+            start = time.perf_counter()
+            # Keep the Lambda's own prints and the agent's streamed output out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = lambda_function.lambda_handler(event, None)
+            wall = time.perf_counter() - start
+            assert response["statusCode"] == 200, response
+            summarize(f"{mode} batch {batch + 1}{' (cold)' if batch == 0 else ''}", timings, wall)
+
+    # Replies for each phone number must follow the order of its messages
+    by_phone = {}
+    for phone_number, message_id in whatsapp.sent:
+        by_phone.setdefault(phone_number, []).append(message_id)
+    for phone_number, message_ids in by_phone.items():
+        for prefix in {m.rsplit(".", 1)[0] for m in message_ids}:
+            turns = [int(m.rsplit(".", 1)[1]) for m in message_ids if m.rsplit(".", 1)[0] == prefix]
+            assert turns == sorted(turns), f"replies out of order for {phone_number}: {message_ids}"
+    print(f"OK: {len(whatsapp.sent)} replies, in order for every phone number")
+
+
+if __name__ == "__main__":
+    main()
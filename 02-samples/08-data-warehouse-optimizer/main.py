@@ -18,6 +18,9 @@ from utils.tools import (
     suggest_optimizations,
     validate_query_cost,
 )
+from utils.db import get_connection_manager
+from utils.validation import compare_queries
+from utils.workload import WorkloadCache, optimize_workload, read_workload
 import boto3
 import click
 import json
@@ -62,32 +65,41 @@ model = BedrockModel(
     max_tokens=2000,
 )
 
+def create_agents():
+    """Create the analyzer, rewriter and validator agents (sharing the Bedrock model)."""
+    analyzer = Agent(
+        model=model,
+        system_prompt=analyzer_prompt,
+        tools=[get_query_execution_plan, calculator],
+    )
+    rewriter = Agent(
+        model=model,
+        system_prompt=rewriter_prompt,
+        tools=[suggest_optimizations, calculator],
+    )
+    validator = Agent(
+        model=model, system_prompt=validator_prompt, tools=[validate_query_cost, calculator]
+    )
+    return analyzer, rewriter, validator
+
+
 # Define agents
-analyzer_agent = Agent(
-    model=model,
-    system_prompt=analyzer_prompt,
-    tools=[get_query_execution_plan, calculator],
-)
-rewriter_agent = Agent(
-    model=model,
-    system_prompt=rewriter_prompt,
-    tools=[suggest_optimizations, calculator],
-)
-validator_agent = Agent(
-    model=model, system_prompt=validator_prompt, tools=[validate_query_cost, calculator]
-)
+default_agents = create_agents()
+analyzer_agent, rewriter_agent, validator_agent = default_agents
 
 
-def optimize_query(query: str) -> Dict[str, Any]:
+def optimize_query(query: str, agents=None) -> Dict[str, Any]:
     """
     Orchestrates the multi-agent query optimization workflow.
 
     Args:
         query (str): The SQL query to optimize.
+        agents: (analyzer, rewriter, validator) agents to use instead of the shared ones.
 
     Returns:
         Dict: Final optimization report with analysis, suggestions, and validation.
     """
+    analyzer_agent, rewriter_agent, validator_agent = agents or default_agents
     with tracer.start_as_current_span("optimize_query"):
         try:
             analysis_result = analyzer_agent(f"Analyze query: {query}")
@@ -181,7 +193,9 @@ def optimize_query(query: str) -> Dict[str, Any]:
             query,
         )
         try:
-            validation_result = validator_agent(f"Validate query: {rewritten_query}")
+            validation_result = validator_agent(
+                f"Validate query: {rewritten_query}\nOriginal query: {query}"
+            )
         except Exception as e:
             print(f"Bedrock error in validator_agent: {str(e)}")
             validation = {"status": "error", "message": str(e)}
@@ -234,11 +248,10 @@ def cli():
 @cli.command()
 def list_tables():
     """List all tables in the database."""
-    conn = sqlite3.connect("query_optimizer.db")
+    conn = get_connection_manager().read_only()
     cursor = conn.cursor()
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     tables = [row[0] for row in cursor.fetchall()]
-    conn.close()
     print(json.dumps({"tables": tables}, indent=2))
 
 
@@ -250,54 +263,107 @@ def explain_query(query):
     print(json.dumps(result, indent=2))
 
 
+@cli.command()
+@click.argument("original_query")
+@click.argument("rewritten_query")
+@click.option("--sample-rows", default=10000, help="Maximum rows per table in the sampled copy.")
+@click.option("--timeout", default=5.0, help="Per-run timeout in seconds.")
+@click.option("--repeat", default=3, help="Timed runs per query.")
+def validate_query(original_query, rewritten_query, sample_rows, timeout, repeat):
+    """Run the original and rewritten query on a sampled copy and compare them."""
+    try:
+        result = {
+            "status": "success",
+            **compare_queries(
+                original_query,
+                rewritten_query,
+                sample_rows=sample_rows,
+                timeout_seconds=timeout,
+                repeat=repeat,
+            ),
+        }
+    except (sqlite3.Error, TimeoutError) as e:
+        result = {"status": "error", "message": str(e)}
+    print(json.dumps(result, indent=2))
+
+
+@cli.command()
+@click.argument("workload_file", type=click.File("r"))
+@click.option("--max-workers", default=4, help="Query shapes optimized in parallel.")
+@click.option("--cache-dir", default=".workload_cache", help="Directory of cached reports per fingerprint.")
+@click.option("--refresh", is_flag=True, help="Ignore cached reports and re-run the pipeline.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write the report to this file.")
+def batch_optimize(workload_file, max_workers, cache_dir, refresh, output):
+    """Optimize a workload log once per query shape and report by frequency."""
+    statements = read_workload(workload_file)
+
+    # Agents keep conversation state: every pipeline run gets its own set
+    def optimize(query):
+        return optimize_query(query, agents=create_agents())
+
+    with tracer.start_as_current_span("optimize_workload") as span:
+        report = optimize_workload(
+            statements,
+            optimize,
+            # Cached reports are only reused while the schema and indexes are unchanged
+            cache=WorkloadCache(cache_dir, database_version=get_connection_manager().version()),
+            max_workers=max_workers,
+            refresh=refresh,
+        )
+        span.set_attribute("workload.total_statements", report["total_statements"])
+        span.set_attribute("workload.distinct_fingerprints", report["distinct_fingerprints"])
+        span.set_attribute("workload.pipeline_runs", report["pipeline_runs"])
+        span.set_attribute("workload.cache_hits", report["cache_hits"])
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    print(text)
+
+
 @cli.command()
 def create_bank_table():
     """Create a bank table with id and balance columns."""
-    conn = sqlite3.connect("query_optimizer.db")
-    cursor = conn.cursor()
-    cursor.execute(
+    with get_connection_manager().writer() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bank (
+                id INTEGER PRIMARY KEY,
+                balance REAL NOT NULL
+            )
         """
-        CREATE TABLE IF NOT EXISTS bank (
-            id INTEGER PRIMARY KEY,
-            balance REAL NOT NULL
         )
-    """
-    )
-    conn.commit()
-    conn.close()
     print(json.dumps({"status": "success", "message": "Bank table created"}, indent=2))
 
 
 @cli.command()
 def fill_bank_table():
     """Fill the bank table with 100 rows of random data, summing to 1000."""
-    conn = sqlite3.connect("query_optimizer.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='bank';")
-    if not cursor.fetchone():
-        print(
-            json.dumps(
-                {"status": "error", "message": "Bank table does not exist"}, indent=2
+    with get_connection_manager().writer() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='bank';")
+        if not cursor.fetchone():
+            print(
+                json.dumps(
+                    {"status": "error", "message": "Bank table does not exist"}, indent=2
+                )
             )
+            return
+
+        total = 1000.0
+        balances = [random.uniform(0, total) for _ in range(99)]
+        balances.append(total - sum(balances))
+        random.shuffle(balances)
+
+        cursor.execute("DELETE FROM bank")
+        cursor.executemany(
+            "INSERT INTO bank (id, balance) VALUES (?, ?)",
+            [(i + 1, balance) for i, balance in enumerate(balances)],
         )
-        conn.close()
-        return
-
-    total = 1000.0
-    balances = [random.uniform(0, total) for _ in range(99)]
-    balances.append(total - sum(balances))
-    random.shuffle(balances)
-
-    cursor.execute("DELETE FROM bank")
-    cursor.executemany(
-        "INSERT INTO bank (id, balance) VALUES (?, ?)",
-        [(i + 1, balance) for i, balance in enumerate(balances)],
-    )
-    conn.commit()
 
-    cursor.execute("SELECT SUM(balance) FROM bank")
-    actual_sum = cursor.fetchone()[0]
-    conn.close()
+        cursor.execute("SELECT SUM(balance) FROM bank")
+        actual_sum = cursor.fetchone()[0]
     print(
         json.dumps(
             {
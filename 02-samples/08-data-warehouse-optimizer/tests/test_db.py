@@ -0,0 +1,86 @@
+"""
+Unit tests for the shared SQLite connection manager and plan cache.
+"""
+
+import unittest
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from utils.db import ConnectionManager, normalize_sql
+
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, "test.db")
+        self.manager = ConnectionManager(self.database, plan_cache_size=2)
+        with self.manager.writer() as conn:
+            conn.execute("CREATE TABLE sales_data (order_id INTEGER PRIMARY KEY, order_date TEXT)")
+            conn.execute("INSERT INTO sales_data (order_date) VALUES ('2025-01-01')")
+
+    def tearDown(self):
+        self.manager.close()
+        self.directory.cleanup()
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT *\n  FROM Sales_Data -- comment\nWHERE order_date > '2025-01-01' ;"),
+            "select * from sales_data where order_date > '2025-01-01'",
+        )
+        self.assertNotEqual(
+            normalize_sql("SELECT * FROM t WHERE name LIKE 'ABC%'"),
+            normalize_sql("SELECT * FROM t WHERE name LIKE '%ABC'"),
+        )
+
+    def test_plan_cache(self):
+        query = "SELECT * FROM sales_data WHERE order_date > '2025-01-01'"
+        plan = self.manager.explain(query)
+        self.assertIn("SCAN", plan[0][3])
+        self.assertEqual(self.manager.explain("select *  from sales_data where order_date > '2025-01-01'"), plan)
+        self.assertEqual(self.manager.counters["plan_cache_hits"], 1)
+        self.assertEqual(self.manager.counters["plan_cache_misses"], 1)
+
+        # A schema change invalidates cached plans
+        with self.manager.writer() as conn:
+            conn.execute("CREATE INDEX idx_order_date ON sales_data (order_date)")
+        self.assertIn("idx_order_date", self.manager.explain(query)[0][3])
+        self.assertEqual(self.manager.counters["plan_cache_invalidations"], 1)
+
+        # LRU eviction beyond plan_cache_size
+        self.manager.explain("SELECT 1")
+        self.manager.explain("SELECT 2")
+        self.manager.explain(query)
+        self.assertEqual(self.manager.counters["plan_cache_misses"], 5)
+
+    def test_connections(self):
+        with self.manager.writer() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        reader = self.manager.read_only()
+        self.assertIs(self.manager.read_only(), reader)
+        with self.assertRaises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM sales_data")
+
+        # One read-only connection per thread
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda q: self.manager.explain(q), [f"SELECT {i}" for i in range(20)]))
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(self.manager.counters["connections_opened"], 6)
+
+    def test_replaced_database_is_reopened(self):
+        query = "SELECT * FROM sales_data WHERE order_date > '2025-01-01'"
+        self.assertIn("SCAN", self.manager.explain(query)[0][3])
+        # Removed while this thread's connection still holds it open, so the new file gets another inode
+        os.remove(self.database)
+        # Same schema version, but order_date now has an index
+        conn = sqlite3.connect(self.database)
+        conn.execute("CREATE TABLE sales_data (order_id INTEGER PRIMARY KEY, order_date TEXT UNIQUE)")
+        conn.close()
+        self.assertEqual(self.manager.schema_version(), 1)
+        tables = self.manager.read_only().execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        self.assertEqual(tables, [("sales_data",)])
+        self.assertIn("USING COVERING INDEX", self.manager.explain(query)[0][3])
+
+
+if __name__ == "__main__":
+    unittest.main()
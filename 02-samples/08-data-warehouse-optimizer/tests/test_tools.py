@@ -5,8 +5,15 @@ Unit tests for SQLite database tools.
 import unittest
 import json
 import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from scripts.init_db import init_db
-from utils.tools import get_query_execution_plan
+from utils.index_advisor import advise_indexes, column_roles
+from utils.tools import get_query_execution_plan, suggest_optimizations, validate_query_cost
+from utils.validation import compare_queries, sample_database
 
 
 class TestTools(unittest.TestCase):
@@ -23,6 +30,140 @@ class TestTools(unittest.TestCase):
         self.assertIn("execution_plan", result_dict)
         self.assertIn("Full table scan detected", result_dict["bottlenecks"])
 
+    def test_validate_query_cost_measure(self):
+        original = "SELECT * FROM sales_data WHERE order_date > '2025-01-01'"
+        rewritten = (
+            "SELECT order_id, customer_id, order_date, amount FROM sales_data "
+            "WHERE order_date > '2025-01-01'"
+        )
+        result_dict = json.loads(validate_query_cost(rewritten, original, "measure"))
+        self.assertEqual(result_dict["status"], "success")
+        self.assertTrue(result_dict["equivalent"])
+        self.assertGreater(result_dict["original"]["vm_steps"], 0)
+        self.assertIn("speedup", result_dict)
+
+        different = json.loads(
+            validate_query_cost("SELECT * FROM sales_data", original, "measure")
+        )
+        self.assertFalse(different["equivalent"])
+
+    def test_validate_query_cost_measure_is_read_only(self):
+        original = "SELECT * FROM sales_data"
+        result_dict = json.loads(
+            validate_query_cost("DELETE FROM sales_data", original, "measure")
+        )
+        self.assertEqual(result_dict["status"], "error")
+
+        with self.assertRaises(TimeoutError):
+            compare_queries(
+                original,
+                "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+                "SELECT COUNT(*) FROM c",
+                timeout_seconds=0.2,
+            )
+
+    def test_suggest_optimizations_index_advisor(self):
+        query = "SELECT * FROM sales_data WHERE order_date > '2025-01-01'"
+        result_dict = json.loads(suggest_optimizations(query, get_query_execution_plan(query)))
+        self.assertEqual(result_dict["status"], "success")
+        schema_changes = [s for s in result_dict["suggestions"] if s["type"] == "schema_change"]
+        self.assertTrue(schema_changes)
+        self.assertIn('("order_date")', schema_changes[0]["suggestion"])
+        self.assertIn("measured_speedup", schema_changes[0])
+        self.assertGreater(schema_changes[0]["write_amplification"], 1)
+
+    def test_advise_indexes_candidates(self):
+        query = (
+            "SELECT order_id FROM sales_data WHERE customer_id = 101 "
+            "AND order_date > '2025-01-01' ORDER BY amount"
+        )
+        advice = advise_indexes(query)
+        columns = [r["columns"] for r in advice["recommendations"]]
+        self.assertIn(["customer_id", "order_date"], columns)
+        self.assertIn(["customer_id", "amount"], columns)
+        # The rowid alias is never suggested and the source database is left untouched
+        self.assertNotIn(["order_id"], columns)
+        self.assertTrue(advice["recommendations"][0]["used_by_planner"])
+        conn = sqlite3.connect("query_optimizer.db")
+        self.assertIsNone(conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchone())
+        conn.close()
+
+    def test_advise_indexes_estimated_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "sizes.db")
+            conn = sqlite3.connect(database)
+            conn.execute(
+                "CREATE TABLE orders (order_id INTEGER PRIMARY KEY, customer_id INTEGER, "
+                "order_date TEXT, amount REAL)"
+            )
+            conn.executemany(
+                "INSERT INTO orders (customer_id, order_date, amount) VALUES (?, ?, ?)",
+                [(i % 997, f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", i * 1.5) for i in range(20000)],
+            )
+            conn.commit()
+            conn.close()
+
+            query = (
+                "SELECT order_id FROM orders WHERE customer_id = 101 "
+                "AND order_date > '2025-01-01' ORDER BY amount"
+            )
+            advice = advise_indexes(query, database, sample_rows=20000)
+            self.assertGreater(len(advice["recommendations"]), 2)
+            # Every candidate is sized as if it were built alone, not on pages freed by the previous one
+            for recommendation in advice["recommendations"]:
+                copy = os.path.join(directory, "copy.db")
+                shutil.copyfile(database, copy)
+                conn = sqlite3.connect(copy)
+                pages = conn.execute("PRAGMA page_count").fetchone()[0]
+                conn.execute(recommendation["ddl"])
+                conn.commit()
+                index_bytes = (conn.execute("PRAGMA page_count").fetchone()[0] - pages) * conn.execute(
+                    "PRAGMA page_size"
+                ).fetchone()[0]
+                conn.close()
+                os.remove(copy)
+                self.assertEqual(recommendation["estimated_size_bytes"], index_bytes, recommendation["ddl"])
+
+    def test_column_roles_quoted_identifiers(self):
+        conn = sqlite3.connect("query_optimizer.db")
+        try:
+            roles = column_roles(
+                conn, 'SELECT * FROM "sales_data" WHERE "customer_id" = 7 ORDER BY [order_date]'
+            )
+        finally:
+            conn.close()
+        self.assertEqual(roles["sales_data"]["equality"], ["customer_id"])
+        self.assertEqual(roles["sales_data"]["order"], ["order_date"])
+        advice = advise_indexes('SELECT * FROM "sales_data" WHERE "customer_id" = 7')
+        self.assertEqual(advice["recommendations"][0]["columns"], ["customer_id"])
+
+    def test_sample_database_concurrent_builds(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "source.db")
+            conn = sqlite3.connect(database)
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT INTO t (value) VALUES (?)", [(str(i),) for i in range(5000)])
+            conn.commit()
+            samples = os.path.join(directory, "samples")
+            os.mkdir(samples)
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                paths = list(executor.map(lambda _: sample_database(database, 100, samples), range(4)))
+            self.assertEqual(len(set(paths)), 1)
+            self.assertEqual(os.listdir(samples), [os.path.basename(paths[0])])
+            sample = sqlite3.connect(paths[0])
+            self.assertEqual(sample.execute("SELECT COUNT(*) FROM t").fetchone()[0], 100)
+            sample.close()
+
+            # A changed source gets a new copy and the old one is removed
+            time.sleep(0.01)
+            conn.execute("INSERT INTO t (value) VALUES ('new')")
+            conn.commit()
+            conn.close()
+            path = sample_database(database, 100, samples)
+            self.assertNotEqual(path, paths[0])
+            self.assertEqual(os.listdir(samples), [os.path.basename(path)])
+
 
 if __name__ == "__main__":
     unittest.main()
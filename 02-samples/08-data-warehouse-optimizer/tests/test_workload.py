@@ -0,0 +1,137 @@
+"""
+Unit tests for workload fingerprinting and batch optimization.
+"""
+
+import os
+import unittest
+import tempfile
+import threading
+import time
+from utils.db import ConnectionManager
+from utils.workload import (
+    WorkloadCache,
+    fingerprint,
+    normalize_query,
+    optimize_workload,
+    read_workload,
+)
+
+
+class TestWorkload(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(
+            normalize_query("SELECT * FROM sales_data WHERE order_date > '2025-01-01' AND amount >= 10.5;"),
+            "select * from sales_data where order_date>? and amount>=?",
+        )
+        self.assertEqual(
+            fingerprint("select * FROM sales_data  WHERE customer_id IN (1, 2, 3) -- daily report"),
+            fingerprint("SELECT *\nFROM sales_data WHERE customer_id in (42)"),
+        )
+        # Identifiers containing digits are not literals
+        self.assertIn("t1.col2", normalize_query("SELECT t1.col2 FROM t1 WHERE t1.col2 = 7"))
+        self.assertNotEqual(
+            fingerprint("SELECT * FROM sales_data WHERE customer_id = 1"),
+            fingerprint("SELECT * FROM sales_data WHERE amount = 1"),
+        )
+
+    def test_read_workload(self):
+        log = [
+            "-- nightly batch\n",
+            "SELECT * FROM sales_data\n",
+            "WHERE order_date > '2025-01-01';\n",
+            "\n",
+            "SELECT ';' FROM sales_data; SELECT 1;\n",
+        ]
+        self.assertEqual(
+            read_workload(log),
+            [
+                "SELECT * FROM sales_data\nWHERE order_date > '2025-01-01';",
+                "SELECT ';' FROM sales_data; SELECT 1;",
+            ],
+        )
+        self.assertEqual(read_workload(["SELECT 1\n", "\n", "SELECT 2\n"]), ["SELECT 1", "SELECT 2"])
+
+    def test_optimize_workload_once_per_fingerprint(self):
+        statements = [f"SELECT * FROM sales_data WHERE customer_id = {i}" for i in range(90)]
+        statements += [f"SELECT * FROM sales_data WHERE order_date > '2025-01-{i % 28 + 1:02d}'" for i in range(10)]
+        calls = []
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def optimize(query):
+            nonlocal running, peak
+            with lock:
+                calls.append(query)
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            speedup = 4.0 if "customer_id" in query else 1.0
+            return {"original_query": query, "validation": {"status": "success", "speedup": speedup}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            report = optimize_workload(statements, optimize, cache=WorkloadCache(directory), max_workers=1)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(peak, 1)
+            self.assertEqual(report["total_statements"], 100)
+            self.assertEqual(report["distinct_fingerprints"], 2)
+            self.assertEqual(report["queries"][0]["count"], 90)
+            self.assertEqual(report["queries"][0]["share"], 0.9)
+            self.assertEqual(report["weighted_speedup"], 3.7)
+
+            # Second run is served from the on-disk cache
+            report = optimize_workload(statements, optimize, cache=WorkloadCache(directory))
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(report["cache_hits"], 2)
+            self.assertTrue(all(q["cached"] for q in report["queries"]))
+
+            report = optimize_workload(statements, optimize, cache=WorkloadCache(directory), refresh=True)
+            self.assertEqual(len(calls), 4)
+            self.assertEqual(report["pipeline_runs"], 2)
+
+    def test_failed_runs_are_not_cached(self):
+        def optimize(query):
+            return {"analysis": {"status": "error", "message": "throttled"}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = WorkloadCache(directory)
+            report = optimize_workload(["SELECT 1", "SELECT 2"], optimize, cache=cache)
+            self.assertEqual(report["distinct_fingerprints"], 1)
+            self.assertEqual(report["queries"][0]["status"], "error")
+            self.assertIsNone(cache.get(fingerprint("SELECT 1")))
+
+    def test_cache_is_per_database_version(self):
+        calls = []
+
+        def optimize(query):
+            calls.append(query)
+            return {"validation": {"status": "success", "speedup": 2.0}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            manager = ConnectionManager(os.path.join(directory, "test.db"))
+            with manager.writer() as conn:
+                conn.execute("CREATE TABLE t (a INTEGER, b INTEGER)")
+            cache_dir = os.path.join(directory, "cache")
+
+            def run():
+                return optimize_workload(
+                    ["SELECT * FROM t WHERE a = 1"], optimize, cache=WorkloadCache(cache_dir, manager.version())
+                )
+
+            run()
+            self.assertEqual(run()["cache_hits"], 1)
+
+            # A new index makes the cached advice stale
+            with manager.writer() as conn:
+                conn.execute("CREATE INDEX idx_t_a ON t (a)")
+            report = run()
+            self.assertEqual(report["cache_hits"], 0)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
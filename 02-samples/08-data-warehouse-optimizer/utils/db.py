@@ -0,0 +1,187 @@
+"""
+Shared SQLite connections and query plan cache for the optimizer tools and CLI.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from opentelemetry import trace
+
+DATABASE = "query_optimizer.db"
+PLAN_CACHE_SIZE = 256
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\s+|[^'\"\s]+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Plan cache key: comments removed, whitespace collapsed and keywords folded to
+    lower case, quoted strings and identifiers untouched. Literals are kept, as
+    they can change the plan (e.g. LIKE 'abc%' uses an index, LIKE '%abc' does not).
+    """
+    parts = []
+    for token in _TOKENS.findall(_COMMENTS.sub(" ", query)):
+        if token.isspace():
+            parts.append(" ")
+        elif token[0] in "'\"":
+            parts.append(token)
+        else:
+            parts.append(token.lower())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+class ConnectionManager:
+    """
+    Connections to one SQLite database, shared by every tool call.
+
+    Analysis uses read-only connections (mode=ro URI), one per thread since
+    sqlite3 connections must not be used concurrently. Writes go through a
+    single lock-protected connection that puts the database in WAL mode, so
+    readers are not blocked while it writes. EXPLAIN QUERY PLAN results are
+    kept in an LRU cache keyed by normalized SQL, the database file and its
+    schema version.
+    """
+
+    def __init__(self, database: str = DATABASE, plan_cache_size: int = PLAN_CACHE_SIZE):
+        self.database = database
+        self.plan_cache_size = plan_cache_size
+        self._local = threading.local()
+        self._writer = None
+        self._writer_file_id = None
+        self._write_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._plans: "OrderedDict[Tuple[str, tuple, int], List[tuple]]" = OrderedDict()
+        self.counters = {
+            "connections_opened": 0,
+            "plan_cache_hits": 0,
+            "plan_cache_misses": 0,
+            "plan_cache_invalidations": 0,
+        }
+
+    def _file_id(self):
+        """Identity of the database file, to notice when it is deleted or replaced."""
+        if not os.path.exists(self.database):
+            return None
+        stat = os.stat(self.database)
+        return stat.st_dev, stat.st_ino
+
+    def _count(self, name: str):
+        with self._cache_lock:
+            self.counters[name] += 1
+
+    def read_only(self) -> sqlite3.Connection:
+        """This thread's read-only connection (reopened if the database file was replaced)."""
+        conn = getattr(self._local, "conn", None)
+        file_id = self._file_id()
+        if conn is not None and self._local.file_id == file_id:
+            return conn
+        if conn is not None:
+            conn.close()
+        # No statement cache: EXPLAIN statements are not re-prepared after a schema
+        # change, so a cached one would keep returning the old plan
+        conn = sqlite3.connect(f"file:{self.database}?mode=ro", uri=True, cached_statements=0)
+        self._local.conn, self._local.file_id = conn, file_id
+        self._count("connections_opened")
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """The write connection, held exclusively; commits on success, rolls back on error."""
+        with self._write_lock:
+            if self._writer is None or self._writer_file_id != self._file_id():
+                if self._writer is not None:
+                    self._writer.close()
+                self._writer = sqlite3.connect(self.database, check_same_thread=False)
+                self._writer.execute("PRAGMA journal_mode=WAL")
+                self._writer_file_id = self._file_id()
+                self._count("connections_opened")
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    def schema_version(self) -> int:
+        """Incremented by SQLite on every change to sqlite_master."""
+        conn = self.read_only()
+        # Reading sqlite_master makes the connection reload a schema changed by another one
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+    def version(self) -> Tuple[tuple, int]:
+        """
+        (file identity, schema version) of the database, changes when an index or
+        table is created or dropped and when the file is replaced.
+        """
+        if self._file_id() is None:
+            return None, 0
+        version = self.schema_version()
+        # A replaced database file can have the same schema version with other indexes
+        # (file identity of the connection schema_version just used, schema version)
+        return self._local.file_id, version
+
+    def explain(self, query: str) -> List[tuple]:
+        """EXPLAIN QUERY PLAN rows for a query, cached while the database file and schema are unchanged."""
+        current = self.version()
+        key = (normalize_sql(query),) + current
+        with self._cache_lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.counters["plan_cache_hits"] += 1
+            else:
+                # Plans of an older schema or file can never be hit again
+                stale = [k for k in self._plans if k[1:] != current]
+                for k in stale:
+                    del self._plans[k]
+                self.counters["plan_cache_invalidations"] += len(stale)
+        hit = plan is not None
+        if not hit:
+            plan = self.read_only().execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+            with self._cache_lock:
+                self.counters["plan_cache_misses"] += 1
+                self._plans[key] = plan
+                while len(self._plans) > self.plan_cache_size:
+                    self._plans.popitem(last=False)
+        span = trace.get_current_span()
+        span.set_attribute("sqlite.plan_cache_hit", hit)
+        self.record(span)
+        return list(plan)
+
+    def record(self, span=None):
+        """Export the counters as attributes of the given (or current) span."""
+        span = span or trace.get_current_span()
+        with self._cache_lock:
+            counters = dict(self.counters, plan_cache_size=len(self._plans))
+        for name, value in counters.items():
+            span.set_attribute(f"sqlite.{name}", value)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(database: str = DATABASE) -> ConnectionManager:
+    """The process-wide connection manager of a database."""
+    with _managers_lock:
+        manager = _managers.get(database)
+        if manager is None:
+            manager = _managers[database] = ConnectionManager(database)
+        return manager
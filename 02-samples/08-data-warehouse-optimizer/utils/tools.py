@@ -8,6 +8,12 @@ import uuid
 from typing import List
 from strands import tool
 from opentelemetry import trace
+from utils.db import get_connection_manager
+from utils.index_advisor import advise_indexes
+from utils.validation import compare_queries
+
+# Index DDL returned by suggest_optimizations (best measured candidates first)
+MAX_INDEX_SUGGESTIONS = 3
 
 
 @tool
@@ -23,11 +29,7 @@ def get_query_execution_plan(query: str) -> str:
     """
     with trace.get_tracer(__name__).start_as_current_span("get_query_execution_plan"):
         try:
-            conn = sqlite3.connect("query_optimizer.db")
-            cursor = conn.cursor()
-            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
-            plan = cursor.fetchall()
-            conn.close()
+            plan = get_connection_manager().explain(query)
             return json.dumps(
                 {
                     "status": "success",
@@ -57,6 +59,11 @@ def suggest_optimizations(query: str, execution_plan: str) -> str:
     """
     Suggests query rewrites or schema changes based on the query and execution plan.
 
+    When the plan contains a full table scan, candidate indexes on the query's
+    predicate, join and ORDER BY columns are built on a scratch copy of the
+    database and ranked by measured speedup; the best ones are returned as DDL
+    with their speedup and write-amplification cost.
+
     Args:
         query (str): The original SQL query.
         execution_plan (str): JSON string of the execution plan.
@@ -64,17 +71,27 @@ def suggest_optimizations(query: str, execution_plan: str) -> str:
     Returns:
         str: JSON string with suggested query rewrites or schema changes.
     """
-    with trace.get_tracer(__name__).start_as_current_span("suggest_optimizations"):
+    with trace.get_tracer(__name__).start_as_current_span("suggest_optimizations") as span:
         try:
             plan_data = json.loads(execution_plan)
             suggestions = []
-            if "full table scan" in str(plan_data.get("bottlenecks", [])):
-                suggestions.append(
-                    {
-                        "type": "schema_change",
-                        "suggestion": "Create index on filtered columns (e.g., customer_id, order_date)",
-                    }
-                )
+            if "full table scan" in str(plan_data.get("bottlenecks", [])).lower():
+                # Candidate indexes are built and measured on a scratch copy of the database
+                advice = advise_indexes(query)
+                recommended = [r for r in advice["recommendations"] if r["used_by_planner"]]
+                span.set_attribute("index_advisor.candidates", len(advice["recommendations"]))
+                span.set_attribute("index_advisor.recommended", len(recommended))
+                for recommendation in recommended[:MAX_INDEX_SUGGESTIONS]:
+                    suggestions.append(
+                        {
+                            "type": "schema_change",
+                            "suggestion": recommendation["ddl"],
+                            "measured_speedup": recommendation["speedup"],
+                            "vm_step_ratio": recommendation["vm_step_ratio"],
+                            "estimated_size_bytes": recommendation["estimated_size_bytes"],
+                            "write_amplification": recommendation["write_amplification"],
+                        }
+                    )
                 suggestions.append(
                     {
                         "type": "query_rewrite",
@@ -95,32 +112,58 @@ def suggest_optimizations(query: str, execution_plan: str) -> str:
 
 
 @tool
-def validate_query_cost(query: str) -> str:
+def validate_query_cost(query: str, original_query: str = "", mode: str = "estimate") -> str:
     """
-    Validates the cost of a rewritten query using SQLite's EXPLAIN QUERY PLAN.
+    Validates the cost of a rewritten query.
+
+    In "estimate" mode the cost is estimated from SQLite's EXPLAIN QUERY PLAN.
+    In "measure" mode the original and rewritten queries are executed on a sampled,
+    read-only copy of the database, reporting wall time, VM steps (rows examined),
+    the measured speedup and whether both return the same result set.
 
     Args:
         query (str): The rewritten SQL query to validate.
+        original_query (str): The query before optimization (required for "measure").
+        mode (str): "estimate" or "measure".
 
     Returns:
-        str: JSON string with estimated query cost or error message.
+        str: JSON string with estimated query cost (and measurements) or error message.
     """
-    with trace.get_tracer(__name__).start_as_current_span("validate_query_cost"):
+    with trace.get_tracer(__name__).start_as_current_span("validate_query_cost") as span:
         try:
-            conn = sqlite3.connect("query_optimizer.db")
-            cursor = conn.cursor()
-            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
-            plan = cursor.fetchall()
-            conn.close()
+            plan = get_connection_manager().explain(query)
             cost = estimate_cost(plan)
+            if mode != "measure":
+                return json.dumps(
+                    {
+                        "status": "success",
+                        "cost": cost,
+                        "message": f"Estimated query cost: {cost}",
+                    }
+                )
+            if not original_query:
+                return json.dumps(
+                    {"status": "error", "message": "original_query is required in measure mode"}
+                )
+
+            comparison = compare_queries(original_query, query)
+            span.set_attribute("validation.speedup", comparison["speedup"])
+            span.set_attribute("validation.equivalent", comparison["equivalent"])
+            verdict = (
+                "results match" if comparison["equivalent"] else "RESULTS DIFFER from the original query"
+            )
             return json.dumps(
                 {
                     "status": "success",
+                    "mode": "measure",
                     "cost": cost,
-                    "message": f"Estimated query cost: {cost}",
+                    **comparison,
+                    "message": f"Measured speedup: {comparison['speedup']}x "
+                    f"({comparison['original']['wall_time_ms']} ms -> "
+                    f"{comparison['rewritten']['wall_time_ms']} ms), {verdict}",
                 }
             )
-        except sqlite3.Error as e:
+        except (sqlite3.Error, TimeoutError) as e:
             return json.dumps({"status": "error", "message": str(e)})
 
 
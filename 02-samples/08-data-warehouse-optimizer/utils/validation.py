@@ -0,0 +1,233 @@
+"""
+Measured query validation: runs the original and rewritten query on a sampled,
+read-only copy of the database and compares wall time, work done and results.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+# Progress handler granularity (virtual machine instructions between calls): fine-grained
+# while counting VM steps, coarse during timed runs where it only enforces the timeout
+VM_STEP_GRANULARITY = 10
+TIMEOUT_CHECK_STEPS = 10000
+
+# Operations a validated query may perform (everything else is denied by the authorizer)
+_ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+
+
+def sample_database(
+    database: str = "query_optimizer.db", sample_rows: int = 10000, directory: Optional[str] = None
+) -> str:
+    """
+    Create (or reuse) a sampled copy of the database for measured validation.
+
+    Every table is copied with at most `sample_rows` rows, taken evenly by rowid,
+    along with its indexes and views. The copy is rebuilt when the source changes,
+    and copies of earlier versions of the source are removed.
+
+    Args:
+        database (str): Path of the source SQLite database.
+        sample_rows (int): Maximum rows copied per table.
+        directory (str): Where to keep the copy (defaults to the temp directory).
+
+    Returns:
+        str: Path of the sampled database.
+    """
+    stats = [os.stat(path) for path in (database, database + "-wal") if os.path.exists(path)]
+    if not stats:
+        raise sqlite3.OperationalError(f"Database not found: {database}")
+    source_key = hashlib.sha256(repr((os.path.abspath(database), sample_rows)).encode()).hexdigest()[:16]
+    version_key = hashlib.sha256(repr([(s.st_mtime_ns, s.st_size) for s in stats]).encode()).hexdigest()[:16]
+    directory = directory or tempfile.gettempdir()
+    prefix = f"query_optimizer_sample_{source_key}_"
+    target = os.path.join(directory, f"{prefix}{version_key}.db")
+    if os.path.exists(target):
+        return target
+
+    # A file of its own: other threads and processes may be building the same sample
+    handle, partial = tempfile.mkstemp(dir=directory, prefix=f"{prefix}{version_key}.", suffix=".tmp")
+    os.close(handle)
+    try:
+        source = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        sample = sqlite3.connect(f"file:{partial}", uri=True)
+        try:
+            objects = source.execute(
+                "SELECT type, name, sql FROM sqlite_master "
+                "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY type = 'table' DESC"
+            ).fetchall()
+            sample.execute("ATTACH DATABASE ? AS source", (f"file:{database}?mode=ro",))
+            for object_type, name, sql in objects:
+                if object_type != "table":
+                    continue
+                sample.execute(sql)
+                quoted = '"' + name.replace('"', '""') + '"'
+                total = source.execute(f"SELECT COUNT(*) FROM {quoted}").fetchone()[0]
+                step = max(1, math.ceil(total / sample_rows))
+                try:
+                    sample.execute(
+                        f"INSERT INTO main.{quoted} SELECT * FROM source.{quoted} WHERE rowid % ? = 0", (step,)
+                    )
+                except sqlite3.OperationalError:
+                    # WITHOUT ROWID tables: take the first rows instead
+                    sample.execute(
+                        f"INSERT INTO main.{quoted} SELECT * FROM source.{quoted} LIMIT ?", (sample_rows,)
+                    )
+            # Indexes, views and triggers after the data is in place
+            for object_type, name, sql in objects:
+                if object_type != "table":
+                    sample.execute(sql)
+            sample.commit()
+            sample.execute("DETACH DATABASE source")
+        finally:
+            sample.close()
+            source.close()
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    # Copies of earlier versions of this source can never be reused
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(".db") and name != os.path.basename(target):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                # Still open on a platform that cannot remove open files
+                pass
+    return target
+
+
+def connect_read_only(database: str) -> sqlite3.Connection:
+    """Open a connection that can only read: read-only URI, query_only and an authorizer."""
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+
+    def authorizer(action, *args):
+        return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+    conn.set_authorizer(authorizer)
+    return conn
+
+
+def _execute(conn: sqlite3.Connection, query: str, timeout_seconds: float, progress_steps: int, hash_rows: bool):
+    """Run a query to completion. Returns (seconds, progress handler calls, rows, ordered, unordered hash)."""
+    progress_calls = 0
+    deadline = time.perf_counter() + timeout_seconds
+
+    def progress():
+        nonlocal progress_calls
+        progress_calls += 1
+        # A non-zero return value interrupts the query
+        return 1 if time.perf_counter() > deadline else 0
+
+    conn.set_progress_handler(progress, progress_steps)
+    try:
+        start = time.perf_counter()
+        cursor = conn.execute(query)
+        ordered = hashlib.sha256()
+        unordered = 0
+        rows = 0
+        if hash_rows:
+            for row in cursor:
+                encoded = repr(row).encode()
+                ordered.update(encoded + b"\n")
+                # Order-independent multiset hash: sum of the row hashes
+                unordered = (unordered + int.from_bytes(hashlib.sha256(encoded).digest(), "big")) % (1 << 256)
+                rows += 1
+        else:
+            for _ in cursor:
+                rows += 1
+        elapsed = time.perf_counter() - start
+    except sqlite3.OperationalError as e:
+        if "interrupted" in str(e):
+            raise TimeoutError(f"Query exceeded the {timeout_seconds}s timeout") from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+    return elapsed, progress_calls, rows, ordered.hexdigest(), f"{unordered:064x}"
+
+
+def measure_query(
+    conn: sqlite3.Connection, query: str, timeout_seconds: float = 5.0, repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Execute a query and measure it.
+
+    The first run counts virtual machine steps and hashes the result set; the
+    timed runs only fetch the rows, so neither distorts the wall time.
+
+    Args:
+        conn: Connection to run the query on (see connect_read_only).
+        query (str): The SQL query.
+        timeout_seconds (float): Abort any run after this long.
+        repeat (int): Number of timed runs; the best wall time is reported.
+
+    Returns:
+        Dict: wall_time_ms, vm_steps (virtual machine instructions, a proxy for rows
+        examined), rows returned and hashes of the result set (ordered and unordered).
+    """
+    _, calls, rows, ordered_hash, unordered_hash = _execute(
+        conn, query, timeout_seconds, VM_STEP_GRANULARITY, hash_rows=True
+    )
+    best_time = min(
+        _execute(conn, query, timeout_seconds, TIMEOUT_CHECK_STEPS, hash_rows=False)[0]
+        for _ in range(max(1, repeat))
+    )
+    return {
+        "rows": rows,
+        "vm_steps": calls * VM_STEP_GRANULARITY,
+        "ordered_hash": ordered_hash,
+        "unordered_hash": unordered_hash,
+        "wall_time_ms": round(best_time * 1000, 3),
+    }
+
+
+def compare_queries(
+    original_query: str,
+    rewritten_query: str,
+    database: str = "query_optimizer.db",
+    sample_rows: int = 10000,
+    timeout_seconds: float = 5.0,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    """
+    Run the original and rewritten query on a sampled copy of the database.
+
+    Args:
+        original_query (str): The query before optimization.
+        rewritten_query (str): The optimized query.
+        database (str): Path of the SQLite database.
+        sample_rows (int): Maximum rows per table in the sampled copy.
+        timeout_seconds (float): Per-run timeout for each query.
+        repeat (int): Runs per query; the best wall time is reported.
+
+    Returns:
+        Dict: measurements of both queries, speedup (original / rewritten wall time),
+        vm_step_ratio, and whether the result sets are equivalent (same rows) and in
+        the same order.
+    """
+    conn = connect_read_only(sample_database(database, sample_rows))
+    try:
+        original = measure_query(conn, original_query, timeout_seconds, repeat)
+        rewritten = measure_query(conn, rewritten_query, timeout_seconds, repeat)
+    finally:
+        conn.close()
+    return {
+        "original": original,
+        "rewritten": rewritten,
+        "speedup": round(original["wall_time_ms"] / max(rewritten["wall_time_ms"], 1e-3), 2),
+        "vm_step_ratio": round(original["vm_steps"] / max(rewritten["vm_steps"], 1), 2),
+        "equivalent": original["unordered_hash"] == rewritten["unordered_hash"],
+        "order_preserved": original["ordered_hash"] == rewritten["ordered_hash"],
+        "sample_rows": sample_rows,
+    }
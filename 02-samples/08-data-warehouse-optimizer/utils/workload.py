@@ -0,0 +1,223 @@
+"""
+Workload-level optimization: groups the statements of a SQL log by fingerprint
+(literals stripped), runs the optimization pipeline once per fingerprint and
+reports the results weighted by how often each query shape occurs.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w.])[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w.])")
+_HEX = re.compile(r"\b(?:0x[0-9a-fA-F]+|[xX]'[0-9a-fA-F]*')")
+_PARAMETERS = re.compile(r"(?:\?\d*|[:@$]\w+)")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Reduce a statement to its shape: comments removed, literals and bind
+    parameters replaced by ?, IN lists collapsed, whitespace and case folded.
+    """
+    text = _COMMENTS.sub(" ", query)
+    text = _STRINGS.sub("?", text)
+    text = _HEX.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _PARAMETERS.sub("?", text)
+    text = _IN_LIST.sub("(?)", text)
+    text = _VALUES_LIST.sub(r"\1", text)
+    text = re.sub(r"\s+", " ", text).strip().rstrip(";").strip()
+    text = re.sub(r"\s*([(),=<>])\s*", r"\1", text)
+    return text.lower()
+
+
+def fingerprint(query: str) -> str:
+    """Stable identifier of a query shape (see normalize_query)."""
+    return hashlib.sha256(normalize_query(query).encode()).hexdigest()[:16]
+
+
+def read_workload(lines: Iterable[str]) -> List[str]:
+    """
+    Split a workload log into statements.
+
+    Statements end with a semicolon and may span several lines; a log without
+    any semicolons is read as one statement per line. Blank and comment-only
+    lines are skipped.
+    """
+    lines = [line.rstrip("\n") for line in lines]
+    if not any(";" in line for line in lines):
+        return [line.strip() for line in lines if line.strip() and not line.strip().startswith("--")]
+
+    statements = []
+    buffer = ""
+    for line in lines:
+        if not buffer and (not line.strip() or line.strip().startswith("--")):
+            continue
+        buffer += line + "\n"
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def group_workload(statements: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Deduplicate statements by fingerprint.
+
+    Returns:
+        Dict: {fingerprint: {"normalized", "example", "count"}}, most frequent first.
+        The example is the first statement seen with that shape.
+    """
+    groups = {}
+    for statement in statements:
+        key = fingerprint(statement)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"normalized": normalize_query(statement), "example": statement, "count": 0}
+        group["count"] += 1
+    return dict(sorted(groups.items(), key=lambda item: item[1]["count"], reverse=True))
+
+
+class WorkloadCache:
+    """
+    Optimization reports on disk, one JSON file per fingerprint and database version.
+
+    Advice and speedups depend on the tables and indexes of the database, so
+    reports made for another database_version (e.g. ConnectionManager.version())
+    are not returned, and are removed when the fingerprint is cached again.
+    """
+
+    def __init__(self, directory: str = ".workload_cache", database_version: Any = None):
+        self.directory = directory
+        self.version = hashlib.sha256(repr(database_version).encode()).hexdigest()[:16]
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, version: Optional[str] = None) -> str:
+        return os.path.join(self.directory, f"{key}-{version or self.version}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, report: Dict[str, Any]):
+        # Write to a temporary file first so a crash never leaves a truncated entry
+        handle, partial = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "w") as f:
+            json.dump(report, f, indent=2)
+        os.replace(partial, self._path(key))
+        for stale in glob.glob(self._path(key, "*")):
+            if stale != self._path(key):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _failed(report: Dict[str, Any]) -> bool:
+    return any(
+        isinstance(report.get(stage), dict) and report[stage].get("status") == "error"
+        for stage in ("analysis", "suggestions", "validation")
+    )
+
+
+def optimize_workload(
+    statements: Iterable[str],
+    optimize: Callable[[str], Dict[str, Any]],
+    cache: Optional[WorkloadCache] = None,
+    max_workers: int = 4,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    Optimize a workload once per query shape.
+
+    Args:
+        statements: SQL statements of the workload (duplicates expected).
+        optimize: Pipeline run for one representative query (e.g. optimize_query).
+        cache: Reports of previous runs against the same database version; fingerprints
+            found here are not re-optimized. Runs with an error in any stage are not cached.
+        max_workers (int): Maximum pipeline runs in parallel.
+        refresh (bool): Re-run every fingerprint, replacing the cached reports.
+
+    Returns:
+        Dict: workload totals and one entry per fingerprint, most frequent first,
+        with its share of the workload, the measured speedup when the validator
+        reported one, and the pipeline report.
+    """
+    groups = group_workload(statements)
+    total = sum(group["count"] for group in groups.values())
+
+    reports = {}
+    pending = []
+    for key, group in groups.items():
+        cached = cache.get(key) if cache and not refresh else None
+        if cached is not None:
+            reports[key] = cached
+        else:
+            pending.append(key)
+
+    lock = threading.Lock()
+
+    def run(key):
+        report = optimize(groups[key]["example"])
+        if cache and not _failed(report):
+            cache.put(key, report)
+        with lock:
+            reports[key] = report
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for future in [executor.submit(run, key) for key in pending]:
+            future.result()
+
+    entries = []
+    weighted_speedup = 0.0
+    measured_weight = 0
+    for key, group in groups.items():
+        report = reports[key]
+        validation = report.get("validation") if isinstance(report.get("validation"), dict) else {}
+        speedup = _number(validation.get("speedup"))
+        if speedup:
+            weighted_speedup += group["count"] * speedup
+            measured_weight += group["count"]
+        entries.append(
+            {
+                "fingerprint": key,
+                "normalized_query": group["normalized"],
+                "example_query": group["example"],
+                "count": group["count"],
+                "share": round(group["count"] / total, 4),
+                "cached": key not in pending,
+                "status": "error" if _failed(report) else "success",
+                "speedup": speedup,
+                "report": report,
+            }
+        )
+
+    return {
+        "total_statements": total,
+        "distinct_fingerprints": len(groups),
+        "pipeline_runs": len(pending),
+        "cache_hits": len(groups) - len(pending),
+        # Mean speedup per executed statement, over the shapes with a measurement
+        "weighted_speedup": round(weighted_speedup / measured_weight, 2) if measured_weight else None,
+        "measured_share": round(measured_weight / total, 4) if total else 0.0,
+        "queries": entries,
+    }
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Offline check of the shared market data service.
+
+Runs the data tools of one swarm analysis (get_real_stock_data, get_company_info,
+get_financial_metrics, get_stock_prices, get_stock_news) against a synthetic
+fixture with a simulated network latency, without caching (every tool fetches
+for itself, as before the shared service) and with it, then checks that
+concurrent callers for the same ticker share one in-flight fetch and that
+expired entries do not pile up in the cache.
+
+Usage:
+    uv run check_market_data.py --latency-ms 400
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from company_analysis_agent import get_company_info, get_stock_news
+from finance_assistant_swarm import get_real_stock_data
+from financial_metrics_agent import get_financial_metrics
+from market_data import FixtureSource, configure_market_data
+from stock_price_agent import get_stock_prices
+
+TICKER = "DEMO"
+
+
+def write_fixture(fixture_dir):
+    """A synthetic ticker: 3 months of daily bars, company info and five headlines."""
+    directory = os.path.join(fixture_dir, TICKER)
+    os.makedirs(directory, exist_ok=True)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=63)
+    close = 100 + np.cumsum(np.random.default_rng(7).normal(0, 1, len(dates)))
+    pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1_000_000},
+        index=pd.Index(dates, name="Date"),
+    ).to_csv(os.path.join(directory, "history.csv"))
+    info = {
+        "shortName": "Demo Corp", "longName": "Demo Corporation", "sector": "Technology",
+        "industry": "Software", "marketCap": 10_000_000_000, "trailingPE": 25.0,
+        "fiftyTwoWeekHigh": 120.0, "fiftyTwoWeekLow": 80.0, "profitMargins": 0.2,
+    }
+    with open(os.path.join(directory, "info.json"), "w") as f:
+        json.dump(info, f)
+    news = [
+        {"title": f"Demo Corp headline {i}", "link": f"https://example.com/{i}",
+         "publisher": "Example", "providerPublishTime": 1_750_000_000 + i}
+        for i in range(5)
+    ]
+    with open(os.path.join(directory, "news.json"), "w") as f:
+        json.dump(news, f)
+
+
+class SlowSource(FixtureSource):
+    """Fixture source answering after a delay, like a Yahoo Finance round trip."""
+
+    def __init__(self, fixture_dir, latency):
+        super().__init__(fixture_dir)
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _slow(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def info(self, ticker):
+        self._slow()
+        return super().info(ticker)
+
+    def history(self, ticker, period):
+        self._slow()
+        return super().history(ticker, period)
+
+    def news(self, ticker):
+        self._slow()
+        return super().news(ticker)
+
+
+def run_analysis_tools():
+    results = []
+    # Keep the tools' own prints out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for tool in (get_real_stock_data, get_company_info, get_financial_metrics,
+                     get_stock_prices, get_stock_news):
+            results.append(tool(TICKER))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Yahoo Finance calls of one swarm analysis")
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--callers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        write_fixture(fixture_dir)
+
+        no_cache = {"quote": 0, "fundamentals": 0, "news": 0}
+        for label, ttl in (("without cache", no_cache), ("shared service", None)):
+            source = SlowSource(fixture_dir, args.latency_ms / 1000)
+            configure_market_data(source=source, ttl=ttl)
+            start = time.perf_counter()
+            results = run_analysis_tools()
+            elapsed = time.perf_counter() - start
+            assert all(r["status"] == "success" for r in results), results
+            print(f"{label:<16} {source.calls:2d} source calls  {elapsed * 1000:7.1f} ms")
+        assert source.calls == 3, "expected one quote, one fundamentals and one news fetch"
+
+        # Second analysis within the TTLs: no source calls at all
+        run_analysis_tools()
+        assert source.calls == 3
+        print("repeat analysis   0 source calls")
+
+        # Concurrent callers wait on one in-flight fetch
+        source = SlowSource(fixture_dir, args.latency_ms / 1000)
+        service = configure_market_data(source=source)
+        with ThreadPoolExecutor(max_workers=args.callers) as executor:
+            infos = list(executor.map(lambda _: service.info(TICKER), range(args.callers)))
+        assert source.calls == 1 and all(info == infos[0] for info in infos)
+        print(f"{args.callers} concurrent callers: {source.calls} source call")
+
+        # Errors reach every waiting caller and are not cached
+        class FailingSource(SlowSource):
+            def info(self, ticker):
+                self._slow()
+                raise ConnectionError("rate limited")
+
+        source = FailingSource(fixture_dir, args.latency_ms / 1000)
+        service = configure_market_data(source=source)
+        with ThreadPoolExecutor(max_workers=args.callers) as executor:
+            futures = [executor.submit(service.info, TICKER) for _ in range(args.callers)]
+        assert all(isinstance(f.exception(), ConnectionError) for f in futures)
+        calls = source.calls
+        with contextlib.suppress(ConnectionError):
+            service.info(TICKER)
+        assert source.calls == calls + 1
+
+        # Expired entries are dropped when new values are stored, cached history is not shared
+        service = configure_market_data(source=FixtureSource(fixture_dir), ttl=no_cache)
+        for _ in range(3):
+            service.info(TICKER)
+            service.news(TICKER)
+        assert len(service._cache) <= 1 and service.fetches == {"fundamentals": 3, "news": 3}
+        service = configure_market_data(source=FixtureSource(fixture_dir))
+        history = service.history(TICKER)
+        history["Close"] = 0.0
+        assert (service.history(TICKER)["Close"] > 0).all()
+        print("OK: one fetch per ticker and field group, errors are not cached")
+
+
+if __name__ == "__main__":
+    main()
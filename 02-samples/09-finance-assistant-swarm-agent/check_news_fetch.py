@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Offline check of the concurrent news fetch in get_stock_news.
+
+Replaces the news sources with simulated ones (one returns nothing, one is
+blocked until its request times out, the others answer after different delays
+with a duplicate headline) and compares trying them one after another, as
+get_stock_news used to, with querying all of them at once and returning as
+soon as enough distinct articles are in. Then checks the per-ticker cache.
+
+Usage:
+    uv run check_news_fetch.py --blocked-timeout 3
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import company_analysis_agent
+from company_analysis_agent import fetch_news, get_stock_news, NEWS_LIMIT
+from market_data import configure_market_data
+
+
+def simulated_source(name, delay, titles, fail=False):
+    def fetch(ticker, company_name, stop):
+        time.sleep(delay)
+        if fail:
+            raise TimeoutError(f"{name} did not answer")
+        return [
+            {"title": title, "summary": "", "url": f"https://example.com/{title.replace(' ', '-')}",
+             "source": name, "date": "2025-01-01"}
+            for title in titles
+        ]
+    return name, fetch
+
+
+def sequential_fetch(sources, limit=NEWS_LIMIT):
+    """The previous behavior: next source only while fewer than `limit` articles."""
+    news = []
+    for name, fetch in sources:
+        if len(news) >= limit:
+            break
+        try:
+            for item in fetch("DEMO", "Demo Corp", None):
+                if item["title"] not in [n["title"] for n in news]:
+                    news.append(item)
+        except Exception:
+            pass
+    return news[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and concurrent news fetching")
+    parser.add_argument("--blocked-timeout", type=float, default=3.0)
+    args = parser.parse_args()
+
+    sources = [
+        simulated_source("Yahoo Finance API", 0.2, []),
+        simulated_source("MarketWatch", args.blocked_timeout, [], fail=True),
+        simulated_source("CNBC", 0.6, ["Demo beats estimates", "Demo expands cloud unit", "Demo names new CFO"]),
+        simulated_source("Seeking Alpha", 0.9, ["Demo: buy the dip?", "Demo dividend outlook"]),
+        simulated_source("Google News", 0.4, ["Demo beats estimates", "Demo shares rise", "Analysts upgrade Demo"]),
+    ]
+
+    start = time.perf_counter()
+    sequential = sequential_fetch(sources)
+    sequential_time = time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        concurrent, checked = fetch_news("DEMO", "Demo Corp", sources=sources)
+        concurrent_time = time.perf_counter() - start
+
+    print(f"sequential: {len(sequential)} articles in {sequential_time * 1000:7.1f} ms")
+    print(f"concurrent: {len(concurrent)} articles in {concurrent_time * 1000:7.1f} ms "
+          f"(answered: {', '.join(checked)})")
+    titles = [item["title"] for item in concurrent]
+    assert len(concurrent) == NEWS_LIMIT and len(set(titles)) == len(titles), titles
+    assert concurrent_time < args.blocked_timeout, "a blocked source delayed the result"
+    # Preference order: CNBC's articles come before Google's
+    assert titles[0] == "Demo beats estimates" and concurrent[0]["source"] == "CNBC"
+
+    # Headlines are cached per ticker by the market data service
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        service = configure_market_data(fixture_dir=fixture_dir)
+        company_analysis_agent.NEWS_SOURCES = sources
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = get_stock_news("DEMO")
+            start = time.perf_counter()
+            second = get_stock_news("demo")
+            cached_time = time.perf_counter() - start
+            assert service.fetches["headlines"] == 1
+            # Invalidating the ticker or replacing the service searches again
+            service.invalidate("DEMO")
+            get_stock_news("DEMO")
+            assert service.fetches["headlines"] == 2
+            service = configure_market_data(fixture_dir=fixture_dir)
+            get_stock_news("DEMO")
+            assert service.fetches["headlines"] == 1
+    assert first["status"] == "success" and second["data"]["recent_news"] == first["data"]["recent_news"]
+    print(f"cached:     {len(second['data']['recent_news'])} articles in {cached_time * 1000:7.1f} ms")
+    print("OK: first distinct articles returned without waiting for slow or blocked sources")
+
+
+if __name__ == "__main__":
+    main()
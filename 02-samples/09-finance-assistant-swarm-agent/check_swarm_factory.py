@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Offline check of the reusable analysis swarm.
+
+Uses a stand-in model (no Bedrock calls) that hands off company_strategist ->
+financial_analyst -> market_analyst after a simulated latency, and reports:
+
+- construction cost per tool call before (3 Agents, 3 BedrockModel clients and
+  a Swarm every call) and after (borrowing a pooled swarm)
+- one ticker at a time vs several tickers fanned out to parallel swarm runs
+- the per-node timings returned with each analysis
+
+Usage:
+    uv run check_swarm_factory.py --model-latency-ms 300 --tickers AMZN,MSFT,GOOGL
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import warnings
+
+from strands import Agent
+from strands.models import BedrockModel
+from strands.models.model import Model
+from strands.multiagent import Swarm
+
+from finance_assistant_swarm import SWARM_MODEL_ID, SwarmFactory
+
+# Swarm agent recognized by the start of its system prompt -> agent it hands off to
+NEXT_AGENT = {"Analyze the company's": "financial_analyst", "Build on company insights": "market_analyst"}
+
+
+class FakeModel(Model):
+    """Hands off to the next analyst (or answers) after a simulated model latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        current = next((prefix for prefix in NEXT_AGENT if (system_prompt or "").startswith(prefix)), None)
+        last = messages[-1]["content"]
+        yield {"messageStart": {"role": "assistant"}}
+        if current and not any("toolResult" in block for block in last):
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "handoff", "name": "handoff_to_agent"}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {
+                "input": f'{{"agent_name": "{NEXT_AGENT[current]}", "message": "your turn", '
+                         f'"context": {{"{current}": "insights"}}}}'}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            return
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": "Analysis complete."}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def build_per_call_swarm():
+    """What every tool call used to construct."""
+    agents = [
+        Agent(name=name, system_prompt="...", model=BedrockModel(model_id=SWARM_MODEL_ID, region="us-east-1"),
+              callback_handler=None)
+        for name in ("company_strategist", "financial_analyst", "market_analyst")
+    ]
+    return Swarm(agents, max_handoffs=3, max_iterations=3, execution_timeout=120.0, node_timeout=30.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the reusable analysis swarm")
+    parser.add_argument("--model-latency-ms", type=float, default=300)
+    parser.add_argument("--tickers", default="AMZN,MSFT,GOOGL")
+    args = parser.parse_args()
+    tickers = args.tickers.split(",")
+    logging.getLogger("strands").setLevel(logging.WARNING)
+    logging.getLogger("strands.multiagent").setLevel(logging.WARNING)
+    logging.getLogger("finance_assistant_swarm").setLevel(logging.WARNING)
+
+    factory = SwarmFactory(model=FakeModel(args.model_latency_ms / 1000), max_instances=len(tickers))
+
+    with warnings.catch_warnings():
+        # The sample passes region= to BedrockModel, which newer strands releases warn about
+        warnings.simplefilter("ignore", UserWarning)
+        start = time.perf_counter()
+        build_per_call_swarm()
+        per_call = time.perf_counter() - start
+    with factory.swarm():
+        pass
+    start = time.perf_counter()
+    with factory.swarm():
+        pass
+    reused = time.perf_counter() - start
+    print(f"construction per tool call: {per_call * 1000:.1f} ms before, {reused * 1000:.3f} ms reusing the swarm")
+
+    start = time.perf_counter()
+    sequential = [factory.analyze(ticker) for ticker in tickers]
+    sequential_time = time.perf_counter() - start
+    start = time.perf_counter()
+    concurrent = factory.analyze_many(tickers)
+    concurrent_time = time.perf_counter() - start
+    print(f"{len(tickers)} tickers: sequential {sequential_time * 1000:7.1f} ms, "
+          f"parallel swarms {concurrent_time * 1000:7.1f} ms ({factory.instances_built} swarm instances built)")
+
+    for ticker, analysis in concurrent.items():
+        assert analysis["status"] == "success", analysis
+        assert analysis["collaboration_path"] == ["company_strategist", "financial_analyst", "market_analyst"], analysis
+        timings = ", ".join(f"{t['node']} {t['execution_time_ms']} ms" for t in analysis["node_timings"])
+        print(f"  {ticker}: {timings}")
+    assert factory.instances_built <= len(tickers)
+    assert all(a["collaboration_path"] == s["collaboration_path"] for a, s in zip(concurrent.values(), sequential))
+    # Handoff context written by the previous run is cleared when a swarm is borrowed again
+    with factory.swarm() as swarm:
+        assert swarm.shared_context.context == {}
+    print("OK: swarm instances are reused and independent runs do not share state")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,23 @@ A command-line tool that uses the Strands Agent SDK to provide comprehensive com
 """
 
 import datetime as dt
+import os
+import threading
 import urllib.parse
-from typing import Dict, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Dict, List, Union
 
 # Third-party imports
 from bs4 import BeautifulSoup
-import yfinance as yf
 import requests
+from requests.adapters import HTTPAdapter
 from strands import Agent, tool
 from strands.models import BedrockModel
 from strands_tools import think, http_request
 
+from market_data import get_market_data
+
 
 @tool
 def get_company_info(ticker: str) -> Union[Dict, str]:
@@ -25,8 +31,7 @@ def get_company_info(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_market_data().info(ticker)
 
         # Get company information
         company_data = {
@@ -52,6 +57,212 @@ def get_company_info(ticker: str) -> Union[Dict, str]:
         return {"status": "error", "message": f"Error fetching company info: {str(e)}"}
 
 
+# News fetching: every source is queried at once and get_stock_news returns as
+# soon as NEWS_LIMIT distinct articles are in, instead of trying sources in turn
+NEWS_LIMIT = 5
+NEWS_DEADLINE_SECONDS = float(os.environ.get("NEWS_DEADLINE_SECONDS", "10"))
+REQUEST_TIMEOUT = 10
+
+# One pooled HTTP session (keep-alive connections) shared by all news requests
+http_session = requests.Session()
+http_session.headers.update(
+    {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
+    }
+)
+http_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+news_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news")
+
+
+def _fetch_html(url: str, stop: threading.Event):
+    """GET a page with the pooled session; None if it failed or the search is already complete."""
+    response = http_session.get(url, timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200 or stop.is_set():
+        # Enough articles already: skip parsing this page
+        return None
+    return BeautifulSoup(response.text, "html.parser")
+
+
+def _news_item(title: str, url: str, source: str, summary: str = "", date: str = "") -> Dict:
+    return {
+        "title": title,
+        "summary": summary,
+        "url": url,
+        "source": source,
+        "date": date or dt.datetime.now().strftime("%Y-%m-%d"),
+    }
+
+
+def _yahoo_news(ticker: str, company_name: str, stop: threading.Event) -> List[Dict]:
+    news = []
+    for item in get_market_data().news(ticker)[:5]:
+        # Newer yfinance versions nest the article under "content"
+        content = item.get("content", item)
+        url = content.get("link") or (content.get("canonicalUrl") or {}).get("url", "")
+        published = content.get("providerPublishTime")
+        news.append(
+            _news_item(
+                content.get("title", ""),
+                url,
+                content.get("publisher")
+                or (content.get("provider") or {}).get("displayName", "Yahoo Finance"),
+                (content.get("summary") or "")[:300],
+                dt.datetime.fromtimestamp(published).strftime("%Y-%m-%d")
+                if published
+                else (content.get("pubDate") or "")[:10],
+            )
+        )
+    return news
+
+
+def _marketwatch_news(ticker: str, company_name: str, stop: threading.Event) -> List[Dict]:
+    soup = _fetch_html(f"https://www.marketwatch.com/investing/stock/{ticker.lower()}", stop)
+    news = []
+    for article in soup.select(".article__content")[:5] if soup else []:
+        title_elem = article.select_one(".article__headline")
+        link_elem = article.select_one("a.link")
+        if title_elem and link_elem:
+            link = link_elem.get("href", "")
+            # Make sure link is absolute
+            if link and not link.startswith("http"):
+                link = f"https://www.marketwatch.com{link}"
+            # MarketWatch doesn't show summaries in the list
+            news.append(_news_item(title_elem.text.strip(), link, "MarketWatch"))
+    return news
+
+
+def _cnbc_news(ticker: str, company_name: str, stop: threading.Event) -> List[Dict]:
+    # Use search to find news about the company
+    search_query = urllib.parse.quote(f"{company_name} stock")
+    soup = _fetch_html(
+        f"https://www.cnbc.com/search/?query={search_query}&qsearchterm={search_query}", stop
+    )
+    news = []
+    for article in soup.select(".SearchResult-searchResultContent")[:5] if soup else []:
+        title_elem = article.select_one(".Card-title")
+        link_elem = article.select_one("a.resultlink")
+        if title_elem and link_elem:
+            news.append(_news_item(title_elem.text.strip(), link_elem.get("href", ""), "CNBC"))
+    return news
+
+
+def _seeking_alpha_news(ticker: str, company_name: str, stop: threading.Event) -> List[Dict]:
+    soup = _fetch_html(f"https://seekingalpha.com/symbol/{ticker.upper()}/news", stop)
+    news = []
+    for article in soup.select("article")[:5] if soup else []:
+        title_elem = article.select_one('a[data-test-id="post-list-item-title"]')
+        if title_elem:
+            link = title_elem.get("href", "")
+            # Make sure link is absolute
+            if link and not link.startswith("http"):
+                link = f"https://seekingalpha.com{link}"
+            news.append(_news_item(title_elem.text.strip(), link, "Seeking Alpha"))
+    return news
+
+
+def _google_news(ticker: str, company_name: str, stop: threading.Event) -> List[Dict]:
+    search_query = urllib.parse.quote(f"{company_name} stock news")
+    soup = _fetch_html(f"https://www.google.com/search?q={search_query}&tbm=nws", stop)
+    if soup is None:
+        return []
+
+    # Try different selectors for Google News
+    news_elements = []
+    for selector in ["div.SoaBEf", "div.dbsr", "g-card", ".WlydOe", ".ftSUBd"]:
+        if not news_elements:
+            news_elements = soup.select(selector)
+
+    # If still no results, try to find any links with news-like content
+    if not news_elements:
+        for link in soup.find_all("a"):
+            href = link.get("href", "")
+            if "news" in href.lower() and link.text and len(link.text.strip()) > 20:
+                news_elements.append(link)
+
+    news = []
+    for element in news_elements[:5]:
+        # Either a link element directly or a link inside the element
+        link_elem = element if element.name == "a" else element.find("a")
+        if not link_elem:
+            continue
+        title = link_elem.text.strip()
+        link = link_elem.get("href", "")
+        if link.startswith("/url?q="):
+            link = link.split("/url?q=")[1].split("&")[0]
+        if title and link and len(title) > 10:
+            news.append(_news_item(title, link, "Google News"))
+    return news
+
+
+# Sources in order of preference: articles of earlier sources are listed first
+NEWS_SOURCES = [
+    ("Yahoo Finance API", _yahoo_news),
+    ("MarketWatch", _marketwatch_news),
+    ("CNBC", _cnbc_news),
+    ("Seeking Alpha", _seeking_alpha_news),
+    ("Google News", _google_news),
+]
+
+
+def _merge_news(results: Dict[str, List[Dict]], sources) -> List[Dict]:
+    """Articles of the finished sources in preference order, without duplicate URLs or titles."""
+    merged, seen = [], set()
+    for name, _ in sources:
+        for item in results.get(name, []):
+            keys = {item["url"].rstrip("/"), item["title"].lower()}
+            if item["title"] and item["url"] and not keys & seen:
+                seen |= keys
+                merged.append(item)
+    return merged
+
+
+def fetch_news(
+    ticker: str,
+    company_name: str,
+    limit: int = NEWS_LIMIT,
+    deadline: float = NEWS_DEADLINE_SECONDS,
+    sources=None,
+):
+    """
+    Query all news sources concurrently.
+
+    Returns as soon as `limit` distinct articles have arrived, or when the
+    deadline passes. Sources still queued are cancelled and those still
+    running skip parsing their page.
+
+    Returns:
+        (articles, names of the sources that answered)
+    """
+    sources = sources or NEWS_SOURCES
+    stop = threading.Event()
+    futures = {
+        news_executor.submit(fetch, ticker, company_name, stop): name for name, fetch in sources
+    }
+    results = {}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                print(f"Found {len(results[name])} news items from {name}")
+            except Exception as e:
+                results[name] = []
+                print(f"Error with {name}: {str(e)}")
+            if len(_merge_news(results, sources)) >= limit:
+                break
+    except FuturesTimeoutError:
+        print(f"News sources still pending after {deadline}s: "
+              f"{', '.join(n for f, n in futures.items() if not f.done())}")
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+
+    checked = [name for name, _ in sources if name in results]
+    return _merge_news(results, sources)[:limit], checked
+
+
 @tool
 def get_stock_news(ticker: str) -> Union[Dict, str]:
     """Fetches stock news from multiple sources for comprehensive coverage."""
@@ -59,272 +270,19 @@ def get_stock_news(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        # Get company name for better search results
-        try:
-            stock = yf.Ticker(ticker)
-            company_name = (
-                stock.info.get("shortName") or stock.info.get("longName") or ticker
-            )
-        except Exception:
-            company_name = ticker
-
-        print(f"Searching news for {ticker} ({company_name})")
-
-        all_news = []
-        sources_tried = []
-
-        # 1. Try Yahoo Finance news API directly
-        sources_tried.append("Yahoo Finance API")
-        try:
-            stock = yf.Ticker(ticker)
-            news_data = stock.news
-
-            if news_data and len(news_data) > 0:
-                for item in news_data[:5]:
-                    news_item = {
-                        "title": item.get("title", ""),
-                        "summary": (
-                            item.get("summary", "")[:300] if item.get("summary") else ""
-                        ),
-                        "url": item.get("link", ""),
-                        "source": item.get("publisher", "Yahoo Finance"),
-                        "date": dt.datetime.fromtimestamp(
-                            item.get("providerPublishTime", 0)
-                        ).strftime("%Y-%m-%d"),
-                    }
-                    if news_item["title"] and news_item["url"]:
-                        all_news.append(news_item)
-
-                print(f"Found {len(all_news)} news items from Yahoo Finance API")
-        except Exception as e:
-            print(f"Error with Yahoo Finance API: {str(e)}")
-
-        # 2. Try MarketWatch
-        if len(all_news) < 5:
-            sources_tried.append("MarketWatch")
+        def search(symbol):
+            # Get company name for better search results
             try:
-                url = f"https://www.marketwatch.com/investing/stock/{ticker.lower()}"
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
-                }
+                info = get_market_data().info(symbol)
+                company_name = info.get("shortName") or info.get("longName") or symbol
+            except Exception:
+                company_name = symbol
 
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Look for news articles
-                    articles = soup.select(".article__content")
-
-                    for article in articles[:5]:
-                        title_elem = article.select_one(".article__headline")
-                        link_elem = article.select_one("a.link")
-
-                        if title_elem and link_elem:
-                            title = title_elem.text.strip()
-                            link = link_elem.get("href", "")
-
-                            # Make sure link is absolute
-                            if link and not link.startswith("http"):
-                                link = f"https://www.marketwatch.com{link}"
-
-                            news_item = {
-                                "title": title,
-                                "summary": "",  # MarketWatch doesn't show summaries in the list
-                                "url": link,
-                                "source": "MarketWatch",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(articles)} news items from MarketWatch")
-            except Exception as e:
-                print(f"Error with MarketWatch: {str(e)}")
+            print(f"Searching news for {symbol} ({company_name})")
+            return (company_name,) + fetch_news(symbol, company_name)
 
-        # 3. Try CNBC
-        if len(all_news) < 5:
-            sources_tried.append("CNBC")
-            try:
-                # Use search to find news about the company
-                search_query = f"{company_name} stock"
-                url = f"https://www.cnbc.com/search/?query={urllib.parse.quote(search_query)}&qsearchterm={urllib.parse.quote(search_query)}"
-
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
-                }
-
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Look for search results
-                    articles = soup.select(".SearchResult-searchResultContent")
-
-                    for article in articles[:5]:
-                        title_elem = article.select_one(".Card-title")
-                        link_elem = article.select_one("a.resultlink")
-
-                        if title_elem and link_elem:
-                            title = title_elem.text.strip()
-                            link = link_elem.get("href", "")
-
-                            news_item = {
-                                "title": title,
-                                "summary": "",
-                                "url": link,
-                                "source": "CNBC",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(articles)} news items from CNBC")
-            except Exception as e:
-                print(f"Error with CNBC: {str(e)}")
-
-        # 4. Try Seeking Alpha
-        if len(all_news) < 5:
-            sources_tried.append("Seeking Alpha")
-            try:
-                url = f"https://seekingalpha.com/symbol/{ticker.upper()}/news"
-
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
-                }
-
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Look for news articles
-                    articles = soup.select("article")
-
-                    for article in articles[:5]:
-                        title_elem = article.select_one(
-                            'a[data-test-id="post-list-item-title"]'
-                        )
-
-                        if title_elem:
-                            title = title_elem.text.strip()
-                            link = title_elem.get("href", "")
-
-                            # Make sure link is absolute
-                            if link and not link.startswith("http"):
-                                link = f"https://seekingalpha.com{link}"
-
-                            news_item = {
-                                "title": title,
-                                "summary": "",
-                                "url": link,
-                                "source": "Seeking Alpha",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(articles)} news items from Seeking Alpha")
-            except Exception as e:
-                print(f"Error with Seeking Alpha: {str(e)}")
-
-        # 5. Try Google News as a fallback
-        if len(all_news) < 5:
-            sources_tried.append("Google News")
-            try:
-                search_query = f"{company_name} stock news"
-                url = f"https://www.google.com/search?q={urllib.parse.quote(search_query)}&tbm=nws"
-
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
-                }
-
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-
-                    # Try different selectors for Google News
-                    news_elements = []
-                    selectors = [
-                        "div.SoaBEf",
-                        "div.dbsr",
-                        "g-card",
-                        ".WlydOe",
-                        ".ftSUBd",
-                    ]
-
-                    for selector in selectors:
-                        if not news_elements:
-                            news_elements = soup.select(selector)
-
-                    # If still no results, try to find any links with news-like content
-                    if not news_elements:
-                        all_links = soup.find_all("a")
-                        for link in all_links:
-                            href = link.get("href", "")
-                            if (
-                                "news" in href.lower()
-                                and link.text
-                                and len(link.text.strip()) > 20
-                            ):
-                                news_elements.append(link)
-
-                    for element in news_elements[:5]:
-                        # Try to find title and link
-                        title = None
-                        link = None
-
-                        # If it's a link element directly
-                        if element.name == "a":
-                            title = element.text.strip()
-                            link = element.get("href", "")
-                            if link.startswith("/url?q="):
-                                link = link.split("/url?q=")[1].split("&")[0]
-                        else:
-                            # Try to find a link inside the element
-                            link_elem = element.find("a")
-                            if link_elem:
-                                title = link_elem.text.strip()
-                                link = link_elem.get("href", "")
-                                if link.startswith("/url?q="):
-                                    link = link.split("/url?q=")[1].split("&")[0]
-
-                        if title and link and len(title) > 10:
-                            news_item = {
-                                "title": title,
-                                "summary": "",
-                                "url": link,
-                                "source": "Google News",
-                                "date": dt.datetime.now().strftime("%Y-%m-%d"),
-                            }
-
-                            if (
-                                news_item["title"]
-                                and news_item["url"]
-                                and news_item not in all_news
-                            ):
-                                all_news.append(news_item)
-
-                    print(f"Found {len(news_elements)} news items from Google News")
-            except Exception as e:
-                print(f"Error with Google News: {str(e)}")
+        # Cached by the market data service with its news TTL
+        company_name, all_news, sources_tried = get_market_data().headlines(ticker, search)
 
         # Print the news items we found
         if all_news:
@@ -6,7 +6,12 @@ A collaborative swarm of specialized agents for comprehensive stock analysis.
 """
 # Standard library imports
 import logging
+import os
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, Any, List
 
 # Third-party imports
@@ -14,8 +19,8 @@ from strands import Agent, tool
 from strands.models import BedrockModel
 from strands.multiagent import Swarm
 from strands_tools import think
-import yfinance as yf
 
+from market_data import get_market_data
 from stock_price_agent import get_stock_prices, create_stock_price_agent
 from financial_metrics_agent import get_financial_metrics, create_financial_metrics_agent
 from company_analysis_agent import get_company_info, get_stock_news, create_company_analysis_agent
@@ -26,14 +31,15 @@ logging.basicConfig(
     format="%(levelname)s | %(name)s | %(message)s",
     handlers=[logging.StreamHandler()]
 )
+logger = logging.getLogger(__name__)
 
 @tool
 def get_real_stock_data(ticker: str) -> Dict[str, Any]:
     """Get accurate stock data outside the swarm"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        hist = stock.history(period="5d")
+        market_data = get_market_data()
+        info = market_data.info(ticker)
+        hist = market_data.history(ticker, period="5d")
         
         if hist.empty:
             return {"status": "error", "message": f"No data found for {ticker}"}
@@ -62,52 +68,170 @@ def get_real_stock_data(ticker: str) -> Dict[str, Any]:
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@tool
-def analyze_company_with_collaborative_swarm(query: str, stock_data: str = "") -> Dict[str, Any]:
-    """Collaborative swarm using Nova LITE to avoid streaming timeouts"""
-    try:
-        ticker = query.upper() if len(query) <= 5 else "AMZN"
-        
-        # Use NOVA LITE for all swarm agents - much faster, no timeouts
+SWARM_MODEL_ID = "us.amazon.nova-lite-v1:0"
+# Swarm runs that may execute at the same time (one swarm instance each)
+MAX_PARALLEL_SWARMS = int(os.environ.get("MAX_PARALLEL_SWARMS", "3"))
+
+
+class SwarmFactory:
+    """
+    Builds the collaborative analysis swarm once and reuses it across tool calls.
+
+    A Swarm holds per-run state, so each concurrent run borrows its own instance
+    from a pool (at most max_instances are ever built). All instances share one
+    BedrockModel client; between runs only the swarm's shared context is cleared,
+    as the nodes' conversation is reset by the swarm before every node execution.
+    """
+
+    def __init__(self, model=None, max_instances: int = MAX_PARALLEL_SWARMS):
+        self._model = model
+        self.max_instances = max(1, max_instances)
+        self.instances_built = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_instances)
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                # Use NOVA LITE for all swarm agents - much faster, no timeouts
+                self._model = BedrockModel(model_id=SWARM_MODEL_ID, region="us-east-1")
+            return self._model
+
+    def _build(self) -> Swarm:
         company_strategist = Agent(
             name="company_strategist",
-            system_prompt=f"Analyze {ticker} business model. Use get_company_info then hand off to financial_analyst.",
-            model=BedrockModel(model_id="us.amazon.nova-lite-v1:0", region="us-east-1"),
-            tools=[get_company_info]
+            system_prompt="Analyze the company's business model. Use get_company_info then hand off to financial_analyst.",
+            model=self.model,
+            tools=[get_company_info],
+            callback_handler=None,
         )
-        
+
         financial_analyst = Agent(
-            name="financial_analyst", 
-            system_prompt=f"Build on company insights. Use get_financial_metrics then hand off to market_analyst.",
-            model=BedrockModel(model_id="us.amazon.nova-lite-v1:0", region="us-east-1"),
-            tools=[get_financial_metrics]
+            name="financial_analyst",
+            system_prompt="Build on company insights. Use get_financial_metrics then hand off to market_analyst.",
+            model=self.model,
+            tools=[get_financial_metrics],
+            callback_handler=None,
         )
-        
+
         market_analyst = Agent(
             name="market_analyst",
-            system_prompt=f"Synthesize all insights. Use get_stock_news for final recommendation.",
-            model=BedrockModel(model_id="us.amazon.nova-lite-v1:0", region="us-east-1"),
-            tools=[get_stock_news]
+            system_prompt="Synthesize all insights. Use get_stock_news for final recommendation.",
+            model=self.model,
+            tools=[get_stock_news],
+            callback_handler=None,
         )
-        
-        swarm = Swarm(
+
+        with self._lock:
+            self.instances_built += 1
+        return Swarm(
             [company_strategist, financial_analyst, market_analyst],
             max_handoffs=3,
             max_iterations=3,
             execution_timeout=120.0,
-            node_timeout=30.0
+            node_timeout=30.0,
         )
-        
-        result = swarm(f"Analyze {ticker}")
-        
+
+    @contextmanager
+    def swarm(self):
+        """Borrow an idle swarm (building one if the pool has room), reset for a new run."""
+        with self._slots:
+            try:
+                swarm = self._idle.get_nowait()
+            except queue.Empty:
+                swarm = self._build()
+            # Insights of the previous run must not leak into this one
+            swarm.shared_context.context = {}
+            try:
+                yield swarm
+            finally:
+                self._idle.put(swarm)
+
+    def analyze(self, ticker: str) -> Dict[str, Any]:
+        """Run one collaborative analysis, with the time spent in each node."""
+        start = time.perf_counter()
+        with self.swarm() as swarm:
+            result = swarm(f"Analyze {ticker}")
+        wall_time_ms = round((time.perf_counter() - start) * 1000)
+
+        path = [node.node_id for node in result.node_history]
+        node_timings = []
+        for node_id in dict.fromkeys(path):
+            # results holds the latest execution of each node
+            node_result = result.results.get(node_id)
+            node_timings.append(
+                {
+                    "node": node_id,
+                    "executions": path.count(node_id),
+                    "execution_time_ms": node_result.execution_time if node_result else None,
+                    "total_tokens": node_result.accumulated_usage.get("totalTokens") if node_result else None,
+                }
+            )
+        for timing in node_timings:
+            logger.info("ticker=<%s>, node=<%s>, time=<%sms> | swarm node finished",
+                        ticker, timing["node"], timing["execution_time_ms"])
+
         return {
             "status": "success",
-            "collaborative_analysis": result.final_response,
-            "collaboration_path": [node.node_id for node in result.node_history]
+            "ticker": ticker,
+            "collaborative_analysis": _final_response(result),
+            "collaboration_path": path,
+            "node_timings": node_timings,
+            "execution_time_ms": result.execution_time,
+            "wall_time_ms": wall_time_ms,
         }
+
+    def analyze_many(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Run analyses for several tickers concurrently (up to max_instances at a time)."""
+        def run(ticker):
+            try:
+                return self.analyze(ticker)
+            except Exception as e:
+                return {"status": "error", "ticker": ticker, "collaborative_analysis": f"Analysis failed: {str(e)}"}
+
+        with ThreadPoolExecutor(max_workers=self.max_instances) as executor:
+            return dict(zip(tickers, executor.map(run, tickers)))
+
+
+def _final_response(result) -> str:
+    """Text of the last node's answer (SwarmResult has no final_response in current strands releases)."""
+    if getattr(result, "final_response", None):
+        return result.final_response
+    if not result.node_history:
+        return ""
+    last = result.results.get(result.node_history[-1].node_id)
+    return str(last.result) if last else ""
+
+
+swarm_factory = SwarmFactory()
+
+
+@tool
+def analyze_company_with_collaborative_swarm(query: str, stock_data: str = "") -> Dict[str, Any]:
+    """Collaborative swarm using Nova LITE to avoid streaming timeouts"""
+    try:
+        ticker = query.upper() if len(query) <= 5 else "AMZN"
+        return swarm_factory.analyze(ticker)
     except Exception as e:
         return {"status": "error", "collaborative_analysis": f"Analysis failed: {str(e)}"}
 
+
+@tool
+def compare_companies_with_collaborative_swarm(tickers: str) -> Dict[str, Any]:
+    """Run the collaborative swarm for several comma-separated tickers in parallel (e.g. "AMZN, MSFT, GOOGL")"""
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+    if not symbols:
+        return {"status": "error", "message": "At least one ticker is required"}
+    start = time.perf_counter()
+    analyses = swarm_factory.analyze_many(symbols)
+    return {
+        "status": "success",
+        "analyses": analyses,
+        "wall_time_ms": round((time.perf_counter() - start) * 1000),
+    }
+
 def create_orchestration_agent() -> Agent:
     """Orchestrator with Nova Pro for deep synthesis"""
     return Agent(
@@ -116,6 +240,8 @@ def create_orchestration_agent() -> Agent:
         WORKFLOW:
         1. Get real stock data using get_real_stock_data  
         2. Get ONE collaborative analysis using analyze_company_with_collaborative_swarm
+           (to compare several companies, call compare_companies_with_collaborative_swarm ONCE
+           with all tickers, e.g. "AMZN, MSFT, GOOGL": the analyses run in parallel)
         3. Synthesize using think tool for deep strategic insights
         
         CRITICAL RULES:
@@ -131,7 +257,12 @@ def create_orchestration_agent() -> Agent:
         4. Market Sentiment Analysis (news + trends)
         5. Investment Recommendation (buy/hold/sell with rationale)""",
         model=BedrockModel(model_id="us.amazon.nova-pro-v1:0", region="us-east-1"),
-        tools=[get_real_stock_data, analyze_company_with_collaborative_swarm, think],
+        tools=[
+            get_real_stock_data,
+            analyze_company_with_collaborative_swarm,
+            compare_companies_with_collaborative_swarm,
+            think,
+        ],
     )
 
 def create_initial_messages() -> List[Dict]:
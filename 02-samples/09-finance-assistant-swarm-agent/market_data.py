@@ -0,0 +1,241 @@
+"""
+Market Data Service
+
+One shared data layer for the finance swarm tools. Yahoo Finance responses are
+cached in memory per ticker and field group, each with its own TTL:
+
+- quote: price history (one 3-month download serves every shorter period)
+- fundamentals: the Ticker.info dictionary (company profile and ratios)
+- news: Ticker.news headlines, and the articles get_stock_news merged from
+  all its news sources
+
+Concurrent callers asking for the same ticker and group wait on a single
+in-flight fetch instead of each calling Yahoo Finance.
+
+Set MARKET_DATA_FIXTURES (or pass fixture_dir) to run offline from a fixture
+directory with one folder per ticker: info.json, history.csv (Date index, OHLCV
+columns) and news.json. export_fixtures() records those files from live data.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Seconds a cached value stays fresh, per field group
+DEFAULT_TTL = {
+    "quote": float(os.environ.get("MARKET_DATA_QUOTE_TTL", "60")),
+    "fundamentals": float(os.environ.get("MARKET_DATA_FUNDAMENTALS_TTL", "3600")),
+    "news": float(os.environ.get("MARKET_DATA_NEWS_TTL", "900")),
+}
+# History downloaded once per ticker; shorter periods are sliced from it
+HISTORY_PERIOD = "3mo"
+
+_PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+
+
+def _period_days(period: str) -> Optional[int]:
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    return int(match.group(1)) * _PERIOD_DAYS[match.group(2)] if match else None
+
+
+class YFinanceSource:
+    """Live data from Yahoo Finance."""
+
+    def __init__(self):
+        import yfinance as yf
+        self.yf = yf
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return self.yf.Ticker(ticker).info
+
+    def history(self, ticker: str, period: str) -> pd.DataFrame:
+        return self.yf.Ticker(ticker).history(period=period)
+
+    def news(self, ticker: str) -> List[Dict[str, Any]]:
+        return self.yf.Ticker(ticker).news or []
+
+
+class FixtureSource:
+    """Data read from a fixture directory (<TICKER>/info.json, history.csv, news.json)."""
+
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = fixture_dir
+
+    def _path(self, ticker: str, name: str) -> str:
+        return os.path.join(self.fixture_dir, ticker, name)
+
+    def _json(self, ticker: str, name: str, default):
+        path = self._path(ticker, name)
+        if not os.path.exists(path):
+            return default
+        with open(path) as f:
+            return json.load(f)
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return self._json(ticker, "info.json", {})
+
+    def history(self, ticker: str, period: str) -> pd.DataFrame:
+        path = self._path(ticker, "history.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_csv(path, index_col="Date", parse_dates=True)
+
+    def news(self, ticker: str) -> List[Dict[str, Any]]:
+        return self._json(ticker, "news.json", [])
+
+
+class MarketDataService:
+    """
+    TTL-cached, request-coalescing access to quotes, fundamentals and news.
+
+    `fetches` counts the fetches made on a cache miss per kind of data (quote,
+    fundamentals, news, headlines). Expired entries are dropped whenever a
+    fetched value is stored.
+    """
+
+    def __init__(self, source: Any = None, fixture_dir: Optional[str] = None,
+                 ttl: Optional[Dict[str, float]] = None):
+        if source is None:
+            source = FixtureSource(fixture_dir) if fixture_dir else YFinanceSource()
+        self.source = source
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.fetches: Counter = Counter()
+        self._cache: Dict[tuple, tuple] = {}
+        self._inflight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, group: str, key: tuple, fetch: Callable[[], Any]) -> Any:
+        """Cached value for key, or the result of one fetch shared by all concurrent callers."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.fetches[key[0]] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            # Errors are handed to the waiting callers but never cached
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            now = time.monotonic()
+            for expired in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                del self._cache[expired]
+            self._cache[key] = (now + self.ttl[group], value)
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    @staticmethod
+    def _symbol(ticker: str) -> str:
+        return ticker.strip().upper()
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        """Ticker.info (company profile, ratios, 52-week range...)."""
+        ticker = self._symbol(ticker)
+        info = self._get("fundamentals", ("fundamentals", ticker), lambda: self.source.info(ticker))
+        return dict(info or {})
+
+    def history(self, ticker: str, period: str = HISTORY_PERIOD) -> pd.DataFrame:
+        """
+        Daily OHLCV history for a Yahoo Finance period such as "5d" or "3mo".
+
+        Returns a copy, callers may modify it without changing the cached data.
+        """
+        ticker = self._symbol(ticker)
+        days = _period_days(period)
+        if days is None or days > _period_days(HISTORY_PERIOD):
+            data = self._get("quote", ("quote", ticker, period), lambda: self.source.history(ticker, period))
+            return data.copy()
+
+        data = self._get("quote", ("quote", ticker, HISTORY_PERIOD),
+                         lambda: self.source.history(ticker, HISTORY_PERIOD))
+        if data.empty or period == HISTORY_PERIOD:
+            return data.copy()
+        if period.endswith("d"):
+            # "Nd" means the last N trading days
+            return data.tail(days).copy()
+        return data[data.index >= data.index[-1] - pd.Timedelta(days=days)].copy()
+
+    def news(self, ticker: str) -> List[Dict[str, Any]]:
+        """Ticker.news headlines."""
+        ticker = self._symbol(ticker)
+        return list(self._get("news", ("news", ticker), lambda: self.source.news(ticker)))
+
+    def headlines(self, ticker: str, search: Callable[[str], tuple]) -> tuple:
+        """
+        Result of search(ticker) over all news sources, cached with the news TTL.
+
+        search returns (company_name, articles, sources_checked); searches that
+        found no articles are not cached.
+        """
+        ticker = self._symbol(ticker)
+        key = ("headlines", ticker)
+        result = self._get("news", key, lambda: search(ticker))
+        if not result[1]:
+            with self._lock:
+                self._cache.pop(key, None)
+        return result
+
+    def invalidate(self, ticker: Optional[str] = None):
+        """Drop cached values for one ticker (or all of them)."""
+        with self._lock:
+            if ticker is None:
+                self._cache.clear()
+            else:
+                ticker = self._symbol(ticker)
+                for key in [k for k in self._cache if k[1] == ticker]:
+                    del self._cache[key]
+
+    def export_fixtures(self, tickers: List[str], fixture_dir: str):
+        """Write the data of the given tickers as a fixture directory for offline runs."""
+        for ticker in tickers:
+            ticker = self._symbol(ticker)
+            directory = os.path.join(fixture_dir, ticker)
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, "info.json"), "w") as f:
+                json.dump(self.info(ticker), f, indent=2, default=str)
+            with open(os.path.join(directory, "news.json"), "w") as f:
+                json.dump(self.news(ticker), f, indent=2, default=str)
+            history = self.history(ticker)
+            if isinstance(history.index, pd.DatetimeIndex) and history.index.tz is not None:
+                history.index = history.index.tz_localize(None)
+            history.index.name = "Date"
+            history.to_csv(os.path.join(directory, "history.csv"))
+
+
+_service: Optional[MarketDataService] = None
+_service_lock = threading.Lock()
+
+
+def get_market_data() -> MarketDataService:
+    """The process-wide market data service (offline when MARKET_DATA_FIXTURES is set)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = MarketDataService(fixture_dir=os.environ.get("MARKET_DATA_FIXTURES"))
+        return _service
+
+
+def configure_market_data(**kwargs) -> MarketDataService:
+    """Replace the shared service, e.g. configure_market_data(fixture_dir="fixtures")."""
+    global _service
+    with _service_lock:
+        _service = MarketDataService(**kwargs)
+        return _service
@@ -9,11 +9,12 @@ import datetime as dt
 from typing import Dict, Union
 
 # Third-party imports
-import yfinance as yf
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 from strands_tools import think, http_request
 
+from market_data import get_market_data
+
 
 @tool
 def get_stock_prices(ticker: str) -> Union[Dict, str]:
@@ -23,9 +24,8 @@ def get_stock_prices(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        # Get stock data
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="3mo")
+        # Get stock data (shared, cached market data service)
+        data = get_market_data().history(ticker, period="3mo")
 
         if data.empty:
             return {"status": "error", "message": f"No data found for ticker {ticker}"}
@@ -0,0 +1,100 @@
+"""
+Benchmark the market data layer against the original per-ticker fetch loop.
+
+Runs offline on generated fixtures with a simulated round-trip latency per
+request, comparing:
+- sequential: history() + info per ticker, one after another (original loop)
+- cold cache: one batched price request, info requests in parallel
+- warm cache: memory-mapped reads only
+- partial hit: cached tickers plus a few new ones, only the new ones are fetched
+
+Usage:
+    python benchmark_market_data.py --tickers 15 --latency-ms 150
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_data import FixtureSource, MarketDataStore
+
+
+class LatencySource(FixtureSource):
+    """Fixture source that sleeps like a network round trip on every request."""
+
+    def __init__(self, fixture_dir, latency):
+        super().__init__(fixture_dir)
+        self.latency = latency
+
+    def history(self, tickers, start, end):
+        time.sleep(self.latency)
+        return super().history(tickers, start, end)
+
+    def info(self, ticker):
+        time.sleep(self.latency)
+        return super().info(ticker)
+
+
+def write_fixtures(fixture_dir, tickers):
+    dates = pd.bdate_range('2020-01-01', '2024-12-31')
+    rng = np.random.default_rng(0)
+    for ticker in tickers:
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(dates))))
+        pd.Series(closes, index=dates, name='Close').to_csv(os.path.join(fixture_dir, f"{ticker}.csv"),
+                                                            index_label='Date')
+    with open(os.path.join(fixture_dir, 'info.json'), 'w') as f:
+        json.dump({t: {'longName': f"{t} Inc.", 'sector': 'Technology'} for t in tickers}, f)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<14} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the market data layer")
+    parser.add_argument("--tickers", type=int, default=15)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    tickers = [f"T{i:03d}" for i in range(args.tickers + 3)]
+    initial, added = tickers[:args.tickers], tickers[args.tickers:]
+    start, end = '2024-01-01', '2024-12-31'
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixture_dir = os.path.join(tmp_dir, 'fixtures')
+        os.makedirs(fixture_dir)
+        write_fixtures(fixture_dir, tickers)
+        source = LatencySource(fixture_dir, args.latency_ms / 1000)
+
+        print(f"{args.tickers} tickers, {args.latency_ms:.0f} ms per request")
+
+        def sequential():
+            closes = {}
+            for ticker in initial:
+                closes[ticker] = source.history([ticker], start, end)[ticker]
+                source.info(ticker)
+            return pd.DataFrame(closes)
+
+        expected = timed("sequential", sequential)
+
+        store = MarketDataStore(os.path.join(tmp_dir, 'cache'), source=source)
+        cold = timed("cold cache", lambda: (store.get_prices(initial, start, end), store.get_info(initial))[0])
+        warm = timed("warm cache", lambda: (store.get_prices(initial, start, end), store.get_info(initial))[0])
+        timed("partial hit", lambda: (store.get_prices(tickers, start, end), store.get_info(tickers))[0])
+
+        pd.testing.assert_frame_equal(expected, cold, check_freq=False, check_names=False, check_index_type=False)
+        pd.testing.assert_frame_equal(cold, warm, check_freq=False, check_names=False, check_index_type=False)
+        print(f"  price requests sent by the store: {len(store.fetches)} "
+              f"(last one for {', '.join(store.fetches[-1][0])})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Market data layer for the Multi-Agent Portfolio Orchestrator
+
+Daily closing prices are fetched in batches (one download per group of tickers
+missing the same date range, groups in parallel) and stored in a columnar
+on-disk cache: one pair of NumPy arrays (dates, closes) per ticker, read back
+memory-mapped. A manifest records which date ranges have been fetched for each
+ticker, so a request only downloads the tickers and dates that are missing.
+
+Point the store at a fixture directory (or set MARKET_DATA_FIXTURES) to run
+offline: it then reads <TICKER>.csv files (Date, Close columns) and an optional
+info.json ({ticker: {"longName": ..., "sector": ...}}) instead of calling Yahoo Finance.
+"""
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = "market_data_cache"
+INFO_FIELDS = ('longName', 'sector')
+# Start of the "max" period, the same bound Yahoo Finance uses for it
+MAX_PERIOD_START = '1900-01-01'
+
+
+def period_range(period: str, today: Optional[date] = None) -> Tuple[str, str]:
+    """
+    Convert a Yahoo Finance style period ("5d", "3mo", "1y", "ytd", "max") into a date range.
+
+    Returns:
+        (start, end) as ISO dates, end exclusive and including today
+    """
+    today = today or date.today()
+    end = pd.Timestamp(today) + pd.Timedelta(days=1)
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if period == 'max':
+        start = pd.Timestamp(MAX_PERIOD_START)
+    elif period == 'ytd':
+        start = pd.Timestamp(today.year, 1, 1)
+    elif match:
+        count, unit = int(match.group(1)), match.group(2)
+        offset = {'d': pd.DateOffset(days=count), 'wk': pd.DateOffset(weeks=count),
+                  'mo': pd.DateOffset(months=count), 'y': pd.DateOffset(years=count)}[unit]
+        start = pd.Timestamp(today) - offset
+    else:
+        raise ValueError(f"Unsupported period '{period}', use e.g. '5d', '3mo', '1y' or 'ytd'")
+    return start.date().isoformat(), end.date().isoformat()
+
+
+class YFinanceSource:
+    """Live prices and company info from Yahoo Finance."""
+
+    def __init__(self):
+        import yfinance as yf
+        self.yf = yf
+
+    def history(self, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+        data = self.yf.download(tickers, start=start, end=end, auto_adjust=True,
+                                progress=False, threads=True)
+        if data is None or data.empty:
+            return pd.DataFrame()
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(tickers[0])
+        return closes
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return self.yf.Ticker(ticker).info
+
+
+class FixtureSource:
+    """Prices and company info read from a local fixture directory, for offline runs."""
+
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = fixture_dir
+        info_file = os.path.join(fixture_dir, 'info.json')
+        self._info = {}
+        if os.path.exists(info_file):
+            with open(info_file) as f:
+                self._info = json.load(f)
+
+    def history(self, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+        columns = {}
+        for ticker in tickers:
+            path = os.path.join(self.fixture_dir, f"{ticker}.csv")
+            if not os.path.exists(path):
+                continue
+            closes = pd.read_csv(path, index_col='Date', parse_dates=True)['Close']
+            columns[ticker] = closes[(closes.index >= start) & (closes.index < end)]
+        return pd.DataFrame(columns)
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return self._info.get(ticker, {})
+
+
+class MarketDataStore:
+    """
+    Cached daily closing prices and company info.
+
+    Prices live in <cache_dir>/<TICKER>.dates.npy and <TICKER>.close.npy; the
+    manifest holds the fetched date ranges and company info per ticker. Today's
+    bar is never marked as fetched, so it is refreshed on the next request.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, fixture_dir: Optional[str] = None,
+                 source: Any = None, max_workers: int = 8):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        if source is None:
+            source = FixtureSource(fixture_dir) if fixture_dir else YFinanceSource()
+        self.source = source
+        # (tickers, start, end) of every history request sent to the source
+        self.fetches: List[Tuple[Tuple[str, ...], str, str]] = []
+        self._lock = threading.Lock()
+        self._manifest_file = os.path.join(cache_dir, 'manifest.json')
+        self._manifest = {'tickers': {}}
+        if os.path.exists(self._manifest_file):
+            with open(self._manifest_file) as f:
+                self._manifest = json.load(f)
+
+    # -- Public API --------------------------------------------------------
+
+    def get_prices(self, tickers: List[str], start: str, end: str, refresh: bool = False) -> pd.DataFrame:
+        """
+        Daily closing prices, fetching only what the cache does not cover.
+
+        Args:
+            tickers: Stock symbols
+            start: First date (inclusive), ISO format
+            end: Last date (exclusive), ISO format
+            refresh: Fetch the whole range again instead of using the cache
+
+        Returns:
+            DataFrame indexed by date with one column per ticker that has data
+        """
+        missing = {}
+        for ticker in dict.fromkeys(tickers):
+            ranges = [(start, end)] if refresh else self._missing_ranges(ticker, start, end)
+            for missing_range in ranges:
+                missing.setdefault(missing_range, []).append(ticker)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = executor.map(lambda item: self._fetch(item[1], *item[0]), missing.items())
+                for ((range_start, range_end), group), prices in zip(missing.items(), results):
+                    if prices is not None:
+                        self._store(group, range_start, range_end, prices)
+
+        columns = {}
+        for ticker in dict.fromkeys(tickers):
+            closes = self._load(ticker)
+            if closes is not None:
+                closes = closes[(closes.index >= start) & (closes.index < end)]
+                if len(closes) > 0:
+                    columns[ticker] = closes
+        return pd.DataFrame(columns)
+
+    def get_info(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Company name and sector per ticker, fetched concurrently for tickers not cached yet.
+
+        Returns:
+            {ticker: {"longName": ..., "sector": ...}}, missing fields are left out
+        """
+        entries = self._manifest['tickers']
+        missing = [t for t in dict.fromkeys(tickers) if 'info' not in entries.get(t, {})]
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                fetched = list(executor.map(self._fetch_info, missing))
+            with self._lock:
+                for ticker, info in zip(missing, fetched):
+                    if info is not None:
+                        self._manifest['tickers'].setdefault(ticker, {'coverage': []})['info'] = info
+                self._save_manifest()
+        return {t: dict(entries.get(t, {}).get('info', {})) for t in tickers}
+
+    def export_fixtures(self, tickers: List[str], fixture_dir: str):
+        """Write the cached prices and info of the given tickers as a fixture directory."""
+        os.makedirs(fixture_dir, exist_ok=True)
+        for ticker in tickers:
+            closes = self._load(ticker)
+            if closes is not None:
+                closes.rename('Close').to_csv(os.path.join(fixture_dir, f"{ticker}.csv"), index_label='Date')
+        with open(os.path.join(fixture_dir, 'info.json'), 'w') as f:
+            json.dump(self.get_info(tickers), f, indent=2)
+
+    # -- Cache bookkeeping -------------------------------------------------
+
+    def _missing_ranges(self, ticker: str, start: str, end: str) -> List[Tuple[str, str]]:
+        """Parts of [start, end) not covered by the ticker's fetched ranges."""
+        coverage = self._manifest['tickers'].get(ticker, {}).get('coverage', [])
+        missing = []
+        cursor = start
+        for covered_start, covered_end in coverage:
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+            if cursor >= end:
+                break
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def _fetch(self, tickers: List[str], start: str, end: str) -> Optional[pd.DataFrame]:
+        self.fetches.append((tuple(tickers), start, end))
+        try:
+            return self.source.history(tickers, start, end)
+        except Exception as e:
+            print(f"Warning: Could not fetch prices for {', '.join(tickers)}: {e}")
+            return None
+
+    def _fetch_info(self, ticker: str) -> Optional[Dict[str, Any]]:
+        try:
+            info = self.source.info(ticker) or {}
+        except Exception as e:
+            print(f"Warning: Could not fetch info for {ticker}: {e}")
+            return None
+        return {field: info[field] for field in INFO_FIELDS if field in info}
+
+    def _store(self, tickers: List[str], start: str, end: str, prices: pd.DataFrame):
+        """Merge fetched prices into the cache and record the fetched range."""
+        # Today's bar is still moving: only mark ranges up to today as fetched
+        covered_end = min(end, date.today().isoformat())
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for ticker in tickers:
+                fetched = prices[ticker].dropna() if ticker in prices else pd.Series(dtype=float)
+                existing = self._load(ticker)
+                if len(fetched) == 0 and existing is None:
+                    # Unknown or delisted ticker: nothing to cache, try again next time
+                    continue
+                if len(fetched) > 0:
+                    fetched.index = _dates(fetched.index)
+                    merged = fetched if existing is None else pd.concat([existing, fetched])
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                    self._write(ticker, merged)
+                if start < covered_end:
+                    entry = self._manifest['tickers'].setdefault(ticker, {'coverage': []})
+                    entry['coverage'] = _merge_ranges(entry['coverage'] + [[start, covered_end]])
+            self._save_manifest()
+
+    def _path(self, ticker: str, column: str) -> str:
+        safe_ticker = re.sub(r'[^A-Za-z0-9._^=-]', '_', ticker)
+        return os.path.join(self.cache_dir, f"{safe_ticker}.{column}.npy")
+
+    def _load(self, ticker: str) -> Optional[pd.Series]:
+        dates_file = self._path(ticker, 'dates')
+        if not os.path.exists(dates_file):
+            return None
+        dates = np.load(dates_file, mmap_mode='r')
+        closes = np.load(self._path(ticker, 'close'), mmap_mode='r')
+        return pd.Series(np.asarray(closes), index=pd.DatetimeIndex(dates.astype('datetime64[ns]')), name=ticker)
+
+    def _write(self, ticker: str, closes: pd.Series):
+        for column, values in (('dates', closes.index.values.astype('datetime64[D]')),
+                               ('close', closes.to_numpy(dtype=float))):
+            path = self._path(ticker, column)
+            # np.save appends .npy to names without it, keep the suffix on the temporary file
+            tmp_path = path[:-len('.npy')] + '.tmp.npy'
+            np.save(tmp_path, values)
+            os.replace(tmp_path, path)
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = self._manifest_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self._manifest_file)
+
+
+def _dates(index: pd.Index) -> pd.DatetimeIndex:
+    """Timezone-naive calendar dates of a price index."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def _merge_ranges(ranges: List[List[str]]) -> List[List[str]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
@@ -0,0 +1,208 @@
+"""
+Vectorized portfolio analytics for the Multi-Agent Portfolio Orchestrator
+
+Holds per-ticker returns and volatilities as aligned NumPy arrays so that any
+number of portfolios can be evaluated at once: a batch of portfolios is a
+(portfolios x tickers) weight matrix, and returns, volatilities and Sharpe
+ratios for the whole batch are a handful of matrix operations.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class PortfolioAnalytics:
+    """
+    Aligned per-ticker statistics and batched portfolio evaluation.
+
+    Returns and volatilities are in percent, like the cached stock analysis.
+    Without a correlation matrix tickers are treated as uncorrelated.
+    """
+
+    def __init__(self, tickers: List[str], returns: Iterable[float], volatilities: Iterable[float],
+                 sectors: Optional[List[str]] = None, correlation: Optional[np.ndarray] = None,
+                 risk_free_rate: float = 0.0):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.returns = np.asarray(returns, dtype=float)
+        self.volatilities = np.asarray(volatilities, dtype=float)
+        self.sectors = list(sectors) if sectors is not None else ['Unknown'] * len(self.tickers)
+        self.risk_free_rate = risk_free_rate
+        if correlation is None:
+            correlation = np.eye(len(self.tickers))
+        self.correlation = np.asarray(correlation, dtype=float)
+        self.covariance = self.correlation * np.outer(self.volatilities, self.volatilities)
+
+    @classmethod
+    def from_stock_analysis(cls, stock_analysis: Dict[str, Any], return_field: str = 'return_pct',
+                            volatility_field: str = 'volatility_pct', **kwargs) -> 'PortfolioAnalytics':
+        """
+        Build the analytics core from stock analysis data.
+
+        Args:
+            stock_analysis: Result of get_stock_analysis / load_simple_stock_data_from_csv
+                (or get_stock_data with return_field='annual_return', volatility_field='volatility')
+            return_field: Per-stock field holding the return in percent
+            volatility_field: Per-stock field holding the volatility in percent
+
+        Returns:
+            PortfolioAnalytics over the stocks in the analysis
+        """
+        stocks = stock_analysis['stocks']
+        tickers = list(stocks.keys())
+        return cls(
+            tickers,
+            [stocks[t][return_field] for t in tickers],
+            [stocks[t][volatility_field] for t in tickers],
+            sectors=[stocks[t].get('sector', 'Unknown') for t in tickers],
+            **kwargs
+        )
+
+    def with_correlation_from_prices(self, daily_prices: pd.DataFrame) -> 'PortfolioAnalytics':
+        """
+        Use the correlation of daily returns (e.g. the daily prices CSV saved by
+        get_stock_data) instead of assuming uncorrelated tickers.
+
+        Args:
+            daily_prices: Closing prices, one column per ticker
+
+        Returns:
+            New PortfolioAnalytics with the estimated correlation matrix
+        """
+        daily_returns = daily_prices.reindex(columns=self.tickers).pct_change(fill_method=None)
+        correlation = daily_returns.corr().fillna(0.0).to_numpy()
+        np.fill_diagonal(correlation, 1.0)
+        return PortfolioAnalytics(self.tickers, self.returns, self.volatilities, self.sectors,
+                                  correlation, self.risk_free_rate)
+
+    # -- Weight matrices ---------------------------------------------------
+
+    def weight_matrix(self, portfolios: Dict[str, Dict[str, float]],
+                      normalize: bool = False) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Convert named allocations into a weight matrix.
+
+        Args:
+            portfolios: Strategy names to {ticker: percentage} allocations
+            normalize: Divide by each portfolio's total allocation instead of by 100
+
+        Returns:
+            Strategy names, (portfolios x tickers) weights for known tickers and the
+            number of known tickers per portfolio; unknown tickers are ignored
+        """
+        names = list(portfolios.keys())
+        weights = np.zeros((len(names), len(self.tickers)))
+        known = np.zeros(len(names), dtype=int)
+        for row, name in enumerate(names):
+            allocation = portfolios[name]
+            total = sum(allocation.values()) if normalize else 100.0
+            for ticker, percentage in allocation.items():
+                column = self.index.get(ticker)
+                if column is not None:
+                    weights[row, column] += percentage / total
+                    known[row] += 1
+        return names, weights, known
+
+    def growth_weights(self, allocation_count: int = 4,
+                       allocation_method: str = "performance_weighted") -> Tuple[List[str], np.ndarray]:
+        """
+        Growth strategy allocation in percent (see create_growth_portfolio).
+
+        Args:
+            allocation_count: Number of top-return stocks to include
+            allocation_method: "equal_weight", "performance_weighted" or "risk_adjusted"
+
+        Returns:
+            Selected tickers (by descending return) and their percentages
+        """
+        # Stable sort on descending return, same order as sorted(..., reverse=True)
+        order = np.argsort(-self.returns, kind='stable')[:allocation_count]
+        tickers = [self.tickers[i] for i in order]
+        returns = self.returns[order]
+
+        if allocation_method == "equal_weight":
+            return tickers, np.round(np.full(len(order), 100.0 / len(order)), 1)
+
+        if allocation_method == "performance_weighted":
+            scores = returns
+        elif allocation_method == "risk_adjusted":
+            scores = returns / np.maximum(self.volatilities[order], 1.0)
+        else:
+            return tickers, np.zeros(0)
+
+        # Clamp to 10-40% for diversification, then normalize to 100%
+        weights = np.round(np.clip(scores / scores.sum() * 100, 10.0, 40.0), 1)
+        return tickers, np.round(weights / weights.sum() * 100, 1)
+
+    def random_weights(self, count: int, assets_per_portfolio: Optional[int] = None,
+                       seed: Optional[int] = None) -> np.ndarray:
+        """
+        Random long-only candidate allocations, e.g. for a Monte Carlo search.
+
+        Args:
+            count: Number of candidate portfolios
+            assets_per_portfolio: Hold only this many randomly chosen tickers per portfolio
+            seed: Random seed
+
+        Returns:
+            (count x tickers) weights, each row summing to 1
+        """
+        rng = np.random.default_rng(seed)
+        weights = rng.dirichlet(np.ones(len(self.tickers)), size=count)
+        if assets_per_portfolio is not None and assets_per_portfolio < len(self.tickers):
+            # Keep the k largest random draws of an independent ranking per row
+            ranks = rng.random((count, len(self.tickers))).argsort(axis=1).argsort(axis=1)
+            weights = np.where(ranks < assets_per_portfolio, weights, 0.0)
+            weights /= weights.sum(axis=1, keepdims=True)
+        return weights
+
+    # -- Batched evaluation ------------------------------------------------
+
+    def expected_returns(self, weights: np.ndarray) -> np.ndarray:
+        """Weighted return (percent) of each portfolio."""
+        return weights @ self.returns
+
+    def weighted_volatility(self, weights: np.ndarray) -> np.ndarray:
+        """Weighted average of the tickers' volatilities (percent), as used for risk levels."""
+        return weights @ self.volatilities
+
+    def portfolio_volatility(self, weights: np.ndarray) -> np.ndarray:
+        """Covariance-based volatility (percent): sqrt(w' C w) for each portfolio."""
+        variance = np.einsum('ij,jk,ik->i', weights, self.covariance, weights)
+        return np.sqrt(np.maximum(variance, 0.0))
+
+    def sharpe_ratios(self, weights: np.ndarray, volatility: Optional[np.ndarray] = None) -> np.ndarray:
+        """(return - risk free rate) / covariance-based volatility, 0 where the volatility is 0."""
+        if volatility is None:
+            volatility = self.portfolio_volatility(weights)
+        excess = self.expected_returns(weights) - self.risk_free_rate
+        return np.divide(excess, volatility, out=np.zeros_like(excess), where=volatility > 0)
+
+    def evaluate(self, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Evaluate a batch of portfolios.
+
+        Args:
+            weights: (portfolios x tickers) weights, rows normally summing to 1
+
+        Returns:
+            Arrays of expected_return, weighted_volatility, portfolio_volatility and sharpe_ratio
+        """
+        weights = np.atleast_2d(weights)
+        volatility = self.portfolio_volatility(weights)
+        return {
+            'expected_return': self.expected_returns(weights),
+            'weighted_volatility': self.weighted_volatility(weights),
+            'portfolio_volatility': volatility,
+            'sharpe_ratio': self.sharpe_ratios(weights, volatility),
+        }
+
+
+def risk_levels(volatility: np.ndarray, low: float = 20.0, high: float = 30.0) -> List[str]:
+    """Low / Moderate / High label per volatility value (percent)."""
+    return [
+        "Low" if v < low else "Moderate" if v < high else "High"
+        for v in np.asarray(volatility, dtype=float).tolist()
+    ]
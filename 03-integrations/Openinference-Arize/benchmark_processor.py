@@ -0,0 +1,217 @@
+"""
+Micro-benchmark for StrandsToOpenInferenceProcessor.
+
+Replays Strands spans (agent -> cycles -> model invokes and tool calls) through
+the processor and reports per span:
+- the attribute transformation itself, with the single-parse pipeline and with
+  the previous two-pass one (messages parsed back from llm.input_messages and
+  llm.output_messages, input.value encoding the messages a second time)
+- the time spent in on_end, i.e. the overhead added to the agent's thread, for
+  both modes: inline (attributes are transformed in on_end) and background
+  (on_end only enqueues, a worker transforms and exports in batches)
+
+Spans are generated with a configurable prompt size, or loaded from a JSON file
+of recorded spans: a list of {"name", "span_id", "parent_id", "attributes"}
+objects in end order (children before their parents).
+
+Usage:
+    python benchmark_processor.py --traces 50 --prompt-kb 64
+    python benchmark_processor.py --spans-file recorded_spans.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanContext, TraceFlags
+
+from strands_to_openinference_mapping import StrandsToOpenInferenceProcessor
+
+
+class NullExporter(SpanExporter):
+    def __init__(self):
+        self.exported = 0
+
+    def export(self, spans):
+        self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+
+class TwoPassProcessor(StrandsToOpenInferenceProcessor):
+    """The transformation as it was before the single-parse pipeline, for comparison."""
+
+    def _decoded_messages(self, result: Dict[str, Any], key: str, decoded: Optional[Dict[str, Any]]) -> Any:
+        messages = json.loads(result[key])
+        if key == "llm.input_messages":
+            self._input_messages = messages
+        return messages
+
+    def _add_input_output_values(self, attrs: Dict[str, Any], result: Dict[str, Any],
+                                 decoded: Optional[Dict[str, Any]] = None):
+        self._input_messages = None
+        super()._add_input_output_values(attrs, result)
+        if self._input_messages and result.get("input.value", "").startswith('{"messages":'):
+            input_structure = {
+                "messages": self._input_messages,
+                "model": result.get("llm.model_name") or attrs.get("gen_ai.request.model") or "unknown",
+            }
+            invocation_params = json.loads(result.get("llm.invocation_parameters", "{}"))
+            if max_tokens := invocation_params.get("max_tokens"):
+                input_structure["max_tokens"] = max_tokens
+            result["input.value"] = json.dumps(input_structure, separators=(",", ":"))
+
+
+def generate_trace(rng: random.Random, prompt_kb: int, cycles: int = 3) -> List[Dict]:
+    """One recorded agent invocation, children listed before their parents."""
+    next_id = iter(range(1, 10000))
+    agent_id = next(next_id)
+    history = []
+    filler = "lorem ipsum dolor sit amet " * (prompt_kb * 1024 // 27 + 1)
+    spans = []
+    tools = json.dumps([{"name": "get_booking_details", "description": "Get booking details",
+                         "input_schema": {"type": "object", "properties": {"booking_id": {"type": "string"}}}}])
+    for cycle in range(1, cycles + 1):
+        cycle_id = next(next_id)
+        history.append({"role": "user", "content": [{"text": filler}]})
+        model_id = next(next_id)
+        tool_use_id = f"tooluse_{rng.randrange(10 ** 8)}"
+        completion = [{"role": "assistant", "content": [{"text": "Let me look that up."}],
+                       "toolUse": [{"toolUseId": tool_use_id, "name": "get_booking_details",
+                                    "input": {"booking_id": str(rng.randrange(10 ** 6))}}]}]
+        spans.append({"name": "Model invoke", "span_id": model_id, "parent_id": cycle_id, "attributes": {
+            "gen_ai.system": "strands-agents",
+            "gen_ai.request.model": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+            "gen_ai.prompt": json.dumps(history),
+            "gen_ai.completion": json.dumps(completion),
+            "gen_ai.usage.prompt_tokens": 1000 * cycle,
+            "gen_ai.usage.completion_tokens": 50,
+            "gen_ai.usage.total_tokens": 1000 * cycle + 50,
+            "max_tokens": 4096,
+            "temperature": 0.3,
+        }})
+        spans.append({"name": "Tool: get_booking_details", "span_id": next(next_id), "parent_id": cycle_id,
+                      "attributes": {
+                          "tool.name": "get_booking_details",
+                          "tool.id": tool_use_id,
+                          "tool.status": "success",
+                          "tool.parameters": json.dumps({"booking_id": "123"}),
+                          "tool.result": json.dumps({"content": [{"text": filler[:2048]}]}),
+                      }})
+        history.extend(completion)
+        spans.append({"name": f"Cycle {cycle}", "span_id": cycle_id, "parent_id": agent_id, "attributes": {
+            "event_loop.cycle_id": f"cycle-{cycle}",
+            "gen_ai.prompt": json.dumps(history),
+            "gen_ai.completion": "Let me look that up.",
+        }})
+    spans.append({"name": "invoke_agent", "span_id": agent_id, "parent_id": None, "attributes": {
+        "agent.name": "Restaurant Helper",
+        "gen_ai.agent.name": "Restaurant Helper",
+        "gen_ai.request.model": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        "gen_ai.prompt": "Can you check booking 123?",
+        "gen_ai.completion": "Your booking is confirmed.",
+        "agent.tools": tools,
+        "session.id": "benchmark",
+    }})
+    return spans
+
+
+def to_readable_spans(recorded: List[Dict], trace_id: int) -> List[ReadableSpan]:
+    def context(span_id):
+        return SpanContext(trace_id=trace_id, span_id=span_id, is_remote=False,
+                           trace_flags=TraceFlags(TraceFlags.SAMPLED))
+
+    return [
+        ReadableSpan(
+            name=span["name"],
+            context=context(span["span_id"]),
+            parent=context(span["parent_id"]) if span["parent_id"] else None,
+            # A plain dict, so the inline mode can rewrite it in place
+            attributes=dict(span["attributes"]),
+        )
+        for span in recorded
+    ]
+
+
+def replay(processor, traces: List[List[ReadableSpan]]) -> List[float]:
+    timings = []
+    for spans in traces:
+        # Spans are listed in end order, start them parents first
+        for span in reversed(spans):
+            processor.on_start(span)
+        for span in spans:
+            start = time.perf_counter()
+            processor.on_end(span)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def transform(processor, traces: List[List[ReadableSpan]]):
+    """Per-span transformation times and results, as on_end would compute them."""
+    timings = []
+    results = []
+    for spans in traces:
+        for span in reversed(spans):
+            processor.on_start(span)
+        for span in spans:
+            hierarchy = processor._lookup_hierarchy(span.get_span_context().span_id)
+            start = time.perf_counter()
+            results.append(processor._convert_attributes(dict(span.attributes), span, hierarchy))
+            timings.append((time.perf_counter() - start) * 1000)
+        processor._evict_trace(spans[0].get_span_context().trace_id)
+    return timings, results
+
+
+def report(label: str, timings: List[float]):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"  {label:<28} p50={statistics.median(timings):8.3f} ms  p99={p99:8.3f} ms  "
+          f"mean={statistics.mean(timings):8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark StrandsToOpenInferenceProcessor per-span overhead")
+    parser.add_argument("--traces", type=int, default=50, help="Agent invocations to replay")
+    parser.add_argument("--prompt-kb", type=int, default=64, help="Approximate size of each user message")
+    parser.add_argument("--spans-file", help="JSON file of recorded spans instead of generated ones")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    if args.spans_file:
+        with open(args.spans_file) as f:
+            recorded = [json.load(f)] * args.traces
+    else:
+        recorded = [generate_trace(rng, args.prompt_kb) for _ in range(args.traces)]
+    span_count = sum(len(trace) for trace in recorded)
+    print(f"{len(recorded)} traces, {span_count} spans")
+
+    print("transformation per span")
+    traces = [to_readable_spans(r, i + 1) for i, r in enumerate(recorded)]
+    before, before_results = transform(TwoPassProcessor(), traces)
+    after, after_results = transform(StrandsToOpenInferenceProcessor(), traces)
+    assert before_results == after_results, "single-parse and two-pass transformations differ"
+    report("two-pass (before)", before)
+    report("single-parse (after)", after)
+    print(f"  {statistics.mean(before) / statistics.mean(after):.2f}x faster on average, identical attributes")
+
+    print("on_end per span")
+    inline = StrandsToOpenInferenceProcessor()
+    report("inline on_end", replay(inline, [to_readable_spans(r, i + 1) for i, r in enumerate(recorded)]))
+
+    exporter = NullExporter()
+    background = StrandsToOpenInferenceProcessor(exporter=exporter, schedule_delay_millis=100)
+    traces = [to_readable_spans(r, i + 1) for i, r in enumerate(recorded)]
+    start = time.perf_counter()
+    report("background on_end (enqueue)", replay(background, traces))
+    background.force_flush()
+    elapsed = time.perf_counter() - start
+    background.shutdown()
+    print(f"  background worker exported {exporter.exported} spans, {span_count / elapsed:.0f} spans/s end to end")
+
+
+if __name__ == "__main__":
+    main()
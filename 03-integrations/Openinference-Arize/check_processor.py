@@ -0,0 +1,109 @@
+"""
+Offline check of the span hierarchy size cap of StrandsToOpenInferenceProcessor.
+
+- Short traces that end (and are evicted with their root) must not count
+  towards max_tracked_spans: a long-running trace started before them keeps
+  its hierarchy entries.
+- Live spans beyond max_tracked_spans are still evicted, oldest first.
+- The bookkeeping gauges are registered once, however many processors are
+  created, and report the sum over the live processors.
+
+Usage:
+    python check_processor.py
+"""
+
+import gc
+import logging
+
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.trace import SpanContext, TraceFlags
+
+from strands_to_openinference_mapping import StrandsToOpenInferenceProcessor
+
+
+def make_span(trace_id: int, span_id: int, parent_id: int = None, name: str = "span") -> ReadableSpan:
+    def context(span_id):
+        return SpanContext(trace_id=trace_id, span_id=span_id, is_remote=False,
+                           trace_flags=TraceFlags(TraceFlags.SAMPLED))
+
+    return ReadableSpan(name=name, context=context(span_id),
+                        parent=context(parent_id) if parent_id else None, attributes={})
+
+
+def check_ended_traces_do_not_evict_live_spans():
+    processor = StrandsToOpenInferenceProcessor(max_tracked_spans=100)
+    root = make_span(1, 1, name="invoke_agent")
+    child = make_span(1, 2, 1, name="execute_event_loop_cycle")
+    processor.on_start(root)
+    processor.on_start(child)
+    for trace_id in range(2, 202):
+        short_root = make_span(trace_id, trace_id * 10)
+        short_child = make_span(trace_id, trace_id * 10 + 1, trace_id * 10)
+        processor.on_start(short_root)
+        processor.on_start(short_child)
+        processor.on_end(short_child)
+        processor.on_end(short_root)
+
+    stats = processor.stats()
+    assert stats["tracked_spans"] == 2, stats
+    assert stats["evicted_spans"]["max_size"] == 0, stats
+    assert processor._lookup_hierarchy(2)[1]["name"] == "invoke_agent"
+    # Order entries of the ended traces are pruned
+    assert len(processor._span_order) <= 2 * processor.max_tracked_spans
+    print(f"200 short traces ended, long trace still tracked: {stats}")
+
+
+def check_live_spans_are_capped():
+    processor = StrandsToOpenInferenceProcessor(max_tracked_spans=100)
+    root = make_span(1, 1, name="invoke_agent")
+    processor.on_start(root)
+    for span_id in range(2, 152):
+        processor.on_start(make_span(1, span_id, 1))
+
+    stats = processor.stats()
+    assert stats["tracked_spans"] == 100, stats
+    assert stats["evicted_spans"]["max_size"] == 51, stats
+    # Oldest first: the root went, the latest spans are kept
+    assert 1 not in processor.span_hierarchy and 151 in processor.span_hierarchy
+    print(f"151 live spans, capped at 100: {stats}")
+
+
+def check_gauges_registered_once():
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter("check_processor")
+    warnings = []
+    handler = logging.Handler()
+    handler.emit = warnings.append
+    logging.getLogger("opentelemetry").addHandler(handler)
+    try:
+        processors = [StrandsToOpenInferenceProcessor(meter=meter) for _ in range(3)]
+    finally:
+        logging.getLogger("opentelemetry").removeHandler(handler)
+    assert not warnings, [record.getMessage() for record in warnings]
+    for i, processor in enumerate(processors):
+        processor.on_start(make_span(i + 1, i + 1))
+
+    def tracked_spans():
+        metrics = reader.get_metrics_data().resource_metrics[0].scope_metrics[0].metrics
+        gauges = [m for m in metrics if m.name == "strands_openinference.tracked_spans"]
+        assert len(gauges) == 1, gauges
+        return [point.value for point in gauges[0].data.data_points]
+
+    assert tracked_spans() == [3], tracked_spans()
+    del processors[1:], processor
+    gc.collect()
+    assert tracked_spans() == [1], tracked_spans()
+    print("3 processors: gauges registered once, sum over live processors")
+
+
+def main():
+    check_ended_traces_do_not_evict_live_spans()
+    check_live_spans_are_capped()
+    check_gauges_registered_once()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,89 +7,346 @@ to OpenInference format for compatibility with Arize AI.
 
 import json
 import logging
-from typing import Any, Dict, List, Optional, Set
-from datetime import datetime
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
 from opentelemetry.trace import Span
 
 logger = logging.getLogger(__name__)
 
+_SHUTDOWN = object()
+
+# Live processors, observed by the bookkeeping gauges
+_processors: "weakref.WeakSet[StrandsToOpenInferenceProcessor]" = weakref.WeakSet()
+# Meters the gauges are registered on, once each per process
+_gauge_meters: List[metrics.Meter] = []
+_gauge_lock = threading.Lock()
+
+
+def _observe(stat: str):
+    def callback(options: CallbackOptions):
+        yield Observation(sum(processor._gauge_value(stat) for processor in list(_processors)))
+    return callback
+
+
+def _register_gauges(meter: metrics.Meter):
+    """Create the bookkeeping gauges on a meter, unless this process already did."""
+    with _gauge_lock:
+        if any(registered is meter for registered in _gauge_meters):
+            return
+        _gauge_meters.append(meter)
+    meter.create_observable_gauge(
+        "strands_openinference.tracked_spans",
+        callbacks=[_observe("tracked_spans")],
+        description="Span hierarchy entries held by StrandsToOpenInferenceProcessor",
+    )
+    meter.create_observable_gauge(
+        "strands_openinference.tracked_traces",
+        callbacks=[_observe("tracked_traces")],
+        description="Traces with live span hierarchy entries",
+    )
+    meter.create_observable_gauge(
+        "strands_openinference.queued_spans",
+        callbacks=[_observe("queued_spans")],
+        description="Spans waiting for the background transformation worker",
+    )
+
+
 class StrandsToOpenInferenceProcessor(SpanProcessor):
     """
     SpanProcessor that converts Strands telemetry attributes to OpenInference format
     for compatibility with Arize AI.
+
+    The span hierarchy (name and parent of each live span) is only kept while it
+    is needed to resolve graph parents: a trace's entries are evicted when its
+    local root span ends, and entries older than span_ttl_seconds or beyond
+    max_tracked_spans are evicted oldest first. Bookkeeping relies on atomic
+    dict/set/deque operations instead of a lock, so on_start/on_end never block
+    each other; a span lost from the per-trace index in a race is still evicted
+    by the TTL/size cap.
+
+    Without an exporter, attributes are rewritten in place in on_end, before
+    processors registered after this one (e.g. a BatchSpanProcessor) see the
+    span. With an exporter, on_end only enqueues the span: a background worker
+    transforms queued spans into new spans with OpenInference attributes and
+    exports them in batches, keeping the transformation off the agent's thread.
     """
 
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, max_tracked_spans: int = 10000,
+                 span_ttl_seconds: float = 3600.0, meter: Optional[metrics.Meter] = None,
+                 exporter: Optional[SpanExporter] = None, max_queue_size: int = 2048,
+                 max_export_batch_size: int = 512, schedule_delay_millis: float = 5000):
         """
         Initialize the processor.
         
         Args:
             debug: Whether to log debug information
+            max_tracked_spans: Maximum number of span hierarchy entries kept in memory
+            span_ttl_seconds: Evict hierarchy entries of spans started longer ago than this
+            meter: OpenTelemetry meter for the bookkeeping gauges (defaults to the global meter provider);
+                the gauges are registered once per meter and sum over all processors of the process
+            exporter: Export transformed spans from a background worker instead of transforming in on_end
+            max_queue_size: Spans waiting for the worker; spans are dropped when the queue is full
+            max_export_batch_size: Maximum number of spans per export call
+            schedule_delay_millis: Maximum time a span waits in the queue before its batch is exported
         """
         super().__init__()
         self.debug = debug
-        self.processed_spans = set()
+        self.max_tracked_spans = max_tracked_spans
+        self.span_ttl_seconds = span_ttl_seconds
+        self.processed_span_count = 0
         self.current_cycle_id = None
         self.span_hierarchy = {}
+        self._trace_spans: Dict[int, Set[int]] = {}
+        # (start time, span id) in start order, for TTL and size cap eviction
+        self._span_order = deque()
+        self.evicted_spans = {"trace_end": 0, "ttl": 0, "max_size": 0}
+
+        self.exporter = exporter
+        self.max_export_batch_size = max_export_batch_size
+        self.schedule_delay_seconds = schedule_delay_millis / 1000
+        self.dropped_span_count = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._shutdown = False
+        self._worker: Optional[threading.Thread] = None
+        if exporter is not None:
+            self._worker = threading.Thread(target=self._run_worker, name="StrandsToOpenInference", daemon=True)
+            self._worker.start()
+
+        _processors.add(self)
+        _register_gauges(meter or metrics.get_meter(__name__))
+
+    def _gauge_value(self, stat: str) -> int:
+        if stat == "tracked_spans":
+            return len(self.span_hierarchy)
+        if stat == "tracked_traces":
+            return len(self._trace_spans)
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Bookkeeping counters, e.g. for health endpoints or logs."""
+        return {
+            "tracked_spans": len(self.span_hierarchy),
+            "tracked_traces": len(self._trace_spans),
+            "processed_spans": self.processed_span_count,
+            "queued_spans": self._queue.qsize(),
+            "dropped_spans": self.dropped_span_count,
+            "evicted_spans": dict(self.evicted_spans),
+        }
 
     def on_start(self, span, parent_context=None):
         """Called when a span is started. Track span hierarchy."""
-        span_id = span.get_span_context().span_id
+        span_context = span.get_span_context()
+        span_id = span_context.span_id
         parent_id = None
+        # Spans without a parent in this process end their trace's local bookkeeping
+        is_root = True
         
         if parent_context and hasattr(parent_context, 'span_id'):
             parent_id = parent_context.span_id
+            is_root = getattr(parent_context, 'is_remote', False)
         elif span.parent and hasattr(span.parent, 'span_id'):
             parent_id = span.parent.span_id
-            
+            is_root = span.parent.is_remote
+        
+        now = time.monotonic()
         self.span_hierarchy[span_id] = {
             'name': span.name,
-            'span_id': span_id,
             'parent_id': parent_id,
-            'start_time': datetime.now().isoformat()
+            'trace_id': span_context.trace_id,
+            'is_root': is_root,
+            'started': now
         }
+        self._trace_spans.setdefault(span_context.trace_id, set()).add(span_id)
+        self._span_order.append((now, span_id))
+        if len(self._span_order) > 2 * self.max_tracked_spans:
+            self._prune_span_order()
+        self._evict_expired(now)
+
+    def _evict_expired(self, now: float):
+        """Evict the oldest entries while they are expired, stale, or over the size cap."""
+        while True:
+            try:
+                started, span_id = self._span_order.popleft()
+            except IndexError:
+                return
+            if span_id not in self.span_hierarchy:
+                # Already evicted with its trace
+                continue
+            # The order may still hold entries of spans evicted with their trace,
+            # only live entries count towards the cap
+            if len(self.span_hierarchy) > self.max_tracked_spans:
+                self._evict_span(span_id, "max_size")
+            elif now - started > self.span_ttl_seconds:
+                self._evict_span(span_id, "ttl")
+            else:
+                self._span_order.appendleft((started, span_id))
+                return
+
+    def _prune_span_order(self):
+        """Drop order entries of spans evicted with their trace, keeping the live ones in place."""
+        # Rotated in place rather than rebuilt, so entries appended concurrently are not lost
+        for _ in range(len(self._span_order)):
+            try:
+                entry = self._span_order.popleft()
+            except IndexError:
+                return
+            if entry[1] in self.span_hierarchy:
+                self._span_order.append(entry)
+
+    def _evict_span(self, span_id: int, reason: str):
+        info = self.span_hierarchy.pop(span_id, None)
+        if info is None:
+            return
+        self.evicted_spans[reason] += 1
+        trace_spans = self._trace_spans.get(info['trace_id'])
+        if trace_spans is not None:
+            trace_spans.discard(span_id)
+            if not trace_spans:
+                self._trace_spans.pop(info['trace_id'], None)
+
+    def _evict_trace(self, trace_id: int):
+        for span_id in list(self._trace_spans.pop(trace_id, ())):
+            if self.span_hierarchy.pop(span_id, None) is not None:
+                self.evicted_spans["trace_end"] += 1
 
     def on_end(self, span: Span):
         """
         Called when a span ends. Transform the span attributes from Strands format
         to OpenInference format.
         """
+        span_context = span.get_span_context()
+        # Resolved now, the entries may be evicted before a background worker gets to the span
+        hierarchy = self._lookup_hierarchy(span_context.span_id)
+        try:
+            if self.exporter is None:
+                self._transform_span(span, hierarchy)
+            elif not self._shutdown:
+                self._enqueue(span, hierarchy)
+        finally:
+            span_info = hierarchy[0]
+            if span_info and span_info['is_root']:
+                self._evict_trace(span_context.trace_id)
+
+    def _lookup_hierarchy(self, span_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Hierarchy entries of a span and its parent ({} when not tracked)."""
+        span_info = self.span_hierarchy.get(span_id, {})
+        parent_id = span_info.get('parent_id')
+        parent_info = self.span_hierarchy.get(parent_id, {}) if parent_id else {}
+        return span_info, parent_info
+
+    def _enqueue(self, span: ReadableSpan, hierarchy: Tuple[Dict[str, Any], Dict[str, Any]]):
+        try:
+            self._queue.put_nowait((span, hierarchy))
+        except queue.Full:
+            self.dropped_span_count += 1
+            if self.dropped_span_count == 1 or self.debug:
+                logger.warning("Transformation queue is full, dropping span '%s'", span.name)
+
+    def _run_worker(self):
+        """Collect queued spans into batches and export them until shutdown."""
+        while True:
+            batch = []
+            flush_events = []
+            stop = False
+            deadline = time.monotonic() + self.schedule_delay_seconds
+            while len(batch) < self.max_export_batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _SHUTDOWN:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    # Everything queued before the flush request is in this batch
+                    flush_events.append(item)
+                    break
+                batch.append(item)
+            if batch:
+                self._export_batch(batch)
+            for event in flush_events:
+                event.set()
+            if stop:
+                return
+
+    def _export_batch(self, batch: List[Tuple[ReadableSpan, Tuple[Dict[str, Any], Dict[str, Any]]]]):
+        spans = [self._transformed_span(span, hierarchy) for span, hierarchy in batch]
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            logger.error(f"Failed to export {len(spans)} spans: {e}", exc_info=True)
+
+    def _transformed_span(self, span: ReadableSpan, hierarchy: Tuple[Dict[str, Any], Dict[str, Any]]) -> ReadableSpan:
+        """A copy of the span carrying OpenInference attributes."""
+        if not span.attributes:
+            return span
+        original_attrs = dict(span.attributes)
+        try:
+            attributes = self._convert_attributes(original_attrs, span, hierarchy)
+        except Exception as e:
+            logger.error(f"Failed to transform span '{span.name}': {e}", exc_info=True)
+            attributes = original_attrs
+        return ReadableSpan(
+            name=span.name,
+            context=span.get_span_context(),
+            parent=span.parent,
+            resource=span.resource,
+            attributes=attributes,
+            events=span.events,
+            links=span.links,
+            kind=span.kind,
+            status=span.status,
+            start_time=span.start_time,
+            end_time=span.end_time,
+            instrumentation_scope=span.instrumentation_scope,
+        )
+
+    def _convert_attributes(self, original_attrs: Dict[str, Any], span: Span,
+                            hierarchy: Tuple[Dict[str, Any], Dict[str, Any]]) -> Dict[str, Any]:
+        if "event_loop.cycle_id" in original_attrs:
+            self.current_cycle_id = original_attrs.get("event_loop.cycle_id")
+        
+        transformed_attrs = self._transform_attributes(original_attrs, span, hierarchy)
+        self.processed_span_count += 1
+        
+        if self.debug:
+            logger.info(f"Transformed span '{span.name}': {len(original_attrs)} -> {len(transformed_attrs)} attributes")
+        return transformed_attrs
+
+    def _transform_span(self, span: Span, hierarchy: Tuple[Dict[str, Any], Dict[str, Any]]):
         if not hasattr(span, '_attributes') or not span._attributes:
             return
 
         original_attrs = dict(span._attributes)
-        span_id = span.get_span_context().span_id
-        
-        if span_id in self.span_hierarchy:
-            self.span_hierarchy[span_id]['attributes'] = original_attrs
         
         try:
-            if "event_loop.cycle_id" in original_attrs:
-                self.current_cycle_id = original_attrs.get("event_loop.cycle_id")
-            
-            transformed_attrs = self._transform_attributes(original_attrs, span)
+            transformed_attrs = self._convert_attributes(original_attrs, span, hierarchy)
             span._attributes.clear()
             span._attributes.update(transformed_attrs)
-            self.processed_spans.add(span_id)
-            
-            if self.debug:
-                logger.info(f"Transformed span '{span.name}': {len(original_attrs)} -> {len(transformed_attrs)} attributes")
                 
         except Exception as e:
             logger.error(f"Failed to transform span '{span.name}': {e}", exc_info=True)
             span._attributes.clear()
             span._attributes.update(original_attrs)
 
-    def _transform_attributes(self, attrs: Dict[str, Any], span: Span) -> Dict[str, Any]:
+    def _transform_attributes(self, attrs: Dict[str, Any], span: Span,
+                              hierarchy: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Transform Strands attributes to OpenInference format.
         """
         result = {}
         span_kind = self._determine_span_kind(span, attrs)
         result["openinference.span.kind"] = span_kind
-        self._set_graph_node_attributes(span, attrs, result)
+        self._set_graph_node_attributes(span, attrs, result, hierarchy)
         prompt = attrs.get("gen_ai.prompt")
         completion = attrs.get("gen_ai.completion")
         model_id = attrs.get("gen_ai.request.model")
@@ -152,7 +409,8 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             return "CHAIN"
         return "CHAIN"
     
-    def _set_graph_node_attributes(self, span: Span, attrs: Dict[str, Any], result: Dict[str, Any]):
+    def _set_graph_node_attributes(self, span: Span, attrs: Dict[str, Any], result: Dict[str, Any],
+                                   hierarchy: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None):
         """
         Set graph node attributes for Arize visualization.
         Hierarchy: Agent -> Cycles -> (LLMs and/or Tools)
@@ -162,9 +420,8 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         span_id = span.get_span_context().span_id
         
         # Get parent information from span hierarchy
-        span_info = self.span_hierarchy.get(span_id, {})
+        span_info, parent_info = hierarchy or self._lookup_hierarchy(span_id)
         parent_id = span_info.get('parent_id')
-        parent_info = self.span_hierarchy.get(parent_id, {}) if parent_id else {}
         parent_name = parent_info.get('name', '')
         
         if span_kind == "AGENT":
@@ -208,13 +465,15 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
 
     def _handle_chain_and_llm_span(self, attrs: Dict[str, Any], result: Dict[str, Any], prompt: Any, completion: Any):
         """Handle LLM-specific attributes."""
+        # Decoded message lists, reused instead of parsing the encoded attributes again
+        decoded = {}
         if prompt:
-            self._map_messages(prompt, result, is_input=True)
+            self._map_messages(prompt, result, is_input=True, decoded=decoded)
         
         if completion:
-            self._map_messages(completion, result, is_input=False)
+            self._map_messages(completion, result, is_input=False, decoded=decoded)
         
-        self._add_input_output_values(attrs, result)
+        self._add_input_output_values(attrs, result, decoded)
         self._map_invocation_parameters(attrs, result)
     
     def _handle_tool_span(self, attrs: Dict[str, Any], result: Dict[str, Any]):
@@ -310,7 +569,8 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             result["llm.input_messages.0.message.content"] = str(prompt)
         self._add_input_output_values(attrs, result)  
     
-    def _map_messages(self, messages_data: Any, result: Dict[str, Any], is_input: bool):
+    def _map_messages(self, messages_data: Any, result: Dict[str, Any], is_input: bool,
+                      decoded: Optional[Dict[str, Any]] = None):
         """Map Strands messages to OpenInference message format."""
         key_prefix = "llm.input_messages" if is_input else "llm.output_messages"
         
@@ -322,6 +582,8 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         
         messages_list = self._normalize_messages(messages_data)
         result[key_prefix] = json.dumps(messages_list, separators=(",", ":"))
+        if decoded is not None:
+            decoded[key_prefix] = messages_list
 
         for idx, msg in enumerate(messages_list):
             if not isinstance(msg, dict):
@@ -438,7 +700,14 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         if params:
             result["llm.invocation_parameters"] = json.dumps(params, separators=(",", ":"))
     
-    def _add_input_output_values(self, attrs: Dict[str, Any], result: Dict[str, Any]):
+    def _decoded_messages(self, result: Dict[str, Any], key: str, decoded: Optional[Dict[str, Any]]) -> Any:
+        """Messages already decoded by _map_messages, or parsed from the encoded attribute."""
+        if decoded and key in decoded:
+            return decoded[key]
+        return json.loads(result[key])
+
+    def _add_input_output_values(self, attrs: Dict[str, Any], result: Dict[str, Any],
+                                 decoded: Optional[Dict[str, Any]] = None):
         """Add input.value and output.value for Arize compatibility."""
         span_kind = result.get("openinference.span.kind")
         model_name = result.get("llm.model_name") or attrs.get("gen_ai.request.model") or "unknown"
@@ -452,16 +721,18 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
         if span_kind == "LLM":
             if "llm.input_messages" in result:
                 try:
-                    input_messages = json.loads(result["llm.input_messages"])
+                    input_messages = self._decoded_messages(result, "llm.input_messages", decoded)
                     if input_messages:
                         input_structure = {
-                            "messages": input_messages,
                             "model": model_name
                         }
                         if max_tokens := invocation_params.get("max_tokens"):
                             input_structure["max_tokens"] = max_tokens
                         
-                        result["input.value"] = json.dumps(input_structure, separators=(",", ":"))
+                        # Same as dumping {"messages": ..., **input_structure}, splicing in
+                        # the already encoded messages instead of encoding them again
+                        result["input.value"] = '{"messages":' + result["llm.input_messages"] + "," + \
+                            json.dumps(input_structure, separators=(",", ":"))[1:]
                         result["input.mime_type"] = "application/json"
                 except:
                     if prompt_content := result.get("llm.input_messages.0.message.content"):
@@ -470,7 +741,7 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
 
             if "llm.output_messages" in result:
                 try:
-                    output_messages = json.loads(result["llm.output_messages"])
+                    output_messages = self._decoded_messages(result, "llm.output_messages", decoded)
                     if output_messages and len(output_messages) > 0:
                         first_msg = output_messages[0]
                         content = first_msg.get("message.content", "")
@@ -566,9 +837,24 @@ class StrandsToOpenInferenceProcessor(SpanProcessor):
             return str(value)
 
     def shutdown(self):
-        """Called when the processor is shutdown."""
-        pass
+        """Called when the processor is shutdown. Exports queued spans first."""
+        if self._worker is None or self._shutdown:
+            return
+        self._shutdown = True
+        self._queue.put(_SHUTDOWN)
+        self._worker.join()
+        self.exporter.shutdown()
 
     def force_flush(self, timeout_millis=None):
-        """Called to force flush."""
-        return True
\ No newline at end of file
+        """Called to force flush. Waits until spans queued so far are exported."""
+        if self._worker is None or self._shutdown:
+            return True
+        flushed = threading.Event()
+        timeout = timeout_millis / 1000 if timeout_millis is not None else None
+        try:
+            self._queue.put(flushed, timeout=timeout)
+        except queue.Full:
+            return False
+        if not flushed.wait(timeout):
+            return False
+        return self.exporter.force_flush(timeout_millis) if timeout_millis is not None else self.exporter.force_flush()
\ No newline at end of file
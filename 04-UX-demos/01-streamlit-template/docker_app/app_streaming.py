@@ -1,5 +1,6 @@
 import streamlit as st
 from utils.auth import Auth
+from utils.stream_renderer import StreamRenderer
 from config_file import Config
 
 from strands import Agent
@@ -95,51 +96,17 @@ if prompt := st.chat_input("Ask your agent..."):
     with st.chat_message("assistant"):
         st.session_state.details_placeholder = st.empty()  # Create a new placeholder
     
-    # Initialize strings to store streaming of model output
-    st.session_state.output = []
-
-    # Create the callback handler to display streaming responses
-    def custom_callback_handler(**kwargs):
-        def add_to_output(output_type, content, append = True):
-            if len(st.session_state.output) == 0:
-                st.session_state.output.append({"type": output_type, "content": content})
-            else:
-                last_item = st.session_state.output[-1]
-                if last_item["type"] == output_type:
-                    if append:
-                        st.session_state.output[-1]["content"] += content
-                    else:
-                        st.session_state.output[-1]["content"] = content
-                else:
-                    st.session_state.output.append({"type": output_type, "content": content})
-
-        with st.session_state.details_placeholder.container():
-            current_streaming_tool_use = ""
-            # Process stream data
-            if "data" in kwargs:
-                add_to_output("data", kwargs["data"])
-            elif "current_tool_use" in kwargs and kwargs["current_tool_use"].get("name"):
-                tool_use_id = kwargs["current_tool_use"].get("toolUseId")
-                current_streaming_tool_use = "Using tool: " + kwargs["current_tool_use"]["name"] + " with args: " + str(kwargs["current_tool_use"]["input"])
-                add_to_output("tool_use", current_streaming_tool_use, append = False)
-            elif "reasoningText" in kwargs:
-                add_to_output("reasoning", kwargs["reasoningText"])
-
-            # Display output
-            for output_item in st.session_state.output:
-                if output_item["type"] == "data":
-                    st.markdown(output_item["content"])
-                elif output_item["type"] == "tool_use":
-                    st.code(output_item["content"])
-                elif output_item["type"] == "reasoning":
-                    st.markdown(output_item["content"])
+    # Create the callback handler to display streaming responses: only the item being streamed
+    # is rendered again, at most every 0.1 s or every 400 new characters
+    renderer = StreamRenderer(st.session_state.details_placeholder.container())
     
     # Set callback handler into the agent
-    st.session_state.agent.callback_handler = custom_callback_handler
+    st.session_state.agent.callback_handler = renderer
     
     # Get response from agent
     response = st.session_state.agent(prompt)
+    renderer.flush()
 
     # When done, add assistant messages to chat history
-    for output_item in st.session_state.output:
+    for output_item in renderer.output:
             st.session_state.messages.append({"role": "assistant", "type": output_item["type"] , "content": output_item["content"]})
@@ -0,0 +1,160 @@
+"""
+Benchmark of the streaming callback handler of app_streaming.py.
+
+Replays a simulated agent response (text, then a tool use whose arguments are
+streamed, then more text; --tokens text tokens in total, one every --token-ms)
+through Streamlit elements, with:
+
+- the previous handler: every item of the response rendered again on each event
+- StreamRenderer: only the active item rendered, deltas coalesced
+
+and reports the number of element renders, the bytes of content rendered (what
+is sent to the browser) and the CPU time, per 1k tokens.
+
+Runs Streamlit in bare mode (no server, nothing displayed). Usage:
+    python benchmark_rendering.py --tokens 1000 --token-ms 20
+"""
+
+import argparse
+import logging
+import random
+import time
+
+import streamlit as st
+
+from utils.stream_renderer import StreamRenderer
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+
+class RecordingElement:
+    """Streamlit element counting the markdown/code renders made through it."""
+
+    def __init__(self, element, recorder):
+        self.element = element
+        self.recorder = recorder
+
+    def empty(self):
+        return RecordingElement(self.element.empty(), self.recorder)
+
+    def container(self):
+        return RecordingElement(self.element.container(), self.recorder)
+
+    def markdown(self, body):
+        self.recorder.calls += 1
+        self.recorder.bytes += len(body.encode())
+        self.element.markdown(body)
+
+    def code(self, body):
+        self.recorder.calls += 1
+        self.recorder.bytes += len(body.encode())
+        self.element.code(body)
+
+
+def previous_handler(placeholder):
+    """The callback handler app_streaming.py used before StreamRenderer."""
+    output = []
+
+    def handler(**kwargs):
+        def add_to_output(output_type, content, append=True):
+            if len(output) == 0:
+                output.append({"type": output_type, "content": content})
+            else:
+                last_item = output[-1]
+                if last_item["type"] == output_type:
+                    if append:
+                        output[-1]["content"] += content
+                    else:
+                        output[-1]["content"] = content
+                else:
+                    output.append({"type": output_type, "content": content})
+
+        container = placeholder.container()
+        if "data" in kwargs:
+            add_to_output("data", kwargs["data"])
+        elif "current_tool_use" in kwargs and kwargs["current_tool_use"].get("name"):
+            current_streaming_tool_use = "Using tool: " + kwargs["current_tool_use"]["name"] + " with args: " + str(kwargs["current_tool_use"]["input"])
+            add_to_output("tool_use", current_streaming_tool_use, append=False)
+
+        for output_item in output:
+            if output_item["type"] == "tool_use":
+                container.code(output_item["content"])
+            else:
+                container.markdown(output_item["content"])
+
+    return handler
+
+
+def response_events(tokens, seed=7):
+    """Callback events of a response: 30% of the text, a tool use, then the rest of the text."""
+    rng = random.Random(seed)
+    words = ["appointment", "the", "meeting", "is", "scheduled", "for", "**Monday**", "at", "10:00", "with", "\n-"]
+    events = [{"data": rng.choice(words) + " "} for _ in range(int(tokens * 0.3))]
+    arguments = '{"date": "2025-06-02 10:00", "location": "Room 42", "title": "Quarterly review"}'
+    events += [
+        {"current_tool_use": {"toolUseId": "tool-1", "name": "create_appointment", "input": arguments[:i]}}
+        for i in range(0, len(arguments) + 1, 2)
+    ]
+    events += [{"data": rng.choice(words) + " "} for _ in range(tokens - int(tokens * 0.3))]
+    return events
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(make_handler, events, token_seconds):
+    recorder = Recorder()
+    clock = SimulatedClock()
+    placeholder = RecordingElement(st.empty(), recorder)
+    handler, finish = make_handler(placeholder, clock)
+    start = time.process_time()
+    for event in events:
+        clock.now += token_seconds
+        handler(**event)
+    finish()
+    return recorder, time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare render cost of the streaming callback handlers")
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--token-ms", type=float, default=20, help="simulated time between tokens")
+    args = parser.parse_args()
+    # Bare mode warns about the missing script run context on every element (the log levels
+    # are set up by the first Streamlit call)
+    st.empty()
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    events = response_events(args.tokens)
+    per_1k = 1000 / args.tokens
+
+    def previous(placeholder, clock):
+        return previous_handler(placeholder), lambda: None
+
+    def incremental(placeholder, clock):
+        renderer = StreamRenderer(placeholder.container(), clock=clock)
+        return renderer, renderer.flush
+
+    print(f"{len(events)} callback events ({args.tokens} text tokens, {args.token_ms:g} ms apart), per 1k tokens:")
+    results = {}
+    for label, make_handler in (("previous handler", previous), ("StreamRenderer", incremental)):
+        recorder, cpu = run(make_handler, events, args.token_ms / 1000)
+        results[label] = recorder
+        print(f"  {label:<17} {recorder.calls * per_1k:8.0f} renders  "
+              f"{recorder.bytes * per_1k / 1024:10.1f} KB rendered  {cpu * per_1k * 1000:8.1f} ms CPU")
+    assert results["StreamRenderer"].calls < results["previous handler"].calls
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import time
+
+
+class StreamRenderer:
+    """
+    Callback handler that renders the streamed output of an agent into a Streamlit container.
+
+    Each output item (text, tool use, reasoning) gets its own placeholder, and a delta only
+    updates the placeholder of the item being streamed, so earlier items are not rendered again.
+    Deltas are coalesced: the active item is rendered when `min_interval` seconds have passed
+    since its last render, or when `max_pending_chars` characters are waiting.
+    """
+
+    def __init__(self, container, min_interval=0.1, max_pending_chars=400, clock=time.monotonic):
+        self.container = container
+        self.min_interval = min_interval
+        self.max_pending_chars = max_pending_chars
+        self.clock = clock
+        # Output items as {"type": ..., "content": ...}, in order
+        self.output = []
+        self.render_calls = 0
+        self._placeholder = None
+        self._tool_use_id = None
+        self._pending_chars = 0
+        self._last_render = None
+
+    def __call__(self, **kwargs):
+        if "data" in kwargs:
+            self.add("data", kwargs["data"])
+        elif "current_tool_use" in kwargs and kwargs["current_tool_use"].get("name"):
+            tool_use = kwargs["current_tool_use"]
+            content = "Using tool: " + tool_use["name"] + " with args: " + str(tool_use["input"])
+            self.add("tool_use", content, append=False, item_id=tool_use.get("toolUseId"))
+        elif "reasoningText" in kwargs:
+            self.add("reasoning", kwargs["reasoningText"])
+        elif self._pending_chars and self.clock() - self._last_render >= self.min_interval:
+            # Other events (e.g. the end of a message) also show deltas still waiting
+            self._render()
+
+    def add(self, output_type, content, append=True, item_id=None):
+        """Add a delta to the active item, or start a new item if the type (or tool use) changes."""
+        last_item = self.output[-1] if self.output else None
+        if last_item is None or last_item["type"] != output_type or (
+                output_type == "tool_use" and item_id != self._tool_use_id):
+            # The previous item is complete: show all of it before moving on
+            self.flush()
+            self.output.append({"type": output_type, "content": content})
+            self._tool_use_id = item_id
+            self._placeholder = self.container.empty()
+            self._pending_chars = len(content)
+            self._render()
+            return
+
+        if append:
+            last_item["content"] += content
+        else:
+            last_item["content"] = content
+        self._pending_chars += len(content)
+        if (self._pending_chars >= self.max_pending_chars
+                or self.clock() - self._last_render >= self.min_interval):
+            self._render()
+
+    def flush(self):
+        """Render what is still waiting, e.g. when the agent is done."""
+        if self._pending_chars:
+            self._render()
+
+    def _render(self):
+        item = self.output[-1]
+        if item["type"] == "tool_use":
+            self._placeholder.code(item["content"])
+        else:
+            self._placeholder.markdown(item["content"])
+        self.render_calls += 1
+        self._pending_chars = 0
+        self._last_render = self.clock()
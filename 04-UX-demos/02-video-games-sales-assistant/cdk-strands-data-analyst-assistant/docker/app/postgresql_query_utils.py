@@ -1,10 +1,13 @@
-from datetime import datetime, date
 import boto3
 import json
 import psycopg2
+from psycopg2 import sql
 import os
+import threading
+import time
 from botocore.exceptions import ClientError
-from decimal import Decimal
+from uuid import uuid4
+from result_serializer import serialize_rows_within_budget
 
 # Environment variables
 ENV = {
@@ -13,7 +16,13 @@ ENV = {
     "DATABASE_NAME": os.environ.get("DATABASE_NAME"),
     "QUESTION_ANSWERS_TABLE": os.environ.get("QUESTION_ANSWERS_TABLE"),
     "MAX_RESPONSE_SIZE_BYTES": int(os.environ.get("MAX_RESPONSE_SIZE_BYTES", 25600)),
-    "AWS_REGION": os.environ.get("AWS_REGION", "us-east-1")
+    "AWS_REGION": os.environ.get("AWS_REGION", "us-east-1"),
+    "SECRET_CACHE_TTL_SECONDS": int(os.environ.get("SECRET_CACHE_TTL_SECONDS", 300)),
+    "POOL_MIN_CONNECTIONS": int(os.environ.get("POOL_MIN_CONNECTIONS", 1)),
+    "POOL_MAX_CONNECTIONS": int(os.environ.get("POOL_MAX_CONNECTIONS", 5)),
+    "POOL_HEALTH_CHECK_SECONDS": int(os.environ.get("POOL_HEALTH_CHECK_SECONDS", 30)),
+    "POOL_ACQUIRE_TIMEOUT_SECONDS": int(os.environ.get("POOL_ACQUIRE_TIMEOUT_SECONDS", 30)),
+    "FETCH_SIZE_ROWS": int(os.environ.get("FETCH_SIZE_ROWS", 500))
 }
 
 
@@ -59,21 +68,225 @@ def get_secret(secret_name: str, region_name: str) -> dict:
     return secret
 
 
-def get_postgresql_connection(secret_name: str, aws_region: str, postgresql_host: str, database_name: str):
+class SecretCache:
     """
-    Establishes a connection to PostgreSQL using credentials from Secrets Manager.
+    Caches a secret in memory for a limited time to avoid a Secrets Manager
+    call per query. The cache can be invalidated explicitly, e.g. after an
+    authentication failure caused by a rotated password.
+    """
+
+    def __init__(self, fetch_secret, ttl_seconds: int):
+        """
+        Args:
+            fetch_secret: Callable without arguments that returns the secret dictionary
+            ttl_seconds: Number of seconds a fetched secret is considered fresh
+        """
+        self._fetch_secret = fetch_secret
+        self._ttl_seconds = ttl_seconds
+        self._secret = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        """
+        Returns the cached secret, fetching it again if it is missing or expired.
+        """
+        with self._lock:
+            if self._secret is None or time.monotonic() >= self._expires_at:
+                self._secret = self._fetch_secret()
+                self._expires_at = time.monotonic() + self._ttl_seconds
+            return self._secret
+
+    def invalidate(self):
+        """
+        Discards the cached secret so the next get() fetches a fresh copy.
+        """
+        with self._lock:
+            self._secret = None
+            self._expires_at = 0.0
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of reusable database connections.
+
+    Idle connections are health checked before being handed out when they have
+    not been used for more than health_check_seconds, and broken connections are
+    discarded and replaced transparently. The pool works with any DB-API 2.0
+    connection (psycopg2, sqlite3, ...).
+    """
+
+    def __init__(self, connect, min_connections: int = 1, max_connections: int = 5,
+                 health_check_seconds: int = 30, acquire_timeout_seconds: int = 30):
+        """
+        Args:
+            connect: Callable without arguments that opens a new connection
+            min_connections: Number of connections opened eagerly on first use
+            max_connections: Maximum number of connections open at the same time
+            health_check_seconds: Idle time after which a connection is pinged before reuse
+            acquire_timeout_seconds: Maximum time to wait for a free connection
+        """
+        self._connect = connect
+        self._min_connections = min_connections
+        self._max_connections = max_connections
+        self._health_check_seconds = health_check_seconds
+        self._acquire_timeout_seconds = acquire_timeout_seconds
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._open_connections = 0
+        self._condition = threading.Condition()
+        self._warmed_up = False
+
+    def _warm_up(self):
+        # Called with the condition held
+        self._warmed_up = True
+        while self._open_connections < self._min_connections:
+            self._open_connections += 1
+            try:
+                self._idle.append((self._connect(), time.monotonic()))
+            except Exception:
+                self._open_connections -= 1
+                raise
+
+    @staticmethod
+    def _is_healthy(connection) -> bool:
+        if getattr(connection, "closed", 0):
+            return False
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Returns a connection from the pool, opening a new one if none is idle
+        and the pool is not full.
+
+        Raises:
+            TimeoutError: If no connection becomes available in time
+            Exception: Any error raised while opening a new connection
+        """
+        deadline = time.monotonic() + self._acquire_timeout_seconds
+        with self._condition:
+            if not self._warmed_up:
+                self._warm_up()
+            while True:
+                while self._idle:
+                    connection, last_used = self._idle.pop()
+                    if time.monotonic() - last_used < self._health_check_seconds:
+                        return connection
+                    if self._is_healthy(connection):
+                        return connection
+                    print("Discarding unhealthy pooled connection")
+                    self._close_quietly(connection)
+                    self._open_connections -= 1
+                if self._open_connections < self._max_connections:
+                    self._open_connections += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise TimeoutError("Timed out waiting for a database connection from the pool")
+
+        # Open the new connection outside the lock so slow handshakes do not block other callers
+        try:
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._open_connections -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection):
+        """
+        Returns a connection to the pool. Any open transaction is rolled back and
+        connections that are closed or cannot be reset are discarded.
+        """
+        reusable = not getattr(connection, "closed", 0)
+        if reusable:
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+        if not reusable:
+            self._close_quietly(connection)
+        with self._condition:
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._open_connections -= 1
+            self._condition.notify()
+
+    def close_all(self):
+        """
+        Closes every idle connection. Connections currently in use are closed
+        when they are released.
+        """
+        with self._condition:
+            for connection, _ in self._idle:
+                self._close_quietly(connection)
+            self._open_connections -= len(self._idle)
+            self._idle = []
+            self._warmed_up = False
+
+
+_secret_cache = None
+_connection_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_secret_cache() -> SecretCache:
+    """
+    Returns the process-wide cache for the database credentials secret.
+    """
+    global _secret_cache
+    with _pool_lock:
+        if _secret_cache is None:
+            _secret_cache = SecretCache(
+                lambda: get_secret(ENV["SECRET_NAME"], ENV["AWS_REGION"]),
+                ENV["SECRET_CACHE_TTL_SECONDS"]
+            )
+        return _secret_cache
+
+
+def is_authentication_error(error: Exception) -> bool:
+    """
+    Checks whether a connection error was caused by rejected credentials.
+    """
+    return "authentication failed" in str(error).lower()
+
+
+def get_postgresql_connection(secret_cache: SecretCache, postgresql_host: str, database_name: str):
+    """
+    Opens a new connection to PostgreSQL using the cached credentials.
+
+    If the server rejects the credentials the secret may have been rotated, so
+    the cache is invalidated and the connection is retried once with a fresh secret.
     
     Args:
-        secret_name: Name of the secret containing database credentials
-        aws_region: AWS region where the secret is stored
+        secret_cache: Cache holding the database credentials secret
         postgresql_host: PostgreSQL server hostname
         database_name: Name of the database to connect to
         
     Returns:
-        Connection object if successful, False otherwise
+        Connection object
+
+    Raises:
+        psycopg2.Error: If the connection cannot be established
     """
-    secret = get_secret(secret_name, aws_region)
-    print(secret)
+    secret = secret_cache.get()
     try:
         conn = psycopg2.connect(
             host=postgresql_host,
@@ -81,33 +294,88 @@ def get_postgresql_connection(secret_name: str, aws_region: str, postgresql_host
             user=secret["username"],
             password=secret["password"],
         )
-        print("Connected to the PostgreSQL database!")
-    except (Exception, psycopg2.Error) as error:
-        print("Error connecting to the PostgreSQL database:", error)
-        return False
+    except psycopg2.OperationalError as error:
+        if not is_authentication_error(error):
+            raise
+        print("Authentication failed, refreshing database credentials")
+        secret_cache.invalidate()
+        secret = secret_cache.get()
+        conn = psycopg2.connect(
+            host=postgresql_host,
+            database=database_name,
+            user=secret["username"],
+            password=secret["password"],
+        )
+    print("Connected to the PostgreSQL database!")
     return conn
 
 
-def get_size(string: str) -> int:
+def get_connection_pool() -> ConnectionPool:
     """
-    Calculates the size of a string in bytes when encoded as UTF-8.
-    
+    Returns the process-wide PostgreSQL connection pool, creating it on first use.
+    """
+    global _connection_pool
+    secret_cache = get_secret_cache()
+    with _pool_lock:
+        if _connection_pool is None:
+            _connection_pool = ConnectionPool(
+                lambda: get_postgresql_connection(
+                    secret_cache,
+                    ENV["POSTGRESQL_HOST"],
+                    ENV["DATABASE_NAME"]
+                ),
+                min_connections=ENV["POOL_MIN_CONNECTIONS"],
+                max_connections=ENV["POOL_MAX_CONNECTIONS"],
+                health_check_seconds=ENV["POOL_HEALTH_CHECK_SECONDS"],
+                acquire_timeout_seconds=ENV["POOL_ACQUIRE_TIMEOUT_SECONDS"]
+            )
+        return _connection_pool
+
+
+def open_result_cursor(connection, sql_query: str):
+    """
+    Opens the cursor used to stream the results of a query.
+
+    SELECT and WITH queries use a server-side (named) cursor so rows are only
+    transferred as they are fetched, other statements use a regular cursor.
+
     Args:
-        string: The string to measure
-        
+        connection: PostgreSQL connection
+        sql_query: SQL query that will be executed on the cursor
+
+    Returns:
+        psycopg2 cursor
+    """
+    if sql_query.lstrip().lower().startswith(("select", "with")):
+        return connection.cursor(name=f"result_{uuid4().hex}")
+    return connection.cursor()
+
+
+def count_remaining_result_rows(cursor) -> int:
+    """
+    Counts the rows not fetched yet from a result cursor without transferring them.
+
+    Args:
+        cursor: psycopg2 cursor opened with open_result_cursor
+
     Returns:
-        int: Size of the string in bytes
+        int: Number of rows left in the cursor
     """
-    return len(string.encode("utf-8"))
+    if cursor.name:
+        with cursor.connection.cursor() as move_cursor:
+            move_cursor.execute(sql.SQL("MOVE FORWARD ALL IN {}").format(sql.Identifier(cursor.name)))
+            return move_cursor.rowcount
+    return cursor.rowcount - cursor.rownumber
 
 
 def run_sql_query_on_postgresql(sql_query: str) -> str:
     """
     Executes a SQL query on the PostgreSQL database and returns the results as JSON.
     
-    The function handles connection to the database, query execution, and formatting
-    of results. Special data types (Decimal, date) are properly converted for JSON.
-    If the result size exceeds MAX_RESPONSE_SIZE_BYTES, it's truncated.
+    The function borrows a connection from the process-wide pool, executes the query
+    and streams the results in batches. Special data types (Decimal, date, bytea) are properly
+    converted for JSON. If the result size exceeds MAX_RESPONSE_SIZE_BYTES, no more rows
+    are fetched and the result is truncated.
     
     Args:
         sql_query: SQL query string to execute
@@ -120,14 +388,11 @@ def run_sql_query_on_postgresql(sql_query: str) -> str:
         # Validate environment variables before proceeding
         validate_environment()
         
-        connection = get_postgresql_connection(
-            ENV["SECRET_NAME"], 
-            ENV["AWS_REGION"], 
-            ENV["POSTGRESQL_HOST"], 
-            ENV["DATABASE_NAME"]
-        )
-
-        if connection == False:
+        connection_pool = get_connection_pool()
+        try:
+            connection = connection_pool.acquire()
+        except Exception as error:
+            print("Error connecting to the PostgreSQL database:", error)
             return json.dumps({
                 "error": "Something went wrong connecting to the database, ask the user to try again later."
             })
@@ -135,49 +400,41 @@ def run_sql_query_on_postgresql(sql_query: str) -> str:
         print("connected")
 
         message = ""
-        cur = connection.cursor()
-        records = []
+        cur = open_result_cursor(connection, sql_query)
         records_to_return = []
 
         print(sql_query)
 
         # Execute a SQL query
         try:
-            cur.execute(sql_query)
-            rows = cur.fetchall()
-            column_names = [desc[0] for desc in cur.description]
-            for item in rows:
-                record = {}
-                for x, value in enumerate(item):
-                    if type(value) is Decimal:
-                        record[column_names[x]] = float(value)
-                    elif isinstance(value, date):
-                        record[column_names[x]] = str(value)
-                    else:
-                        record[column_names[x]] = value
-                records.append(record)
-            if get_size(json.dumps(records)) > ENV["MAX_RESPONSE_SIZE_BYTES"]:
-                for item in records:
-                    if get_size(json.dumps(records_to_return)) <= ENV["MAX_RESPONSE_SIZE_BYTES"]:
-                        records_to_return.append(item)
+            cur.execute(sql_query.strip().rstrip(";") if cur.name else sql_query)
+            serialized = serialize_rows_within_budget(
+                cur,
+                ENV["MAX_RESPONSE_SIZE_BYTES"],
+                fetch_size=ENV["FETCH_SIZE_ROWS"],
+                count_remaining=count_remaining_result_rows
+            )
+            records_to_return = serialized["records"]
+            if serialized["truncated"]:
                 message = (
                     "The data is too large, it has been truncated from "
-                    + str(len(records))
+                    + str(serialized["total_rows"])
                     + " to "
-                    + str(len(records_to_return))
+                    + str(serialized["returned_rows"])
                     + " rows."
                 )
-            else:
-                records_to_return = records
 
         except (Exception, psycopg2.Error) as error:
             print("Error executing SQL query:", error)
             connection.rollback()  # Rollback the transaction if there's an error
             return json.dumps({"error": str(error.pgerror) if hasattr(error, 'pgerror') else str(error)})
         finally:
-            # Close the cursor and the connection
-            cur.close()
-            connection.close()
+            # Close the cursor and return the connection to the pool
+            try:
+                cur.close()
+            except psycopg2.Error as error:
+                print("Error closing cursor:", error)
+            connection_pool.release(connection)
             
         if message != "":
             return json.dumps({"result": records_to_return, "message": message})
@@ -0,0 +1,161 @@
+"""
+Local benchmark for the pooled PostgreSQL execution engine.
+
+Compares per-query latency of opening a new connection (and fetching the
+credentials secret) for every query against reusing connections from the
+ConnectionPool with a cached secret.
+
+By default a throwaway SQLite database is used as a stand-in, with the secret
+fetch and connection handshake latencies simulated by --secret-latency-ms and
+--connect-latency-ms. Pass --dsn to run against a real (throwaway) PostgreSQL
+instance instead, e.g.:
+
+    python3 resources/benchmark-connection-pool.py
+    python3 resources/benchmark-connection-pool.py --dsn "host=localhost dbname=postgres user=postgres password=postgres"
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker", "app"))
+
+from postgresql_query_utils import ConnectionPool, SecretCache  # noqa: E402
+
+QUERY = "SELECT title, total_sales FROM video_games_sales_units ORDER BY total_sales DESC LIMIT 10"
+
+
+def create_sqlite_database(path: str):
+    """Create a small video_games_sales_units table to query."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE video_games_sales_units (title TEXT, total_sales REAL)")
+    conn.executemany(
+        "INSERT INTO video_games_sales_units VALUES (?, ?)",
+        [(f"Game {i}", (i * 7919) % 1000 / 10) for i in range(5000)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def build_connect(args, database_path: str):
+    """Return a callable that opens a new connection to the benchmark database."""
+    if args.dsn:
+        import psycopg2
+
+        def connect(secret):
+            return psycopg2.connect(args.dsn)
+
+        return connect
+
+    def connect(secret):
+        time.sleep(args.connect_latency_ms / 1000)
+        return sqlite3.connect(database_path, check_same_thread=False)
+
+    return connect
+
+
+def build_fetch_secret(args):
+    """Return a callable that simulates a Secrets Manager round trip."""
+
+    def fetch_secret():
+        time.sleep(args.secret_latency_ms / 1000)
+        return {"username": "benchmark", "password": "benchmark"}
+
+    return fetch_secret
+
+
+def run_query(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute(QUERY)
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def benchmark_unpooled(args, connect, fetch_secret):
+    latencies = []
+    for _ in range(args.queries):
+        start = time.perf_counter()
+        conn = connect(fetch_secret())
+        try:
+            run_query(conn)
+        finally:
+            conn.close()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def benchmark_pooled(args, connect, fetch_secret):
+    secret_cache = SecretCache(fetch_secret, ttl_seconds=300)
+    pool = ConnectionPool(lambda: connect(secret_cache.get()), min_connections=1, max_connections=5)
+    latencies = []
+    try:
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            conn = pool.acquire()
+            try:
+                run_query(conn)
+            finally:
+                pool.release(conn)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        pool.close_all()
+    return latencies
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(name, latencies):
+    print(
+        f"{name:<10} queries={len(latencies):<6} "
+        f"p50={percentile(latencies, 50):8.3f} ms  "
+        f"p99={percentile(latencies, 99):8.3f} ms  "
+        f"mean={statistics.mean(latencies):8.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per mode")
+    parser.add_argument("--dsn", help="libpq connection string of a throwaway PostgreSQL database")
+    parser.add_argument("--secret-latency-ms", type=float, default=20.0, help="Simulated Secrets Manager latency")
+    parser.add_argument("--connect-latency-ms", type=float, default=15.0,
+                        help="Simulated TLS handshake and authentication latency (SQLite stand-in only)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_path = os.path.join(tmp_dir, "video_games_sales.db")
+        if args.dsn:
+            import psycopg2
+
+            conn = psycopg2.connect(args.dsn)
+            with conn, conn.cursor() as cur:
+                cur.execute("DROP TABLE IF EXISTS video_games_sales_units")
+                cur.execute("CREATE TABLE video_games_sales_units (title TEXT, total_sales NUMERIC(4,2))")
+                cur.executemany(
+                    "INSERT INTO video_games_sales_units VALUES (%s, %s)",
+                    [(f"Game {i}", (i * 7919) % 1000 / 10) for i in range(5000)],
+                )
+            conn.close()
+        else:
+            create_sqlite_database(database_path)
+
+        connect = build_connect(args, database_path)
+        fetch_secret = build_fetch_secret(args)
+
+        print(f"Backend: {'PostgreSQL' if args.dsn else 'SQLite stand-in'}")
+        report("unpooled", benchmark_unpooled(args, connect, fetch_secret))
+        report("pooled", benchmark_pooled(args, connect, fetch_secret))
+
+
+if __name__ == "__main__":
+    main()
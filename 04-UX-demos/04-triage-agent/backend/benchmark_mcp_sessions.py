@@ -0,0 +1,123 @@
+"""
+Benchmark cold vs warm MCP tool listing and tool calls.
+
+Cold mode is the previous behaviour: every operation enters the client context,
+which spawns the stdio server, runs the request and tears the server down.
+Warm mode uses MCPClientManager's long-lived sessions, listing tools from all
+servers in parallel and reusing the running servers for tool calls.
+
+Run from the backend directory:
+    python benchmark_mcp_sessions.py --iterations 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from mcp import StdioServerParameters, stdio_client
+from strands.tools.mcp import MCPClient
+
+from mcpmanager import MCPClientManager
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The task manager server runs over HTTP when started directly, so launch its FastMCP app over stdio
+TASK_SERVER_STDIO = (
+    "import sys; sys.path.insert(0, 'mcp_servers'); "
+    "from task_manager_server import mcp; mcp.run(transport='stdio')"
+)
+
+SERVERS = {
+    "calculator": {
+        "args": ["mcp_servers/calculator_server.py"],
+        "tool": ("add", {"x": 2, "y": 3}),
+    },
+    "calendar": {
+        "args": ["mcp_servers/calendar/calendar_server.py"],
+        "tool": ("get_current_datetime", {}),
+    },
+    "task_manager": {
+        "args": ["-c", TASK_SERVER_STDIO],
+        "tool": ("list_tasks", {}),
+    },
+}
+
+
+def create_client(args: List[str]) -> MCPClient:
+    return MCPClient(
+        lambda: stdio_client(
+            StdioServerParameters(command=sys.executable, args=args, cwd=BACKEND_DIR, env=os.environ)
+        )
+    )
+
+
+def measure(fn: Callable[[], object], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: List[float]):
+    print(f"  {label:<38} p50={statistics.median(timings):9.2f} ms  max={max(timings):9.2f} ms")
+
+
+def benchmark_cold(clients: Dict[str, MCPClient], iterations: int):
+    print("Cold (server spawned per operation)")
+
+    def list_all_sequential():
+        for client in clients.values():
+            with client:
+                client.list_tools_sync()
+
+    report("list tools (all servers)", measure(list_all_sequential, iterations))
+
+    for name, client in clients.items():
+        tool_name, arguments = SERVERS[name]["tool"]
+
+        def call_tool(client=client, tool_name=tool_name, arguments=arguments):
+            with client:
+                client.call_tool_sync("benchmark", tool_name, arguments)
+
+        report(f"call {name}.{tool_name}", measure(call_tool, iterations))
+
+
+def benchmark_warm(clients: Dict[str, MCPClient], iterations: int):
+    print("Warm (long-lived sessions)")
+    manager = MCPClientManager()
+    for name, client in clients.items():
+        manager.add_client(name, client)
+
+    start = time.perf_counter()
+    manager.start_active_clients()
+    print(f"  {'one-time parallel startup':<38} {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+    try:
+        report("list tools (all servers, parallel)", measure(manager.get_all_tools, iterations))
+        for name, client in clients.items():
+            tool_name, arguments = SERVERS[name]["tool"]
+            report(
+                f"call {name}.{tool_name}",
+                measure(lambda: client.call_tool_sync("benchmark", tool_name, arguments), iterations),
+            )
+    finally:
+        manager.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold vs warm MCP sessions")
+    parser.add_argument("--iterations", type=int, default=5, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    clients = {name: create_client(config["args"]) for name, config in SERVERS.items()}
+    benchmark_cold(clients, args.iterations)
+    benchmark_warm(clients, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
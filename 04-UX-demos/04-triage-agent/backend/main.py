@@ -38,6 +38,7 @@ from strands.models import BedrockModel
 from strands.tools.mcp import MCPClient
 from mcp import StdioServerParameters, stdio_client
 from mcpmanager import mcp_manager
+from session_store import BoundedCache, SQLiteSessionStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -76,15 +77,27 @@ def add_server_log(server_name: str, message: str, level: str = "info", details:
     if len(server_logs[server_name]) > 50:
         server_logs[server_name] = server_logs[server_name][-50:]
 
-# Global agent cache - session-based
-session_agents = {}
+# Session storage - bounded in-memory caches backed by a persistent store
+SESSION_STORE_PATH = os.environ.get(
+    "SESSION_STORE_PATH", os.path.join(os.path.dirname(__file__), "runtime", "sessions.db")
+)
+SESSION_CACHE_MAX_SIZE = int(os.environ.get("SESSION_CACHE_MAX_SIZE", 100))
+SESSION_CACHE_TTL_SECONDS = int(os.environ.get("SESSION_CACHE_TTL_SECONDS", 3600))
+session_store = SQLiteSessionStore(SESSION_STORE_PATH)
+
+# Global agent cache - session-based, evicted agents are rehydrated from session_store
+session_agents = BoundedCache(
+    SESSION_CACHE_MAX_SIZE,
+    SESSION_CACHE_TTL_SECONDS,
+    loader=lambda agent_key: rehydrate_session_agent(agent_key)
+)
 
 # Global tools cache
 cached_tools = []
 tools_last_updated = None
 
 # Session token tracking
-session_token_usage = {}  # session_id -> {"total_input": int, "total_output": int}
+session_token_usage = BoundedCache(SESSION_CACHE_MAX_SIZE, SESSION_CACHE_TTL_SECONDS)  # session_id -> {"total_input": int, "total_output": int}
 
 # Global decision tree instance
 decision_tree = None
@@ -129,14 +142,54 @@ class ConversationState:
     last_updated: datetime = field(default_factory=datetime.now)
     last_user_input: str = ""
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the state for the session store"""
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        data["last_updated"] = self.last_updated.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationState":
+        """Restore a state serialized with to_dict"""
+        data = dict(data)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["last_updated"] = datetime.fromisoformat(data["last_updated"])
+        return cls(**data)
+
 class DecisionTree:
     """Manages the decision tree logic and conversation states, self-contained within main.py."""
     
-    def __init__(self, data_file: str):
+    def __init__(self, data_file: str, store: Optional[SQLiteSessionStore] = None):
         self.nodes: Dict[str, DecisionNode] = {}
-        self.conversations: Dict[str, ConversationState] = {}
+        self.store = store
+        self.conversations: BoundedCache = BoundedCache(
+            SESSION_CACHE_MAX_SIZE,
+            SESSION_CACHE_TTL_SECONDS,
+            loader=self._load_conversation if store else None
+        )
         self.data_file = data_file
         self.load_data()
+
+    def _load_conversation(self, session_id: str) -> Optional[ConversationState]:
+        """Rehydrate a conversation state from the session store"""
+        data = self.store.load("conversation_state", session_id)
+        if data is None:
+            return None
+        logger.info(f"Rehydrated conversation state for session {session_id}")
+        return ConversationState.from_dict(data)
+
+    def persist_session(self, session_id: str) -> None:
+        """Write a session's conversation state through to the session store"""
+        state = self.conversations.peek(session_id)
+        if self.store and state:
+            self.store.save("conversation_state", session_id, state.to_dict())
+
+    def clear_session(self, session_id: str) -> None:
+        """Remove a session's conversation state from memory and the session store"""
+        self.conversations.pop(session_id)
+        if self.store:
+            self.store.delete("conversation_state", session_id)
     
     def load_data(self):
         """Load decision tree data from JSON file"""
@@ -154,7 +207,7 @@ class DecisionTree:
 
     def start_session(self, session_id: str, chat_mode: bool = False) -> None:
         """Start a new decision tree session."""
-        if session_id in self.conversations:
+        if self.conversations.get(session_id) is not None:
             return
 
         self.conversations[session_id] = ConversationState(
@@ -162,14 +215,16 @@ class DecisionTree:
             current_node_id="start",
             chat_mode=chat_mode
         )
+        self.persist_session(session_id)
         logger.info(f"Started new session {session_id} in chat_mode={chat_mode}")
 
     def set_current_node(self, session_id: str, node_id: str) -> bool:
         """Forcefully set the current node for a session."""
-        if session_id in self.conversations and node_id in self.nodes:
+        if node_id in self.nodes and self.conversations.get(session_id) is not None:
             old_node = self.conversations[session_id].current_node_id
             self.conversations[session_id].current_node_id = node_id
             self.conversations[session_id].last_updated = datetime.now()
+            self.persist_session(session_id)
             logger.info(f"Session {session_id} current node manually set to {node_id}")
             add_server_log("triage", f"NODE TRANSITION: {session_id} - {old_node} -> {node_id}", level="info", details={
                 "session_id": session_id,
@@ -182,7 +237,7 @@ class DecisionTree:
         add_server_log("triage", f"NODE TRANSITION FAILED: {session_id} - target: {node_id}", level="warning", details={
             "session_id": session_id,
             "target_node": node_id,
-            "session_exists": session_id in self.conversations,
+            "session_exists": self.conversations.get(session_id) is not None,
             "node_exists": node_id in self.nodes
         })
         return False
@@ -217,16 +272,13 @@ add_server_log("system", f"MCP Manager initialized with clients: {mcp_manager.ge
 # Pre-load tools cache
 refresh_tools_cache()
 
-def get_or_create_session_agent(session_id: str, model_id: str) -> Agent:
-    """Get or create a cached agent for the given session and model"""
-    agent_key = f"{session_id}:{model_id}"
+def build_session_agent(model_id: str, messages: Optional[List[Dict]] = None) -> Agent:
+    """Create a session agent for the given model, optionally seeded with stored messages"""
+    model = BedrockModel(model_id=model_id, temperature=0.7)
+    tools = get_cached_tools()
     
-    if agent_key not in session_agents:
-        model = BedrockModel(model_id=model_id, temperature=0.7)
-        tools = get_cached_tools()
-        
-        # General purpose prompt. Specific instructions will be provided in each call.
-        system_prompt = """You are a helpful and empathetic AI Triage Assistant.
+    # General purpose prompt. Specific instructions will be provided in each call.
+    system_prompt = """You are a helpful and empathetic AI Triage Assistant.
 Your goal is to guide users through a structured assessment.
 You must follow the specific instructions given in each prompt precisely.
 Always provide your response in a clear, conversational, and professional manner.
@@ -238,29 +290,55 @@ FORMATTING GUIDELINES:
 - Highlight urgent situations with appropriate emphasis
 - Make important medical advice stand out visually
 """
-        
-        agent = Agent(model=model, system_prompt=system_prompt, tools=tools)
+    
+    return Agent(model=model, system_prompt=system_prompt, tools=tools, messages=messages)
+
+def rehydrate_session_agent(agent_key: str) -> Optional[Agent]:
+    """Recreate an evicted session agent from its stored messages"""
+    messages = session_store.load("agent_messages", agent_key)
+    if not messages:
+        return None
+    
+    session_id, model_id = agent_key.split(":", 1)
+    add_server_log("system", f"Session agent rehydrated for {session_id}:{model_id}", details={"message_count": len(messages)})
+    return build_session_agent(model_id, messages)
+
+def get_or_create_session_agent(session_id: str, model_id: str) -> Agent:
+    """Get or create a cached agent for the given session and model"""
+    agent_key = f"{session_id}:{model_id}"
+    
+    agent = session_agents.get(agent_key)
+    if agent is None:
+        agent = build_session_agent(model_id)
         session_agents[agent_key] = agent
         add_server_log("system", f"Session agent cached for {session_id}:{model_id}")
     
-    return session_agents[agent_key]
+    return agent
+
+def persist_session_agent(session_id: str, model_id: str, agent: Agent):
+    """Write a session agent's messages through to the session store"""
+    try:
+        session_store.save("agent_messages", f"{session_id}:{model_id}", agent.messages)
+    except Exception as e:
+        add_server_log("system", f"Error persisting session {session_id}: {str(e)}", level="error")
 
 def get_session_messages_for_ui(session_id: str, model_id: str) -> List[Dict]:
     """Get session messages formatted for UI from the actual agent"""
     agent_key = f"{session_id}:{model_id}"
     
-    if agent_key not in session_agents:
-        return []
-    
-    agent = session_agents[agent_key]
+    # Read from the cached agent if present, otherwise from the session store without building an agent
+    agent = session_agents.peek(agent_key)
+    if agent is not None:
+        messages = agent.messages if hasattr(agent, 'messages') else []
+    else:
+        messages = session_store.load("agent_messages", agent_key)
     
-    # Get messages from agent.messages
-    if not hasattr(agent, 'messages') or not agent.messages:
+    if not messages:
         return []
     
     ui_messages = []
     
-    for msg in agent.messages:
+    for msg in messages:
         # Skip system messages
         if msg.get('role') == 'system':
             continue
@@ -647,7 +725,7 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
         add_server_log("system", f"Processing [{session_id}]: {message[:30]}...")
         
         # Ensure session exists
-        if session_id not in decision_tree.conversations:
+        if decision_tree.conversations.get(session_id) is None:
             decision_tree.start_session(session_id, chat_mode=True)
             add_server_log("triage", f"NEW SESSION STARTED: {session_id}", level="info", details={
                 "session_id": session_id,
@@ -866,6 +944,8 @@ Respond with guidance followed by EXACTLY this XML format:
                 add_server_log("triage", f"LLM STREAM ERROR: {session_id} - {str(llm_error)}", level="error")
                 yield f"data: {json.dumps({'type': 'content', 'content': f'Error: {str(llm_error)}'})}\n\n"
 
+            persist_session_agent(session_id, model_id, agent)
+
         yield "data: [DONE]\n\n"
 
     except Exception as e:
@@ -1022,7 +1102,9 @@ async def get_agents_status():
     
     return {
         "session_agents": agents_info,
-        "count": len(session_agents)
+        "count": len(session_agents),
+        "cache": session_agents.stats(),
+        "conversations_cache": decision_tree.conversations.stats() if decision_tree else None
     }
 
 @app.post("/agents/refresh")
@@ -1036,14 +1118,16 @@ async def clear_session(session_id: str):
     """Clear a specific session's agent and triage session"""
     global session_agents, decision_tree
     
-    # Remove all agents for this session
+    # Remove all agents for this session, including persisted messages
     keys_to_remove = [key for key in session_agents.keys() if key.startswith(f"{session_id}:")]
     for key in keys_to_remove:
-        del session_agents[key]
+        session_agents.pop(key)
+    session_store.delete_prefix("agent_messages", f"{session_id}:")
+    session_token_usage.pop(session_id)
     
-    # Remove triage session if exists
-    if decision_tree and session_id in decision_tree.conversations:
-        del decision_tree.conversations[session_id]
+    # Remove triage session, including a persisted one that isn't in memory
+    if decision_tree:
+        decision_tree.clear_session(session_id)
         add_server_log("triage", f"Cleared triage session: {session_id}")
     
     add_server_log("system", f"Cleared session: {session_id}")
@@ -1071,7 +1155,7 @@ async def get_session_history(session_id: str, model_id: str = "us.anthropic.cla
         messages = get_session_messages_for_ui(session_id, model_id)
         
         agent_key = f"{session_id}:{model_id}"
-        exists = agent_key in session_agents
+        exists = session_agents.peek(agent_key) is not None or len(messages) > 0
         
         add_server_log("system", f"Session history request: {session_id} - Found {len(messages)} messages, exists: {exists}")
         
@@ -1188,7 +1272,7 @@ async def get_triage_session_state(session_id: str):
             add_server_log("triage", "Decision tree not initialized for session request", level="warning")
             return {"error": "Decision tree not initialized"}
         
-        if session_id not in decision_tree.conversations:
+        if decision_tree.conversations.get(session_id) is None:
             add_server_log("triage", f"Session not found: {session_id}", level="info")
             return {
                 "session_id": session_id,
@@ -1300,7 +1384,7 @@ async def startup_event():
     # Initialize decision tree
     try:
         tree_file = os.path.join(os.path.dirname(__file__), 'data/comprehensive_decision_tree.json')
-        decision_tree = DecisionTree(tree_file)
+        decision_tree = DecisionTree(tree_file, store=session_store)
         add_server_log("system", f"Decision Tree initialized: {len(decision_tree.nodes)} nodes loaded", level="info")
     except Exception as e:
         add_server_log("system", f"Decision Tree initialization failed: {str(e)}", level="error")
@@ -1310,7 +1394,7 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup MCP servers on shutdown"""
     add_server_log("system", "Shutting down MCP servers...")
-    # Clean shutdown for stdio-based servers happens automatically
+    mcp_manager.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
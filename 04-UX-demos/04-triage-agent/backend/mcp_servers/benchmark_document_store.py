@@ -0,0 +1,107 @@
+"""
+Benchmark the shared DocumentStore against the original load/rewrite-per-call servers.
+
+- get_emails(subject_contains=...): json.load + linear scan vs cached token index
+- add_task: json.load + json.dump of the whole file vs one appended journal record
+
+Usage:
+    python benchmark_document_store.py --documents 50000 --queries 50
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from document_store import DocumentStore
+
+WORDS = ["invoice", "payment", "meeting", "follow-up", "urgent", "report", "schedule",
+         "appointment", "results", "referral", "prescription", "insurance", "reminder"]
+
+
+def measure(fn, args_list):
+    timings = []
+    results = []
+    for args in args_list:
+        start = time.perf_counter()
+        results.append(fn(*args))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def report(label, timings):
+    print(f"  {label:<10} p50={statistics.median(timings):10.3f} ms  max={max(timings):10.3f} ms")
+
+
+def current_get_emails(path, subject_contains, limit=10):
+    with open(path, 'r') as f:
+        emails = json.load(f)
+    emails = [e for e in emails if subject_contains.lower() in e['subject'].lower()]
+    return emails[:limit]
+
+
+def current_add_task(path, description):
+    tasks = []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            tasks = json.load(f)
+    tasks.append({"id": len(tasks) + 1, "description": description, "priority": "medium", "completed": False})
+    with open(path, 'w') as f:
+        json.dump(tasks, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MCP server document store")
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        email_file = os.path.join(tmp_dir, "email_history.json")
+        emails = [
+            {"id": f"email-{i}", "subject": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} #{i}",
+             "body": "..." * 20}
+            for i in range(args.documents)
+        ]
+        with open(email_file, 'w') as f:
+            json.dump(emails, f)
+
+        start = time.perf_counter()
+        store = DocumentStore(email_file, text_indexes=["subject"])
+        print(f"{args.documents} emails, store loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        # Selective queries (a specific email number) and broad ones (a common word)
+        queries = [(f"#{rng.randrange(args.documents)}",) for _ in range(args.queries // 2)]
+        queries += [(rng.choice(WORDS)[:5].upper(),) for _ in range(args.queries - len(queries))]
+
+        print("get_emails(subject_contains=...)")
+        current_timings, current_results = measure(lambda q: current_get_emails(email_file, q), queries)
+        store_timings, store_results = measure(lambda q: store.search("subject", q, limit=10), queries)
+        report("current", current_timings)
+        report("store", store_timings)
+        assert current_results == store_results, "search results differ"
+
+        task_file = os.path.join(tmp_dir, "tasks.json")
+        with open(task_file, 'w') as f:
+            json.dump([{"id": i, "description": f"task {i}", "priority": "medium", "completed": False}
+                       for i in range(1, args.documents + 1)], f)
+        store_file = os.path.join(tmp_dir, "store_tasks.json")
+        with open(task_file) as src, open(store_file, 'w') as dst:
+            dst.write(src.read())
+        tasks = DocumentStore(store_file)
+
+        print("add_task")
+        descriptions = [(f"new task {i}",) for i in range(args.queries)]
+        report("current", measure(lambda d: current_add_task(task_file, d), descriptions)[0])
+        report("store", measure(
+            lambda d: tasks.insert({"description": d, "priority": "medium", "completed": False}),
+            descriptions)[0])
+        tasks.wait_for_compaction()
+
+
+if __name__ == "__main__":
+    main()
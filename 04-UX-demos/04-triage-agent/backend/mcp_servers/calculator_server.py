@@ -1,4 +1,5 @@
 from mcp.server import FastMCP
+import sys
 
 # Create a new MCP server
 mcp = FastMCP("Calculator Server")
@@ -26,5 +27,5 @@ def divide(x: float, y: float) -> float:
     return x / y
 
 if __name__ == "__main__":
-    print("🔢 Starting Calculator MCP Server...")
+    print("🔢 Starting Calculator MCP Server...", file=sys.stderr)  # stdout carries the stdio protocol
     mcp.run(transport="stdio") 
\ No newline at end of file
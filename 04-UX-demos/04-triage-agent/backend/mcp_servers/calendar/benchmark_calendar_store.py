@@ -0,0 +1,126 @@
+"""
+Benchmark the indexed CalendarStore against the original file-scan implementation.
+
+Generates synthetic events (100k by default) and measures conflict checks and
+day lookups (used by find_available_slots) both ways:
+- current: json.load the whole file and scan every event with datetime.fromisoformat per call
+- indexed: CalendarStore loaded once and queried through its sorted start index
+
+Usage:
+    python benchmark_calendar_store.py --events 100000 --queries 50
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from calendar_store import CalendarStore
+
+
+def generate_events(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, 8, 0)
+    events = []
+    for event_id in range(1, count + 1):
+        start = base + timedelta(days=rng.randrange(365 * 3), minutes=15 * rng.randrange(40))
+        end = start + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 120]))
+        events.append({
+            "id": event_id,
+            "title": f"Event {event_id}",
+            "start_datetime": start.isoformat(),
+            "end_datetime": end.isoformat(),
+            "description": "",
+            "created_at": base.isoformat()
+        })
+    return events
+
+
+def current_conflicts(path, proposed_start, proposed_end):
+    with open(path, 'r') as f:
+        events = json.load(f)
+    conflicts = []
+    for event in events:
+        event_start = datetime.fromisoformat(event["start_datetime"])
+        event_end = datetime.fromisoformat(event["end_datetime"])
+        if proposed_start < event_end and proposed_end > event_start:
+            conflicts.append(event)
+    return conflicts
+
+
+def current_day_events(path, target_date):
+    with open(path, 'r') as f:
+        events = json.load(f)
+    day_events = []
+    for event in events:
+        event_start = datetime.fromisoformat(event["start_datetime"])
+        if event_start.date() == target_date:
+            day_events.append(event)
+    day_events.sort(key=lambda x: x["start_datetime"])
+    return day_events
+
+
+def measure(fn, args_list):
+    timings = []
+    results = []
+    for args in args_list:
+        start = time.perf_counter()
+        results.append(fn(*args))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def report(label, timings):
+    print(f"  {label:<10} p50={statistics.median(timings):10.3f} ms  max={max(timings):10.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calendar conflict and slot queries")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "calendar_events.json")
+        with open(path, 'w') as f:
+            json.dump(generate_events(args.events), f)
+
+        start = time.perf_counter()
+        store = CalendarStore(path)
+        print(f"{args.events} events, indexed store loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        windows = []
+        for _ in range(args.queries):
+            proposed_start = datetime(2025, 1, 1, 9, 0) + timedelta(days=rng.randrange(365 * 3), minutes=15 * rng.randrange(32))
+            windows.append((proposed_start, proposed_start + timedelta(minutes=60)))
+
+        print("check_conflicts")
+        current_timings, current_results = measure(lambda s, e: current_conflicts(path, s, e), windows)
+        indexed_timings, indexed_results = measure(store.overlapping, windows)
+        report("current", current_timings)
+        report("indexed", indexed_timings)
+        assert [sorted(e["id"] for e in r) for r in current_results] == \
+            [sorted(e["id"] for e in r) for r in indexed_results], "conflict results differ"
+
+        print("find_available_slots (events on a day)")
+        days = [(s.date(),) for s, _ in windows]
+        current_timings, current_results = measure(lambda d: current_day_events(path, d), days)
+
+        def indexed_day_events(target_date):
+            day_start = datetime.combine(target_date, datetime.min.time())
+            return store.events_starting_between(day_start, day_start + timedelta(days=1))
+
+        indexed_timings, indexed_results = measure(indexed_day_events, days)
+        report("current", current_timings)
+        report("indexed", indexed_timings)
+        assert [sorted(e["id"] for e in r) for r in current_results] == \
+            [sorted(e["id"] for e in r) for r in indexed_results], "day results differ"
+
+
+if __name__ == "__main__":
+    main()
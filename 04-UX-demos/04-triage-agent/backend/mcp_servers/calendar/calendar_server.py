@@ -1,24 +1,18 @@
 from mcp.server import FastMCP
-from typing import List, Dict, Optional
+import sys
+from typing import List, Optional
 import json
 import os
 from datetime import datetime, timedelta
 import calendar as cal
 
+from calendar_store import CalendarStore
+
 # Simple calendar storage (in production, integrate with Google Calendar API)
 CALENDAR_FILE = "calendar_events.json"
 
-def load_events() -> List[Dict]:
-    """Load calendar events from file or return empty list."""
-    if os.path.exists(CALENDAR_FILE):
-        with open(CALENDAR_FILE, 'r') as f:
-            return json.load(f)
-    return []
-
-def save_events(events: List[Dict]) -> None:
-    """Save calendar events to file."""
-    with open(CALENDAR_FILE, 'w') as f:
-        json.dump(events, f, indent=2, default=str)
+# Indexed store kept hot across tool calls, mutations go to calendar_events.journal
+store = CalendarStore(CALENDAR_FILE)
 
 def get_next_weekday(weekday_name: str) -> str:
     """Get the next occurrence of a weekday as YYYY-MM-DD string."""
@@ -63,8 +57,6 @@ def weekday_to_date(weekday_name: str) -> str:
 @mcp.tool(description="Add a new calendar event")
 def add_event(title: str, date: str, time: str, duration_minutes: int = 60, description: str = "") -> str:
     """Add a new calendar event with title, date (YYYY-MM-DD or weekday name), time (HH:MM), and optional description."""
-    events = load_events()
-    
     try:
         # Try to convert weekday name to date if needed
         actual_date = date
@@ -80,18 +72,7 @@ def add_event(title: str, date: str, time: str, duration_minutes: int = 60, desc
         event_datetime = datetime.strptime(f"{actual_date} {time}", "%Y-%m-%d %H:%M")
         end_datetime = event_datetime + timedelta(minutes=duration_minutes)
         
-        event_id = len(events) + 1
-        new_event = {
-            "id": event_id,
-            "title": title,
-            "start_datetime": event_datetime.isoformat(),
-            "end_datetime": end_datetime.isoformat(),
-            "description": description,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        events.append(new_event)
-        save_events(events)
+        store.add_event(title, event_datetime, end_datetime, description)
         
         return f"📅 Event '{title}' scheduled for {event_datetime.strftime('%A, %B %d, %Y at %I:%M %p')} (Duration: {duration_minutes} minutes)"
         
@@ -101,27 +82,17 @@ def add_event(title: str, date: str, time: str, duration_minutes: int = 60, desc
 @mcp.tool(description="List upcoming calendar events")
 def list_events(days_ahead: int = 7) -> str:
     """List calendar events for the next N days (default: 7)."""
-    events = load_events()
-    
-    if not events:
+    if not len(store):
         return "📅 No events found."
     
-    # Filter events for the specified time period
+    # Events for the specified time period, already sorted by date
     now = datetime.now()
     end_date = now + timedelta(days=days_ahead)
-    
-    upcoming_events = []
-    for event in events:
-        event_date = datetime.fromisoformat(event["start_datetime"])
-        if now <= event_date <= end_date:
-            upcoming_events.append(event)
+    upcoming_events = store.events_starting_between(now, end_date, inclusive_end=True)
     
     if not upcoming_events:
         return f"📅 No events found for the next {days_ahead} days."
     
-    # Sort by date
-    upcoming_events.sort(key=lambda x: x["start_datetime"])
-    
     result = f"📅 Upcoming Events (Next {days_ahead} days):\n"
     for event in upcoming_events:
         start_time = datetime.fromisoformat(event["start_datetime"])
@@ -139,21 +110,13 @@ def list_events(days_ahead: int = 7) -> str:
 @mcp.tool(description="Check for scheduling conflicts")
 def check_conflicts(date: str, start_time: str, duration_minutes: int = 60) -> str:
     """Check if there are any scheduling conflicts for a proposed meeting time."""
-    events = load_events()
-    
     try:
         # Parse proposed time
         proposed_start = datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
         proposed_end = proposed_start + timedelta(minutes=duration_minutes)
         
-        conflicts = []
-        for event in events:
-            event_start = datetime.fromisoformat(event["start_datetime"])
-            event_end = datetime.fromisoformat(event["end_datetime"])
-            
-            # Check for overlap
-            if (proposed_start < event_end and proposed_end > event_start):
-                conflicts.append(event)
+        # Overlapping events from the interval index
+        conflicts = store.overlapping(proposed_start, proposed_end)
         
         if not conflicts:
             return f"✅ No conflicts found for {proposed_start.strftime('%B %d, %Y at %I:%M %p')} ({duration_minutes} minutes)"
@@ -172,20 +135,12 @@ def check_conflicts(date: str, start_time: str, duration_minutes: int = 60) -> s
 @mcp.tool(description="Find available time slots")
 def find_available_slots(date: str, duration_minutes: int = 60, start_hour: int = 9, end_hour: int = 17) -> str:
     """Find available time slots on a specific date within business hours."""
-    events = load_events()
-    
     try:
         target_date = datetime.strptime(date, "%Y-%m-%d").date()
         
-        # Get events for the target date
-        day_events = []
-        for event in events:
-            event_start = datetime.fromisoformat(event["start_datetime"])
-            if event_start.date() == target_date:
-                day_events.append(event)
-        
-        # Sort events by start time
-        day_events.sort(key=lambda x: x["start_datetime"])
+        # Get events for the target date, sorted by start time
+        day_start = datetime.combine(target_date, datetime.min.time())
+        day_events = store.events_starting_between(day_start, day_start + timedelta(days=1))
         
         # Generate time slots
         available_slots = []
@@ -227,16 +182,12 @@ def find_available_slots(date: str, duration_minutes: int = 60, start_hour: int
 @mcp.tool(description="Delete a calendar event")
 def delete_event(event_id: int) -> str:
     """Delete a calendar event by its ID."""
-    events = load_events()
-    
-    for i, event in enumerate(events):
-        if event["id"] == event_id:
-            deleted_event = events.pop(i)
-            save_events(events)
-            return f"🗑️ Event '{deleted_event['title']}' deleted successfully!"
+    deleted_event = store.delete_event(event_id)
+    if deleted_event:
+        return f"🗑️ Event '{deleted_event['title']}' deleted successfully!"
     
     return f"❌ Event with ID {event_id} not found."
 
 if __name__ == "__main__":
-    print("📅 Starting Calendar Integration MCP Server...")
+    print("📅 Starting Calendar Integration MCP Server...", file=sys.stderr)  # stdout carries the stdio protocol
     mcp.run(transport="stdio") 
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Indexed, write-ahead storage engine for the calendar MCP server.
+
+Events are kept in memory across tool calls:
+- events_by_id: id -> event dict
+- a list of (start, id) tuples sorted by start, used for range and overlap queries
+
+Mutations are appended to a JSON-lines journal next to the snapshot file and
+folded into the snapshot by periodic compaction. Event IDs come from a
+persisted, monotonic counter, so they are never reused after a delete.
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+class CalendarStore:
+    def __init__(self, snapshot_file: str, journal_file: Optional[str] = None, compact_every: int = 1000):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or os.path.splitext(snapshot_file)[0] + ".journal"
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._file_state = None
+        self._load()
+
+    # -- Loading -----------------------------------------------------------
+
+    def _stat(self) -> Tuple:
+        state = []
+        for path in (self.snapshot_file, self.journal_file):
+            try:
+                st = os.stat(path)
+                state.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def _reset(self):
+        self.events_by_id: Dict[int, Dict] = {}
+        self._by_start: List[Tuple[datetime, int]] = []
+        self._ends: Dict[int, datetime] = {}
+        self._max_duration = timedelta(0)
+        self.next_id = 1
+        self._journal_records = 0
+
+    def _load(self):
+        self._reset()
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r') as f:
+                data = json.load(f)
+            # Older snapshots are a bare list of events
+            events = data if isinstance(data, list) else data.get("events", [])
+            if isinstance(data, dict):
+                self.next_id = data.get("next_id", 1)
+            for event in events:
+                self._index(event, keep_sorted=False)
+            self._by_start.sort()
+        if os.path.exists(self.journal_file):
+            valid_bytes = 0
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            # A line without its newline is a torn write too
+                            record = json.loads(line) if line.endswith(b"\n") else None
+                        except json.JSONDecodeError:
+                            record = None
+                        if record is None:
+                            # A torn final write from a crash, everything before it is valid
+                            break
+                        self._apply(record)
+                        self._journal_records += 1
+                    valid_bytes += len(line)
+                torn = f.seek(0, os.SEEK_END) != valid_bytes
+            if torn:
+                # Cut the torn write off, or the next append would continue its line
+                # and be lost with it on the next load
+                os.truncate(self.journal_file, valid_bytes)
+        self._file_state = self._stat()
+
+    def _refresh_if_changed(self):
+        """Reload when the files were changed by someone else (e.g. edited by hand)"""
+        if self._stat() != self._file_state:
+            self._load()
+
+    # -- Index maintenance -------------------------------------------------
+
+    def _index(self, event: Dict, keep_sorted: bool = True):
+        event_id = event["id"]
+        start = datetime.fromisoformat(event["start_datetime"])
+        end = datetime.fromisoformat(event["end_datetime"])
+        self.events_by_id[event_id] = event
+        if keep_sorted:
+            insort(self._by_start, (start, event_id))
+        else:
+            self._by_start.append((start, event_id))
+        self._ends[event_id] = end
+        self._max_duration = max(self._max_duration, end - start)
+        self.next_id = max(self.next_id, event_id + 1)
+
+    def _unindex(self, event_id: int) -> Optional[Dict]:
+        event = self.events_by_id.pop(event_id, None)
+        if event is None:
+            return None
+        key = (datetime.fromisoformat(event["start_datetime"]), event_id)
+        index = bisect_left(self._by_start, key)
+        if index < len(self._by_start) and self._by_start[index] == key:
+            del self._by_start[index]
+        del self._ends[event_id]
+        return event
+
+    def _apply(self, record: Dict) -> Optional[Dict]:
+        if record["op"] == "add":
+            self._index(record["event"])
+            return record["event"]
+        if record["op"] == "delete":
+            return self._unindex(record["id"])
+        return None
+
+    # -- Persistence -------------------------------------------------------
+
+    def _append(self, record: Dict):
+        with open(self.journal_file, 'a') as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_records += 1
+        if self._journal_records >= self.compact_every:
+            self.compact()
+        else:
+            self._file_state = self._stat()
+
+    def compact(self):
+        """Fold the journal into a new snapshot and truncate the journal"""
+        with self._lock:
+            events = [self.events_by_id[event_id] for _, event_id in self._by_start]
+            tmp_file = self.snapshot_file + ".tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({"next_id": self.next_id, "events": events}, f, indent=2, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.snapshot_file)
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._journal_records = 0
+            # Durations only shrink on compaction, where the bound can be recomputed exactly
+            self._max_duration = max(
+                (self._ends[event_id] - start for start, event_id in self._by_start),
+                default=timedelta(0)
+            )
+            self._file_state = self._stat()
+
+    # -- Public API --------------------------------------------------------
+
+    def add_event(self, title: str, start: datetime, end: datetime, description: str = "") -> Dict:
+        with self._lock:
+            self._refresh_if_changed()
+            event = {
+                "id": self.next_id,
+                "title": title,
+                "start_datetime": start.isoformat(),
+                "end_datetime": end.isoformat(),
+                "description": description,
+                "created_at": datetime.now().isoformat()
+            }
+            self._index(event)
+            self._append({"op": "add", "event": event})
+            return event
+
+    def delete_event(self, event_id: int) -> Optional[Dict]:
+        with self._lock:
+            self._refresh_if_changed()
+            event = self._unindex(event_id)
+            if event is not None:
+                self._append({"op": "delete", "id": event_id})
+            return event
+
+    def events_starting_between(self, start: datetime, end: datetime, inclusive_end: bool = False) -> List[Dict]:
+        """Events whose start is in [start, end) (or [start, end]), sorted by start. O(log n + k)"""
+        with self._lock:
+            self._refresh_if_changed()
+            index = bisect_left(self._by_start, (start,))
+            result = []
+            while index < len(self._by_start):
+                event_start, event_id = self._by_start[index]
+                if event_start > end or (event_start == end and not inclusive_end):
+                    break
+                result.append(self.events_by_id[event_id])
+                index += 1
+            return result
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Dict]:
+        """Events overlapping [start, end), sorted by start.
+
+        Only events starting within the longest event duration before `start`
+        can overlap, so this is O(log n + k) where k is bounded by that window.
+        """
+        with self._lock:
+            self._refresh_if_changed()
+            index = bisect_left(self._by_start, (start - self._max_duration,))
+            result = []
+            while index < len(self._by_start):
+                event_start, event_id = self._by_start[index]
+                if event_start >= end:
+                    break
+                if self._ends[event_id] > start:
+                    result.append(self.events_by_id[event_id])
+                index += 1
+            return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.events_by_id)
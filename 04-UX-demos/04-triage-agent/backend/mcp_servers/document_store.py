@@ -0,0 +1,374 @@
+"""
+Incremental JSON-document store shared by the bundled MCP servers.
+
+Documents are cached in memory between tool calls, keyed by their id field and
+kept in insertion order. Mutations are appended as single JSON-lines records
+to a journal next to the snapshot file; only the new tail of the journal is
+read when another process appends to it, and the whole document is reloaded
+only when the snapshot itself changes (e.g. edited by hand). Compaction folds
+the journal into a new snapshot on a background thread.
+
+Optional token indexes map lowercase words of a text field to document ids so
+substring filters only verify the documents that can possibly match.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows, fall back to in-process locking only
+    fcntl = None
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+class DocumentStore:
+    def __init__(self, snapshot_file: str, id_field: str = "id", journal_file: Optional[str] = None,
+                 text_indexes: Iterable[str] = (), compact_every: int = 1000,
+                 background_compaction: bool = True):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or os.path.splitext(snapshot_file)[0] + ".journal"
+        self.lock_file = self.journal_file + ".lock"
+        self.id_field = id_field
+        self.text_indexes = tuple(text_indexes)
+        self.compact_every = compact_every
+        self.background_compaction = background_compaction
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._load()
+
+    # -- Loading -----------------------------------------------------------
+
+    @staticmethod
+    def _file_state(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _reset(self):
+        self.documents: Dict[Any, Dict] = {}
+        # Insertion sequence per id, used to return index hits in document order
+        self._sequence: Dict[Any, int] = {}
+        self._next_sequence = 0
+        self._tokens: Dict[str, Dict[str, Set[Any]]] = {field: {} for field in self.text_indexes}
+        self._next_id = 1
+        self._journal_records = 0
+        self._journal_offset = 0
+        self._journal_inode = None
+
+    def _load(self):
+        self._reset()
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r') as f:
+                data = json.load(f)
+            # Files written before the store existed are a bare list of documents
+            documents = data if isinstance(data, list) else data.get("documents", [])
+            if isinstance(data, dict):
+                self._next_id = data.get("next_id", 1)
+            for document in documents:
+                self._put(document)
+        self._snapshot_state = self._file_state(self.snapshot_file)
+        self._read_journal_tail()
+
+    def _read_journal_tail(self):
+        """Apply journal records appended since the last read"""
+        state = self._file_state(self.journal_file)
+        if state is None:
+            self._journal_inode = None
+            self._journal_offset = 0
+            return
+        if state[0] != self._journal_inode or state[2] < self._journal_offset:
+            # The journal was replaced by a compaction in another process, the
+            # snapshot changed with it and _refresh reloads everything
+            self._journal_inode = state[0]
+            self._journal_offset = 0
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A record still being written, read it next time, or one torn
+                    # by a crash, removed by the next append
+                    break
+                self._journal_offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A record torn by a crash, with later appends after it
+                    continue
+                self._apply(record)
+                self._journal_records += 1
+
+    def _refresh(self):
+        """Pick up changes made by other processes since the last call"""
+        if self._file_state(self.snapshot_file) != self._snapshot_state:
+            self._load()
+        else:
+            self._read_journal_tail()
+
+    # -- Index maintenance -------------------------------------------------
+
+    def _put(self, document: Dict):
+        document_id = document[self.id_field]
+        if document_id in self.documents:
+            self._unindex_text(document_id, self.documents[document_id])
+        else:
+            self._sequence[document_id] = self._next_sequence
+            self._next_sequence += 1
+        self.documents[document_id] = document
+        for field, postings in self._tokens.items():
+            for token in tokenize(str(document.get(field) or "")):
+                postings.setdefault(token, set()).add(document_id)
+        if isinstance(document_id, int):
+            self._next_id = max(self._next_id, document_id + 1)
+
+    def _unindex_text(self, document_id: Any, document: Dict):
+        for field, postings in self._tokens.items():
+            for token in tokenize(str(document.get(field) or "")):
+                ids = postings.get(token)
+                if ids is not None:
+                    ids.discard(document_id)
+                    if not ids:
+                        del postings[token]
+
+    def _delete(self, document_id: Any) -> Optional[Dict]:
+        document = self.documents.pop(document_id, None)
+        if document is not None:
+            self._unindex_text(document_id, document)
+            del self._sequence[document_id]
+        return document
+
+    def _apply(self, record: Dict):
+        if record["op"] == "put":
+            self._put(record["document"])
+        elif record["op"] == "delete":
+            self._delete(record["id"])
+        if "next_id" in record:
+            self._next_id = max(self._next_id, record["next_id"])
+
+    # -- Persistence -------------------------------------------------------
+
+    @contextmanager
+    def _exclusive(self):
+        """Serialize writers across threads and, where supported, processes"""
+        with self._lock:
+            if fcntl is None or self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, record: Dict):
+        # One write per record, so concurrent appenders never interleave
+        # partial lines and a crash leaves at most one torn final line
+        data = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        fd = os.open(self.journal_file, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            self._truncate_torn_record(fd)
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        state = self._file_state(self.journal_file)
+        self._journal_inode = state[0]
+        self._journal_offset = state[2]
+        self._journal_records += 1
+
+    @staticmethod
+    def _truncate_torn_record(fd: int):
+        """Cut a record torn by a crash off the end of the journal, so the next one starts on its own line.
+
+        Appends hold the exclusive lock and write whole lines, so an unterminated
+        last line seen under the lock is never a record still being written.
+        """
+        end = os.lseek(fd, 0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 4096)
+            os.lseek(fd, start, os.SEEK_SET)
+            chunk = os.read(fd, position - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            os.ftruncate(fd, position)
+
+    def _commit(self, record: Dict):
+        """Persist a record, then apply it to the in-memory documents"""
+        self._append(record)
+        self._apply(record)
+        if self._journal_records >= self.compact_every:
+            self._schedule_compaction()
+
+    def _schedule_compaction(self):
+        if not self.background_compaction:
+            self.compact()
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
+
+    def compact(self):
+        """Fold the journal into a new snapshot, without blocking readers while writing it"""
+        with self._exclusive():
+            self._refresh()
+            documents = list(self.documents.values())
+            next_id = self._next_id
+            snapshot_state = self._snapshot_state
+            journal_inode = self._journal_inode
+            journal_offset = self._journal_offset
+
+        # A file of its own, other instances and processes may be compacting too
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.snapshot_file)),
+                                        prefix=os.path.basename(self.snapshot_file) + ".", suffix=".tmp")
+        try:
+            # mkstemp creates the file readable by its owner only
+            os.chmod(tmp_file, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"next_id": next_id, "documents": documents}, f, indent=2, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with self._exclusive():
+                self._refresh()
+                # The inode of a removed journal can be reused by the next one, so
+                # the snapshot is compared too
+                if self._snapshot_state != snapshot_state or self._journal_inode != journal_inode:
+                    # Someone else compacted in the meantime
+                    return
+                # Records appended while the snapshot was being written start a new journal
+                tail = b""
+                if os.path.exists(self.journal_file):
+                    with open(self.journal_file, 'rb') as f:
+                        f.seek(journal_offset)
+                        tail = f.read(self._journal_offset - journal_offset)
+                # Journal records are idempotent, so a crash between these steps
+                # only replays records the new snapshot already contains
+                os.replace(tmp_file, self.snapshot_file)
+                if tail:
+                    with open(self.journal_file + ".tmp", 'wb') as f:
+                        f.write(tail)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(self.journal_file + ".tmp", self.journal_file)
+                elif os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+                state = self._file_state(self.journal_file)
+                self._journal_inode = state[0] if state else None
+                self._journal_offset = len(tail)
+                self._journal_records = tail.count(b"\n")
+                self._snapshot_state = self._file_state(self.snapshot_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # -- Public API --------------------------------------------------------
+
+    def all(self) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return list(self.documents.values())
+
+    def get(self, document_id: Any) -> Optional[Dict]:
+        with self._lock:
+            self._refresh()
+            return self.documents.get(document_id)
+
+    def search(self, field: str, text: str, limit: Optional[int] = None) -> List[Dict]:
+        """Documents whose `field` contains `text` (case-insensitive), in insertion order.
+
+        Every word of `text` lies inside a word of a matching document, so only
+        documents indexed under a token containing the longest word of `text`
+        are candidates; those are verified with the exact substring check.
+        """
+        needle = text.lower()
+        with self._lock:
+            self._refresh()
+            words = TOKEN_PATTERN.findall(needle)
+            if field in self._tokens and words:
+                longest = max(words, key=len)
+                candidates = set()
+                for token, ids in self._tokens[field].items():
+                    if longest in token:
+                        candidates |= ids
+                if len(candidates) * 4 > len(self.documents):
+                    # Broad match, scanning in order stops early once `limit` is reached
+                    documents = (doc for doc_id, doc in self.documents.items() if doc_id in candidates)
+                else:
+                    documents = (self.documents[doc_id]
+                                 for doc_id in sorted(candidates, key=self._sequence.__getitem__))
+            else:
+                documents = iter(self.documents.values())
+            result = []
+            for document in documents:
+                if needle in str(document.get(field) or "").lower():
+                    result.append(document)
+                    if limit is not None and len(result) >= limit:
+                        break
+            return result
+
+    def insert(self, document: Dict) -> Dict:
+        """Insert a document, assigning the next integer id when it has none"""
+        with self._exclusive():
+            self._refresh()
+            if self.id_field not in document:
+                document = {self.id_field: self._next_id, **document}
+            self._commit({"op": "put", "document": document})
+            return document
+
+    def update(self, document_id: Any, **changes) -> Optional[Dict]:
+        with self._exclusive():
+            self._refresh()
+            current = self.documents.get(document_id)
+            if current is None:
+                return None
+            document = {**current, **changes}
+            self._commit({"op": "put", "document": document})
+            return document
+
+    def delete(self, document_id: Any) -> Optional[Dict]:
+        with self._exclusive():
+            self._refresh()
+            document = self.documents.get(document_id)
+            if document is None:
+                return None
+            # Record the counter so ids stay unique after the highest one is deleted
+            self._commit({"op": "delete", "id": document_id, "next_id": self._next_id})
+            return document
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self.documents)
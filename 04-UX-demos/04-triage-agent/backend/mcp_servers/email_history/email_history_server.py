@@ -1,20 +1,21 @@
 from mcp.server import FastMCP
-import json
 import os
+import sys
 from typing import List, Dict
 
+# The shared document store lives in the parent mcp_servers directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from document_store import DocumentStore
+
 # Create a new MCP server
 mcp = FastMCP("Email History Server")
 
 # Path to the email history data file
 EMAIL_HISTORY_FILE = "email_history.json"
 
-def load_emails() -> List[Dict]:
-    """Load emails from file or return empty list."""
-    if os.path.exists(EMAIL_HISTORY_FILE):
-        with open(EMAIL_HISTORY_FILE, 'r') as f:
-            return json.load(f)
-    return []
+# Emails are cached in memory (reloaded when the file changes) with a token
+# index on the subject for subject_contains filters
+store = DocumentStore(EMAIL_HISTORY_FILE, text_indexes=["subject"])
 
 @mcp.tool(description="Get sent emails with optional filtering")
 def get_emails(
@@ -22,20 +23,17 @@ def get_emails(
     subject_contains: str = None
 ) -> List[Dict]:
     """Get sent emails with optional filtering."""
-    emails = load_emails()
-    
     if subject_contains:
-        emails = [e for e in emails if subject_contains.lower() in e['subject'].lower()]
+        return store.search("subject", subject_contains, limit=max(limit, 0))[:limit]
     
-    return emails[:limit]
+    return store.all()[:limit]
 
 @mcp.tool(description="Get a specific email by ID")
 def get_email_by_id(email_id: str) -> Dict:
     """Get a specific email by ID."""
-    emails = load_emails()
-    for email in emails:
-        if email['id'] == email_id:
-            return email
+    email = store.get(email_id)
+    if email is not None:
+        return email
     
     return {"error": f"Email with ID {email_id} not found"}
 
@@ -1,12 +1,21 @@
 """
 MCP Client Manager for Strands Agents
 Based on Strands official documentation examples
+
+Each stdio MCP server is started once and kept alive for the lifetime of the
+backend. Concurrent tool calls are multiplexed over the single session (the
+MCPClient dispatches every request onto its background event loop), and a
+supervisor thread checks the running servers with a tools/list call and
+restarts the ones that fail it (or failed to start) with exponential backoff.
 """
 
 import os
 import json
 import logging
-from contextlib import contextmanager, ExitStack
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Any
 from mcp import stdio_client, StdioServerParameters
 from strands.tools.mcp import MCPClient
@@ -14,9 +23,128 @@ from strands.tools.mcp import MCPClient
 logger = logging.getLogger(__name__)
 
 class MCPClientManager:
-    def __init__(self):
+    def __init__(self, restart_backoff_seconds: float = 1.0, max_restart_backoff_seconds: float = 60.0,
+                 supervisor_interval_seconds: float = 5.0):
         self.clients: Dict[str, MCPClient] = {}
         self.active_clients: List[str] = []
+        self.restart_backoff_seconds = restart_backoff_seconds
+        self.max_restart_backoff_seconds = max_restart_backoff_seconds
+        self.supervisor_interval_seconds = supervisor_interval_seconds
+        self._lock = threading.RLock()
+        self._client_locks: Dict[str, threading.Lock] = {}
+        self._started: set = set()
+        # Started clients whose session failed a call since, restarted by ensure_started
+        self._failed: set = set()
+        self._failures: Dict[str, int] = {}
+        self._next_start_attempt: Dict[str, float] = {}
+        self._supervisor: Optional[threading.Thread] = None
+        self._supervisor_stop = threading.Event()
+    
+    def _is_running(self, name: str) -> bool:
+        """Whether the client was started and no call has failed on its session since"""
+        return name in self._started and name not in self._failed
+    
+    def mark_failed(self, name: str, error: Exception):
+        """Record that a call on a started client failed, so it gets restarted"""
+        if name in self._started and name not in self._failed:
+            logger.warning(f"MCP server {name} failed a call: {error}")
+            self._failed.add(name)
+    
+    def _check_client(self, name: str):
+        """Probe a running client with a real request, marking it failed on error"""
+        client = self.clients.get(name)
+        if client is None or not self._is_running(name):
+            return
+        try:
+            client.list_tools_sync()
+        except Exception as e:
+            self.mark_failed(name, e)
+    
+    def _stop_client(self, name: str, client: MCPClient):
+        """Stop a client's server process, ignoring errors from an already crashed session"""
+        try:
+            client.stop(None, None, None)
+        except Exception as e:
+            logger.warning(f"MCP client {name} stopped with error: {e}")
+        self._started.discard(name)
+        self._failed.discard(name)
+    
+    def ensure_started(self, name: str) -> bool:
+        """Start (or restart after a crash) a client's server if needed.
+        
+        Failed starts are retried with exponential backoff, so callers never
+        block on a server that keeps crashing.
+        
+        Returns:
+            True if the client session is running
+        """
+        with self._lock:
+            client = self.clients.get(name)
+            client_lock = self._client_locks.setdefault(name, threading.Lock())
+        if client is None:
+            return False
+        
+        with client_lock:
+            if self._is_running(name):
+                return True
+            if time.monotonic() < self._next_start_attempt.get(name, 0.0):
+                return False
+            
+            if name in self._started:
+                logger.warning(f"MCP server {name} is not running, restarting")
+                self._stop_client(name, client)
+            
+            start = time.perf_counter()
+            try:
+                client.start()
+            except Exception as e:
+                failures = self._failures.get(name, 0) + 1
+                backoff = min(self.max_restart_backoff_seconds, self.restart_backoff_seconds * 2 ** (failures - 1))
+                self._failures[name] = failures
+                self._next_start_attempt[name] = time.monotonic() + backoff
+                logger.error(f"Failed to start MCP server {name} (attempt {failures}, retry in {backoff:.1f}s): {e}")
+                return False
+            
+            self._started.add(name)
+            self._failures.pop(name, None)
+            self._next_start_attempt.pop(name, None)
+            logger.info(f"Started MCP server {name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+            return True
+    
+    def start_active_clients(self) -> List[str]:
+        """Start all active clients in parallel and return the ones running"""
+        names = self.get_active_clients()
+        if not names:
+            return []
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            running = list(executor.map(self.ensure_started, names))
+        return [name for name, ok in zip(names, running) if ok]
+    
+    def _supervise(self):
+        while not self._supervisor_stop.wait(self.supervisor_interval_seconds):
+            for name in self.get_active_clients():
+                try:
+                    self._check_client(name)
+                    self.ensure_started(name)
+                except Exception as e:
+                    logger.error(f"MCP supervisor error for {name}: {e}")
+    
+    def start_supervisor(self):
+        """Start the background thread that checks servers and restarts crashed ones"""
+        with self._lock:
+            if self._supervisor is not None and self._supervisor.is_alive():
+                return
+            self._supervisor_stop.clear()
+            self._supervisor = threading.Thread(target=self._supervise, name="mcp-supervisor", daemon=True)
+            self._supervisor.start()
+    
+    def shutdown(self):
+        """Stop the supervisor and every running server"""
+        self._supervisor_stop.set()
+        with self._lock:
+            for name, client in list(self.clients.items()):
+                if name in self._started:
+                    self._stop_client(name, client)
         
     def add_client(self, name: str, client: MCPClient):
         """Add an MCP client"""
@@ -28,6 +156,8 @@ class MCPClientManager:
     def remove_client(self, name: str):
         """Remove an MCP client"""
         if name in self.clients:
+            if name in self._started:
+                self._stop_client(name, self.clients[name])
             del self.clients[name]
         if name in self.active_clients:
             self.active_clients.remove(name)
@@ -49,6 +179,8 @@ class MCPClientManager:
                 logger.info(f"Activated MCP client: {name}")
             elif not active and name in self.active_clients:
                 self.active_clients.remove(name)
+                if name in self._started:
+                    self._stop_client(name, self.clients[name])
                 logger.info(f"Deactivated MCP client: {name}")
         else:
             logger.warning(f"Client {name} not found")
@@ -60,9 +192,15 @@ class MCPClientManager:
             with open(config_path, 'r') as f:
                 config = json.load(f)
             
-            # Clear existing clients
-            self.clients.clear()
-            self.active_clients.clear()
+            # Stop and clear existing clients
+            with self._lock:
+                for name, client in list(self.clients.items()):
+                    if name in self._started:
+                        self._stop_client(name, client)
+                self.clients.clear()
+                self.active_clients.clear()
+                self._failures.clear()
+                self._next_start_attempt.clear()
             
             # Get servers config (support both 'servers' and 'mcpServers' keys)
             servers_config = config.get('mcpServers', config.get('servers', {}))
@@ -102,48 +240,45 @@ class MCPClientManager:
         except Exception as e:
             logger.error(f"Failed to initialize MCP clients: {e}")
     
+    def _list_client_tools(self, client_name: str) -> List[Any]:
+        if not self.ensure_started(client_name):
+            return []
+        try:
+            tools = self.clients[client_name].list_tools_sync()
+            if tools:
+                logger.info(f"Loaded {len(tools)} tools from {client_name}")
+            return list(tools or [])
+        except Exception as e:
+            logger.error(f"Error loading tools from {client_name}: {e}")
+            self.mark_failed(client_name, e)
+            return []
+    
     def get_all_tools(self, active_only: bool = True) -> List[Any]:
-        """Get all tools from active MCP clients"""
-        all_tools = []
-        
-        clients_to_use = self.active_clients if active_only else list(self.clients.keys())
+        """Get all tools from active MCP clients, listing every server in parallel"""
+        clients_to_use = self.get_active_clients() if active_only else list(self.clients.keys())
+        clients_to_use = [name for name in clients_to_use if name in self.clients]
+        if not clients_to_use:
+            return []
         
-        for client_name in clients_to_use:
-            if client_name not in self.clients:
-                continue
-                
-            client = self.clients[client_name]
-            
-            try:
-                # Use client in context to get tools (Strands way)
-                with client:
-                    tools = client.list_tools_sync()
-                    if tools:
-                        all_tools.extend(tools)
-                        logger.info(f"Loaded {len(tools)} tools from {client_name}")
-            except Exception as e:
-                logger.error(f"Error loading tools from {client_name}: {e}")
+        self.start_supervisor()
+        with ThreadPoolExecutor(max_workers=len(clients_to_use)) as executor:
+            results = executor.map(self._list_client_tools, clients_to_use)
         
+        all_tools = []
+        for tools in results:
+            all_tools.extend(tools)
         return all_tools
     
     @contextmanager
     def get_active_context(self):
-        """Get context manager for all active MCP clients"""
-        # Use ExitStack to manage multiple context managers
-        with ExitStack() as stack:
-            contexts = []
-            
-            for client_name in self.active_clients:
-                if client_name in self.clients:
-                    try:
-                        # Enter context for each client
-                        stack.enter_context(self.clients[client_name])
-                        contexts.append(client_name)
-                    except Exception as e:
-                        logger.error(f"Failed to enter context for {client_name}: {e}")
-            
-            logger.info(f"Entering context with active clients: {contexts}")
-            yield contexts
+        """Ensure all active MCP clients are running.
+        
+        Sessions are long-lived, so leaving the context does not stop the
+        servers; it only exists to keep the previous call sites working.
+        """
+        contexts = self.start_active_clients()
+        logger.info(f"Entering context with active clients: {contexts}")
+        yield contexts
 
 # Global instance
 mcp_manager = MCPClientManager() 
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""
+Session storage for the AI Triage Agent backend.
+
+Provides a bounded in-memory cache (LRU + idle TTL) for per-session objects
+and a pluggable persistent store so that evicted sessions can be rehydrated
+lazily and conversations survive a backend restart.
+"""
+
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any):
+    """Encode values json can't handle natively (e.g. image bytes in agent messages)"""
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj: Dict[str, Any]):
+    if len(obj) == 1 and "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+class SessionStore(ABC):
+    """Interface for persistent session storage, values must be JSON serializable"""
+
+    @abstractmethod
+    def load(self, namespace: str, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def save(self, namespace: str, key: str, value: Any):
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, namespace: str, prefix: str):
+        ...
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite backed session store for local deployments"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS session_data (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM session_data WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0], object_hook=_json_object_hook)
+
+    def save(self, namespace: str, key: str, value: Any):
+        payload = json.dumps(value, default=_json_default)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_data (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, payload, time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM session_data WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            )
+            self._conn.commit()
+
+    def delete_prefix(self, namespace: str, prefix: str):
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM session_data WHERE namespace = ? AND key LIKE ? ESCAPE '\\'",
+                (namespace, f"{escaped}%")
+            )
+            self._conn.commit()
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU cache with an idle TTL.
+
+    On a miss the optional loader is called to rehydrate the value (e.g. from a
+    SessionStore); it returns None when there is nothing to load. Membership
+    tests and iteration only cover entries currently held in memory, use get()
+    to check for a value that may still be loadable.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float,
+                 loader: Optional[Callable[[str], Optional[Any]]] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.loader = loader
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expire(self, now: float):
+        # Entries are ordered by last access, so expired ones are at the front
+        while self._entries:
+            key, (_, last_access) = next(iter(self._entries.items()))
+            if now - last_access < self.ttl_seconds:
+                break
+            del self._entries[key]
+            self.expirations += 1
+
+    def _put(self, key: str, value: Any, now: float):
+        self._entries[key] = (value, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._put(key, entry[0], now)
+                return entry[0]
+            self.misses += 1
+            if self.loader is None:
+                return default
+            value = self.loader(key)
+            if value is None:
+                return default
+            self.loads += 1
+            self._put(key, value, now)
+            return value
+
+    def peek(self, key: str) -> Any:
+        """Return the in-memory value without loading, counting or refreshing it"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._put(key, value, now)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._entries[key]
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._entries)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return list(self._entries.keys())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return iter([(key, value) for key, (value, _) in self._entries.items()])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring endpoints"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rehydrations": self.loads,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger("agent-web-service")
+
+
+class _Entry:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.agent = None
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class AgentCache:
+    """Agents kept per user between requests.
+
+    `build(user_id)` creates an agent, `refresh(agent, user_id)` is called when a cached agent is
+    reused (e.g. to reload a conversation changed elsewhere). At most `max_agents` agents are kept,
+    least recently used first out, and agents idle for `idle_seconds` are dropped. invalidate()
+    drops the cached agents, e.g. after a configuration change.
+    """
+
+    def __init__(self, build, refresh=None, max_agents=100, idle_seconds=900):
+        self.build = build
+        self.refresh = refresh
+        self.max_agents = max_agents
+        self.idle_seconds = idle_seconds
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        """Drop idle agents and the least recently used ones beyond max_agents (caller holds the lock)."""
+        now = time.monotonic()
+        idle = [
+            user_id for user_id, entry in self._entries.items()
+            if not entry.in_use and now - entry.last_used > self.idle_seconds
+        ]
+        for user_id in idle:
+            del self._entries[user_id]
+        over = len(self._entries) - self.max_agents
+        for user_id in [user_id for user_id, entry in self._entries.items() if not entry.in_use][:max(over, 0)]:
+            del self._entries[user_id]
+            idle.append(user_id)
+        self.counters["evictions"] += len(idle)
+
+    def acquire(self, user_id):
+        """Reserve the user's agent until release(), building it if needed.
+
+        Waits while another request of the same user holds it. Returns the reservation, whose
+        `agent` attribute is the agent. acquire() and release() may run in different threads.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = self._entries[user_id] = _Entry(user_id)
+            else:
+                self._entries.move_to_end(user_id)
+            entry.in_use += 1
+            self._evict()
+
+        entry.lock.acquire()
+        try:
+            hit = entry.agent is not None
+            with self._lock:
+                self.counters["hits" if hit else "misses"] += 1
+            if hit:
+                if self.refresh is not None:
+                    self.refresh(entry.agent, user_id)
+            else:
+                entry.agent = self.build(user_id)
+        except BaseException:
+            self.release(entry, failed=True)
+            raise
+        return entry
+
+    def release(self, entry, failed=False):
+        """End a reservation. A failed agent is dropped so that a half-finished conversation
+        turn is not reused; a request waiting for this user builds a new one instead."""
+        if failed:
+            entry.agent = None
+            with self._lock:
+                if self._entries.get(entry.user_id) is entry:
+                    del self._entries[entry.user_id]
+        entry.lock.release()
+        with self._lock:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+    @contextmanager
+    def agent(self, user_id):
+        """The user's agent, reserved for the caller until the block ends.
+
+        Requests of the same user are served one at a time. If the block raises, the agent is
+        dropped so that a half-finished conversation turn is not reused.
+        """
+        entry = self.acquire(user_id)
+        try:
+            yield entry.agent
+        except BaseException:
+            self.release(entry, failed=True)
+            raise
+        self.release(entry)
+
+    def invalidate(self, user_id=None):
+        """Drop the cached agent of one user, or of all users. Agents in use finish their request."""
+        with self._lock:
+            if user_id is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                dropped = 1 if self._entries.pop(user_id, None) is not None else 0
+            self.counters["invalidations"] += dropped
+        logger.debug(f"Dropped {dropped} cached agent(s)")
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,106 @@
+"""
+Write amplification of session storage as a conversation grows.
+
+Simulates a conversation of --turns turns (a prompt and a reply of about
+--message-bytes each) saved after every turn, in a temporary directory:
+
+- full rewrite: the whole message list written as one sessions/{user}.json
+  file every turn (how conversations used to be saved)
+- append-only: the turn appended as a segment with SessionStore, segments
+  compacted into chunks every --compact-segments turns
+
+and reports the bytes written per turn, the write amplification (bytes written
+so far / size of the conversation), and the time to read the last 40 messages.
+
+Usage (from the app directory):
+    python benchmark_session_storage.py --turns 1000 --message-bytes 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+
+from session_store import FileSessionBackend, SessionStore, message_bytes
+
+# DynamoDB items are limited to 400 KB
+DYNAMODB_ITEM_LIMIT = 400 * 1024
+
+
+def make_turn(i, size, rng):
+    text = "".join(rng.choices(string.ascii_letters + " ", k=size))
+    return [
+        {"role": "user", "content": [{"text": f"prompt {i}: {text}"}]},
+        {"role": "assistant", "content": [{"text": f"reply {i}: {text}"}]},
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-rewrite and append-only session storage")
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--message-bytes", type=int, default=2000)
+    parser.add_argument("--compact-segments", type=int, default=16)
+    parser.add_argument("--tail", type=int, default=40, help="messages read back by an agent")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    checkpoints = sorted({t for t in (10, 50, 100, 200, 500, 1000, 2000, 5000) if t <= args.turns} | {args.turns})
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, "legacy.json")
+        store = SessionStore(FileSessionBackend(os.path.join(directory, "sessions")),
+                             compact_segments=args.compact_segments)
+        messages = []
+        history_bytes = legacy_written = 0
+        legacy_turn = append_turn = 0
+        legacy_time = append_time = 0.0
+        item_limit_turn = None
+
+        print(f"{'turns':>6} {'history KB':>10} | {'full rewrite':>27} | {'append-only':>27}")
+        print(f"{'':>6} {'':>10} | {'KB/turn':>8} {'ampl.':>7} {'read ms':>10} "
+              f"| {'KB/turn':>8} {'ampl.':>7} {'read ms':>10}")
+        for turn in range(1, args.turns + 1):
+            new = make_turn(turn, args.message_bytes, rng)
+            messages += new
+            history_bytes += message_bytes(new)
+
+            start = time.perf_counter()
+            data = json.dumps({"messages": messages})
+            with open(legacy_path, "w") as f:
+                f.write(data)
+            legacy_time += time.perf_counter() - start
+            legacy_turn = len(data.encode())
+            legacy_written += legacy_turn
+            if item_limit_turn is None and legacy_turn > DYNAMODB_ITEM_LIMIT:
+                item_limit_turn = turn
+
+            written = store.backend.counters["bytes_written"]
+            start = time.perf_counter()
+            store.append("user", new)
+            append_time += time.perf_counter() - start
+            append_turn = store.backend.counters["bytes_written"] - written
+
+            if turn in checkpoints:
+                start = time.perf_counter()
+                with open(legacy_path) as f:
+                    json.load(f)["messages"][-args.tail:]
+                legacy_read = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                tail, _, _ = store.load("user", limit=args.tail)
+                append_read = (time.perf_counter() - start) * 1000
+                assert tail == messages[-args.tail:]
+                print(f"{turn:>6} {history_bytes / 1024:>10.0f} "
+                      f"| {legacy_turn / 1024:>8.1f} {legacy_written / history_bytes:>7.1f} {legacy_read:>10.2f} "
+                      f"| {append_turn / 1024:>8.1f} {store.backend.counters['bytes_written'] / history_bytes:>7.1f} "
+                      f"{append_read:>10.2f}")
+
+        print(f"\ntotal write time: full rewrite {legacy_time * 1000:.0f} ms, append-only {append_time * 1000:.0f} ms")
+        if item_limit_turn:
+            print(f"a single-item conversation exceeds the DynamoDB item limit (400 KB) at turn {item_limit_turn}")
+
+
+if __name__ == "__main__":
+    main()
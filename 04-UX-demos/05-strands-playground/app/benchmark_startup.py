@@ -0,0 +1,106 @@
+"""
+Startup benchmark for the playground backend.
+
+Each measurement runs in a fresh Python process (as a new container would):
+
+- startup: time and RSS to import main (the FastAPI app) with the lazy tool
+  registry, and with every tool imported up front as before
+- per tool: extra import time and RSS the first time a tool is resolved
+
+Usage (from the app directory):
+    python benchmark_startup.py
+    python benchmark_startup.py --tools calculator,http_request,use_aws --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Runs in the child process; prints one JSON line
+PROBE = r"""
+import json, resource, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS is in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+mode, tool = sys.argv[1], sys.argv[2]
+base_rss = rss_mb()
+start = time.perf_counter()
+import main
+startup_ms = (time.perf_counter() - start) * 1000
+startup_rss = rss_mb()
+failed = []
+start = time.perf_counter()
+names = main.available_tools.names() if mode == "eager" else [tool] if tool else []
+for name in names:
+    try:
+        main.available_tools.resolve(name)
+    except main.ToolUnavailableError:
+        failed.append(name)
+tools_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    "startup_ms": startup_ms,
+    "startup_rss_mb": startup_rss - base_rss,
+    "tools_ms": tools_ms,
+    "tools_rss_mb": rss_mb() - startup_rss,
+    "failed": failed,
+    "names": main.available_tools.names(),
+}))
+"""
+
+
+def probe(mode, tool=""):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, mode, tool],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median_probe(runs, mode, tool=""):
+    results = [probe(mode, tool) for _ in range(runs)]
+    summary = {key: statistics.median(r[key] for r in results) for key in results[0] if key.endswith(("_ms", "_mb"))}
+    summary["failed"] = results[0]["failed"]
+    summary["names"] = results[0]["names"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of the playground backend")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per measurement (median is reported)")
+    parser.add_argument("--tools", help="comma-separated tools to measure (default: all)")
+    args = parser.parse_args()
+
+    lazy = median_probe(args.runs, "lazy")
+    eager = median_probe(args.runs, "eager")
+    eager_total_ms = eager["startup_ms"] + eager["tools_ms"]
+    eager_total_rss = eager["startup_rss_mb"] + eager["tools_rss_mb"]
+    print(f"startup, lazy registry:    {lazy['startup_ms']:7.1f} ms  {lazy['startup_rss_mb']:6.1f} MB RSS")
+    print(f"startup, all tools loaded: {eager_total_ms:7.1f} ms  {eager_total_rss:6.1f} MB RSS")
+    if eager["failed"]:
+        print(f"  (could not import: {', '.join(eager['failed'])})")
+
+    names = args.tools.split(",") if args.tools else lazy["names"]
+
+    print(f"\n{'tool':<18} {'import ms':>10} {'RSS MB':>8}")
+    for name in names:
+        result = median_probe(args.runs, "lazy", name)
+        if result["failed"]:
+            print(f"{name:<18} {'unavailable':>10}")
+            continue
+        print(f"{name:<18} {result['tools_ms']:10.1f} {result['tools_rss_mb']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
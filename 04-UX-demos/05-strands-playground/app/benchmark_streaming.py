@@ -0,0 +1,186 @@
+"""
+Latency harness for the streaming endpoint, against a local stub model.
+
+Starts the app in-process (uvicorn on a free local port) with the Bedrock model
+replaced by a stub that waits --first-token-ms before its first token and
+--token-ms between tokens, then reports for /strandsplayground_agent (one JSON
+body) and /strandsplayground_agent/stream (server-sent events):
+
+- TTFT: time until the first text arrives at the client
+- total: time until the turn is complete
+
+It also checks that a client disconnecting mid-stream cancels the turn, and
+that a slow client receives merged text events instead of making the agent
+buffer without limit.
+
+Usage (from the app directory):
+    python benchmark_streaming.py --runs 5 --first-token-ms 300 --tokens 100 --token-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from strands.models.model import Model
+
+import main as playground
+from session_store import FileSessionBackend
+
+
+class StubModel(Model):
+    """Streams `tokens` words: the first after `first_token` seconds, then one every `token_delay`."""
+
+    def __init__(self, first_token, tokens, token_delay):
+        self.first_token = first_token
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.generated = 0
+        self.cancelled = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        try:
+            yield {"messageStart": {"role": "assistant"}}
+            yield {"contentBlockStart": {"start": {}}}
+            await asyncio.sleep(self.first_token)
+            for i in range(self.tokens):
+                if i:
+                    await asyncio.sleep(self.token_delay)
+                self.generated += 1
+                yield {"contentBlockDelta": {"delta": {"text": f"word{i} "}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            yield {"metadata": {"usage": {"inputTokens": 10, "outputTokens": self.tokens, "totalTokens": 10 + self.tokens},
+                                "metrics": {"latencyMs": 0}}}
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+
+
+def start_server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(playground.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def blocking_turn(client, base_url, user_id):
+    start = time.perf_counter()
+    response = client.post(f"{base_url}/strandsplayground_agent", json={"prompt": "hello", "userId": user_id})
+    response.raise_for_status()
+    total = time.perf_counter() - start
+    # The text only arrives with the complete body
+    return total, total
+
+
+def read_events(lines):
+    """Yield (event, data) from SSE lines."""
+    event = None
+    for line in lines:
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+
+def streaming_turn(client, base_url, user_id):
+    start = time.perf_counter()
+    first_token = None
+    with client.stream("POST", f"{base_url}/strandsplayground_agent/stream",
+                       json={"prompt": "hello", "userId": user_id}) as response:
+        response.raise_for_status()
+        for event, data in read_events(response.iter_lines()):
+            if event == "text" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif event == "error":
+                raise RuntimeError(data["detail"])
+            elif event == "done":
+                break
+    return first_token, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure TTFT of the blocking and streaming agent endpoints")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-ms", type=float, default=20)
+    args = parser.parse_args()
+    for name in ("strands", "agent-web-service"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    stub = StubModel(args.first_token_ms / 1000, args.tokens, args.token_ms / 1000)
+    playground.BEDROCK_MODEL = stub
+    with tempfile.TemporaryDirectory() as directory:
+        playground.session_store.backend = FileSessionBackend(directory)
+        server, base_url = start_server()
+        with httpx.Client(timeout=60) as client:
+            results = {}
+            for label, turn in (("blocking", blocking_turn), ("streaming", streaming_turn)):
+                turn(client, base_url, f"warmup-{label}")
+                runs = [turn(client, base_url, f"{label}-{i}") for i in range(args.runs)]
+                results[label] = runs
+                print(f"{label:<10} TTFT {statistics.median(r[0] for r in runs) * 1000:7.1f} ms   "
+                      f"total {statistics.median(r[1] for r in runs) * 1000:7.1f} ms   (median of {args.runs})")
+            assert statistics.median(r[0] for r in results["streaming"]) < statistics.median(
+                r[0] for r in results["blocking"])
+
+            # Disconnect after the first text event: the turn is cancelled and the agent dropped
+            generated, cancelled = stub.generated, stub.cancelled
+            with client.stream("POST", f"{base_url}/strandsplayground_agent/stream",
+                               json={"prompt": "hello", "userId": "disconnect"}) as response:
+                for event, _ in read_events(response.iter_lines()):
+                    if event == "text":
+                        break
+            time.sleep(args.first_token_ms / 1000 + args.tokens * args.token_ms / 1000)
+            produced = stub.generated - generated
+            print(f"disconnect after first token: {produced} of {args.tokens} tokens generated, "
+                  f"turn cancelled: {stub.cancelled > cancelled}")
+            assert stub.cancelled > cancelled and produced < args.tokens
+            streaming_turn(client, base_url, "disconnect")
+        server.should_exit = True
+
+        # A slow client: text deltas wait in a bounded queue and are sent merged
+        class ConnectedRequest:
+            async def is_disconnected(self):
+                return False
+
+        async def slow_client():
+            events, text = 0, ""
+            request = playground.PromptRequest(prompt="hello", userId="slow")
+            async for chunk in playground.agent_turn_events(request, ConnectedRequest()):
+                for event, data in read_events(chunk.splitlines()):
+                    if event == "text":
+                        events += 1
+                        text += data["delta"]
+                await asyncio.sleep(args.token_ms * 5 / 1000)
+            return events, text
+
+        events, text = asyncio.run(slow_client())
+        assert text == "".join(f"word{i} " for i in range(args.tokens))
+        print(f"slow client: {args.tokens} tokens received in {events} text events")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
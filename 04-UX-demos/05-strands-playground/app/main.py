@@ -1,21 +1,21 @@
+import asyncio
 import json
 import os
 import logging 
 import boto3
-from botocore.exceptions import ClientError
 from typing import Optional
 
 from strands import Agent, tool
+from strands.hooks import MessageAddedEvent
 from strands.models import BedrockModel
-from strands_tools import (
-    agent_graph, calculator, cron, current_time, editor, environment, 
-    file_read, file_write, generate_image, http_request, image_reader, journal, 
-    load_tool, mem0_memory, memory, nova_reels, python_repl, retrieve, shell, 
-    slack, speak, stop, swarm, think, use_aws, use_llm, workflow
-)
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from agent_cache import AgentCache
+from session_store import DynamoDBSessionBackend, FileSessionBackend, SessionStore, trim_to_turn_start
+from tool_registry import ToolRegistry, ToolUnavailableError
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
@@ -48,37 +48,19 @@ def weather_forecast(city: str, days: int = 3) -> str:
     """
     return f"Weather forecast for {city} for the next {days} days..."
 
-# Define all available tools
-available_tools = {
-    'agent_graph': agent_graph,
-    'calculator': calculator,
-    'cron': cron,
-    'current_time': current_time,
-    'editor': editor,
-    'environment': environment,
-    'file_read': file_read,
-    'file_write': file_write,
-    'generate_image': generate_image,
-    'http_request': http_request,
-    'image_reader': image_reader,
-    'journal': journal,
-    'load_tool': load_tool,
-    'mem0_memory': mem0_memory,
-    'memory': memory,
-    'nova_reels': nova_reels,
-    'python_repl': python_repl,
-    'retrieve': retrieve,
-    'shell': shell,
-    'slack': slack,
-    'speak': speak,
-    'stop': stop,
-    'swarm': swarm,
-    'think': think,
-    'use_aws': use_aws,
-    'use_llm': use_llm,
-    'workflow': workflow,
-    'weather_forecast': weather_forecast,
-}
+# Define all available tools: strands_tools modules are only imported when a tool is first used
+available_tools = ToolRegistry(
+    modules={
+        name: f"strands_tools.{name}"
+        for name in (
+            'agent_graph', 'calculator', 'cron', 'current_time', 'editor', 'environment',
+            'file_read', 'file_write', 'generate_image', 'http_request', 'image_reader', 'journal',
+            'load_tool', 'mem0_memory', 'memory', 'nova_reels', 'python_repl', 'retrieve', 'shell',
+            'slack', 'speak', 'stop', 'swarm', 'think', 'use_aws', 'use_llm', 'workflow',
+        )
+    },
+    inline={'weather_forecast': weather_forecast},
+)
 
 # Tool descriptions for better user understanding
 tool_descriptions = {
@@ -112,8 +94,41 @@ tool_descriptions = {
     'weather_forecast': 'Return a dummy weather for the input city and day, used to showcase inline python tool for Strands'
 }
 
-# Define default selected tools
-tools = [calculator, http_request, use_aws]  # Default tools
+# Define default selected tools (by name, resolved through the registry)
+tools = ['calculator', 'http_request', 'use_aws']  # Default tools
+
+# Optionally import some tools in the background at startup, e.g. PRELOAD_TOOLS=calculator,http_request,use_aws
+preload_tools = [name for name in os.environ.get('PRELOAD_TOOLS', '').split(',') if name]
+if preload_tools:
+    available_tools.preload(preload_tools)
+
+# Session storage: local files, or DynamoDB when TABLE_NAME and TABLE_REGION are set.
+# Each turn is appended to the stored conversation; every save gets a new revision so that a
+# cached agent can tell when its conversation was changed elsewhere (e.g. by another instance).
+if not table_name and not table_region:
+    logger.debug("TABLE_NAME environment variable not set, fallback to local file session management")
+    session_backend = FileSessionBackend("sessions")
+else:
+    logger.debug(f"Using dynamodb table {str(table_name)} in {str(table_region)} region for session management")
+    session_backend = DynamoDBSessionBackend(
+        boto3.resource('dynamodb', region_name=table_region).Table(table_name),
+        primary_key,
+    )
+session_store = SessionStore(
+    session_backend,
+    compact_segments=int(os.environ.get('SESSION_COMPACT_SEGMENTS', '16')),
+)
+
+# Number of most recent messages an agent is given from the stored conversation
+HISTORY_MESSAGES = int(os.environ.get('SESSION_HISTORY_MESSAGES', '40'))
+
+def load_session(user_id, limit=HISTORY_MESSAGES, before=None):
+    """Return up to `limit` stored messages of a user, their revision and the index of the first one."""
+    try:
+        return session_store.load(user_id, limit=limit, before=before)
+    except Exception as e:
+        logger.error(f"Failed to restore session: {str(e)} returning empty conversation history")
+        return [], None, 0
 
 # Define classes
 class StrandsPlaygroundAgent(Agent):
@@ -123,79 +138,39 @@ class StrandsPlaygroundAgent(Agent):
                  user_id):
 
         # load previous messages if any
-        messages = self.restore_agent_state(user_id)
+        messages, self.session_revision, _ = load_session(user_id)
         super().__init__(system_prompt=system_prompt, 
                          model=model,
-                         tools=tools,  # Use the global tools list
+                         tools=available_tools.resolve_many(tools),  # Use the global tools list
                          callback_handler=None,
-                         messages=messages,
+                         messages=trim_to_turn_start(messages),
                          load_tools_from_directory=False
                     )
+        # Messages added since the conversation was last saved (the conversation manager may
+        # drop older messages from self.messages, so new ones are collected as they are added)
+        self.unsaved_messages = []
+        self.hooks.add_callback(MessageAddedEvent, lambda event: self.unsaved_messages.append(event.message))
         logger.debug(f"tools available: {self.tool_names}")
-    # Restore agent state
+    # Restore agent state, if the stored conversation changed since this agent loaded or saved it
     def restore_agent_state(self, user_id):
-        if not table_name and not table_region:
-            logger.debug("TABLE_NAME environment variable not set, fallback to local file session.. loading conversation history from file")
-            # Retrieve state
-            try:
-                with open(f"sessions/{user_id}.json", "r") as f:
-                    state = json.load(f)
-                    return state["messages"]
-            except FileNotFoundError:
-                    logger.error("Local session file for user not found, returning empty conversation history")
-                    return []
-        else: 
-            try: 
-                logger.debug(f"Loading session from dynamodb table: {str(table_name)} in {str(table_region)} region")
-                dynamodb = boto3.resource('dynamodb', region_name=table_region)
-                table = dynamodb.Table(table_name)
-                response = table.get_item(
-                Key={
-                        primary_key: user_id,
-                    }
-                )
-                if "Item" in response:
-                    messages = response['Item']['messages'] 
-                    logger.debug("messages returned from Dynamo")
-                    logger.debug(messages)
-                else: 
-                    logger.debug("No messages found in DynamoDB")
-                    messages = []
-                return messages
-            except Exception as e:
-                logger.error(f"Failed to restore session from DynamoDB: {str(e)} returning empty conversation history")
-                return []
-
-    # Save agent state
+        revision = session_store.revision(user_id)
+        if revision != self.session_revision:
+            logger.debug(f"Conversation of user {user_id} changed elsewhere, reloading it")
+            messages, self.session_revision, _ = load_session(user_id)
+            self.messages = trim_to_turn_start(messages)
+            self.unsaved_messages = []
+
+    # Save agent state: append the messages of the last turn to the stored conversation
     def save_agent_state(self, user_id):
-        if not table_name and not table_region:
-            try:
-                logger.debug("TABLE_NAME and TABLE_REGION environment variable not set, fallback to local file session management, saving conversation to file")
-                os.makedirs("sessions", exist_ok=True)
-                state = {
-                    "messages": self.messages
-                }
-                # Store state (e.g., database, file system, cache)
-                with open(f"sessions/{user_id}.json", "w") as f:
-                    json.dump(state, f)
-            except Exception as e:
-                logger.error(f"Failed to save session to local file: {str(e)}")
-        else:
-            try:
-                logger.debug(f"Saving conversation to dynamodb table {table_name} in {table_region} region")
-                dynamodb = boto3.resource('dynamodb', region_name=table_region)
-                table = dynamodb.Table(table_name)
-                state = {
-                    "messages": self.messages
-                }
-                table.put_item(
-                    Item={
-                        primary_key: user_id,
-                        'messages': state['messages']
-                    }
-                )
-            except ClientError as e:
-                logger.error(f"Failed to save session to dynamodb table {table_name} in {table_region} region")
+        if not self.unsaved_messages:
+            return
+        try:
+            self.session_revision = session_store.append(user_id, self.unsaved_messages)
+        except Exception as e:
+            logger.error(f"Failed to save session: {str(e)}")
+            # Reload the stored conversation before the next turn
+            self.session_revision = None
+        self.unsaved_messages = []
 
 class PromptRequest(BaseModel):
     prompt: str
@@ -234,20 +209,33 @@ BEDROCK_MODEL = BedrockModel(
     top_p=TOP_P,
 )
 
+# Agents are reused across requests of the same user and rebuilt after a configuration change
+def create_agent(user_id):
+    return StrandsPlaygroundAgent(
+        model=BEDROCK_MODEL,
+        system_prompt=SYSTEM_PROMPT,
+        user_id=user_id
+    )
+
+agent_cache = AgentCache(
+    build=create_agent,
+    refresh=lambda agent, user_id: agent.restore_agent_state(user_id),
+    max_agents=int(os.environ.get('AGENT_CACHE_SIZE', '100')),
+    idle_seconds=float(os.environ.get('AGENT_CACHE_IDLE_SECONDS', '900')),
+)
+
 # FastAPI app setup
 app = FastAPI()
 
 
 # API endpoints
 @app.get("/get_conversations")
-def get_conversations(userId: str):
+def get_conversations(userId: str, limit: int = 100, before: Optional[int] = None):
     try:
-        agent = StrandsPlaygroundAgent(
-            model=BEDROCK_MODEL,
-            system_prompt=SYSTEM_PROMPT,
-            user_id=userId
-        )
-        return {"messages": agent.messages}
+        # Read-only: the stored messages are returned without creating an agent.
+        # Pages go back in time: pass the returned "start" as "before" to get older messages.
+        messages, _, start = session_store.load(userId, limit=limit, before=before)
+        return {"messages": messages, "start": start}
     except Exception as e:
         logger.error(f"Error getting conversations: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting conversations: {str(e)}")
@@ -255,25 +243,112 @@ def get_conversations(userId: str):
 @app.post("/strandsplayground_agent")
 def get_agent_response(request: PromptRequest):
     try:
-        agent = StrandsPlaygroundAgent(
-            model=BEDROCK_MODEL,
-            system_prompt=SYSTEM_PROMPT,
-            user_id=request.userId
-        )
-        result = agent(request.prompt)
-        logger.debug(f"Model response: {result.message}")
-        agent.save_agent_state(request.userId)
+        with agent_cache.agent(request.userId) as agent:
+            result = agent(request.prompt)
+            logger.debug(f"Model response: {result.message}")
+            agent.save_agent_state(request.userId)
         logger.info(f"Agent state saved for user: {request.userId}")
-        return {
-            "messages": result.message, 
-            "latencyMs": result.metrics.accumulated_metrics["latencyMs"],
-            "totalTokens": result.metrics.accumulated_usage["totalTokens"],
-            "summary": result.metrics.get_summary()
-        }
+        return agent_response_body(result)
     except Exception as e:
         logger.error(f"Error processing agent response: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing agent response: {str(e)}")
 
+def agent_response_body(result):
+    return {
+        "messages": result.message, 
+        "latencyMs": result.metrics.accumulated_metrics["latencyMs"],
+        "totalTokens": result.metrics.accumulated_usage["totalTokens"],
+        "summary": result.metrics.get_summary()
+    }
+
+# Streaming: the agent turn as server-sent events
+#   text         {"delta": "..."}                   model output (consecutive deltas may be merged)
+#   tool_use     {"toolUseId": "...", "name": "..."} the model started calling a tool
+#   tool_result  {"toolUseId": "...", "status": "..."}
+#   done         same body as /strandsplayground_agent
+#   error        {"detail": "..."}
+# At most STREAM_QUEUE_SIZE events wait for a slow client; beyond that the agent waits too.
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', '64'))
+# Seconds without events after which the client connection is checked and a keep-alive comment sent
+STREAM_IDLE_SECONDS = float(os.environ.get('STREAM_IDLE_SECONDS', '5'))
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def run_agent_turn(agent, user_id, prompt, queue):
+    """Run one agent turn and put its events on `queue`, ending with a done or error event."""
+    try:
+        tool_use_ids = set()
+        result = None
+        async for event in agent.stream_async(prompt):
+            if "data" in event:
+                await queue.put(("text", {"delta": event["data"]}))
+            elif "current_tool_use" in event:
+                tool_use = event["current_tool_use"]
+                if tool_use.get("toolUseId") and tool_use["toolUseId"] not in tool_use_ids:
+                    tool_use_ids.add(tool_use["toolUseId"])
+                    await queue.put(("tool_use", {"toolUseId": tool_use["toolUseId"], "name": tool_use.get("name")}))
+            elif "message" in event:
+                for block in event["message"].get("content", []):
+                    if "toolResult" in block:
+                        await queue.put(("tool_result", {
+                            "toolUseId": block["toolResult"].get("toolUseId"),
+                            "status": block["toolResult"].get("status"),
+                        }))
+            elif "result" in event:
+                result = event["result"]
+        logger.debug(f"Model response: {result.message}")
+        await run_in_threadpool(agent.save_agent_state, user_id)
+        logger.info(f"Agent state saved for user: {user_id}")
+        await queue.put(("done", agent_response_body(result)))
+    except Exception as e:
+        logger.error(f"Error processing agent response: {str(e)}")
+        await queue.put(("error", {"detail": f"Error processing agent response: {str(e)}"}))
+
+async def agent_turn_events(request: PromptRequest, raw_request: Request):
+    # Waiting for the user's agent (or building it) happens in a worker thread
+    reservation = await run_in_threadpool(agent_cache.acquire, request.userId)
+    queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    turn = asyncio.create_task(run_agent_turn(reservation.agent, request.userId, request.prompt, queue))
+    event = None
+    try:
+        pending = None
+        while True:
+            if pending is None:
+                try:
+                    pending = await asyncio.wait_for(queue.get(), timeout=STREAM_IDLE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await raw_request.is_disconnected():
+                        logger.info(f"Client of user {request.userId} disconnected, cancelling the agent turn")
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+            event, data = pending
+            pending = None
+            # Merge the text deltas that are already waiting (a slow client gets fewer, larger events)
+            while event == "text" and not queue.empty():
+                pending = queue.get_nowait()
+                if pending[0] != "text":
+                    break
+                data = {"delta": data["delta"] + pending[1]["delta"]}
+                pending = None
+            yield sse_event(event, data)
+            if event in ("done", "error"):
+                return
+    finally:
+        # Also reached when the client disconnects: the unfinished turn is cancelled and its agent dropped
+        if not turn.done():
+            turn.cancel()
+        agent_cache.release(reservation, failed=event != "done")
+
+@app.post("/strandsplayground_agent/stream")
+async def stream_agent_response(request: PromptRequest, raw_request: Request):
+    return StreamingResponse(
+        agent_turn_events(request, raw_request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # System prompt endpoints
 @app.get("/system_prompt")
 def get_system_prompt():
@@ -283,6 +358,7 @@ def get_system_prompt():
 def set_system_prompt(request: SystemPromptRequest):
     global SYSTEM_PROMPT
     SYSTEM_PROMPT = request.systemPrompt
+    agent_cache.invalidate()
     return {"systemPrompt": SYSTEM_PROMPT}
 
 # Model settings endpoints
@@ -334,6 +410,7 @@ def set_model_settings(request: ModelSettingsRequest):
     TEMPERATURE = request.temperature
     TOP_P = request.topP
     MODEL_ID = request.modelId
+    agent_cache.invalidate()
 
     return {
         "modelId": request.modelId,
@@ -348,8 +425,8 @@ def set_model_settings(request: ModelSettingsRequest):
 def get_available_tools():
     global tools, available_tools, tool_descriptions
     return {
-        "available_tools": list(available_tools.keys()),
-        "selected_tools": [tool.__name__.split('.')[-1] for tool in tools],
+        "available_tools": available_tools.names(),
+        "selected_tools": tools,
         "tool_descriptions": tool_descriptions
     }
 
@@ -363,11 +440,20 @@ def update_tools(request: ToolsUpdateRequest):
             if tool_name not in available_tools:
                 raise HTTPException(status_code=400, detail=f"Unknown tool: {tool_name}")
         
+        # Import newly selected tools now so that a missing dependency is reported here
+        try:
+            available_tools.resolve_many(request.tools)
+        except ToolUnavailableError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         # Update the tools list
-        tools = [available_tools[tool_name] for tool_name in request.tools]
+        tools = list(request.tools)
+        agent_cache.invalidate()
         
-        logger.info(f"Updated tools list: {[tool.__name__ for tool in tools]}")
-        return {"success": True, "selected_tools": [tool.__name__ for tool in tools]}
+        logger.info(f"Updated tools list: {tools}")
+        return {"success": True, "selected_tools": tools}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating tools: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error updating tools: {str(e)}")
@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from decimal import Decimal
+
+logger = logging.getLogger("agent-web-service")
+
+# A conversation is stored as a log: one segment per turn (the messages added during the turn),
+# and chunks holding the segments of earlier turns once they are compacted. A small head lists
+# the chunks and segments in order, with the number of messages in each:
+#   {"chunks": [[item_id, count], ...], "segments": [[item_id, count], ...], "revision": str}
+# Saving a turn writes its segment and updates the head, instead of rewriting the whole history.
+
+
+def new_item_id():
+    # Unique among the items of one conversation, and short to keep the head small
+    return uuid.uuid4().hex[:12]
+
+
+def message_bytes(messages):
+    return len(json.dumps(messages, default=str).encode())
+
+
+def trim_to_turn_start(messages):
+    """Drop leading messages until the history starts with a user prompt (not a tool result)."""
+    for i, message in enumerate(messages):
+        if message.get("role") == "user" and not any("toolResult" in block for block in message.get("content", [])):
+            return messages[i:]
+    return []
+
+
+class FileSessionBackend:
+    """Conversations as files: sessions/{user_id}/head.json and one file per chunk or segment.
+
+    Conversations saved as a single sessions/{user_id}.json file are read as legacy sessions.
+    """
+
+    def __init__(self, directory="sessions"):
+        self.directory = directory
+        self.counters = {"reads": 0, "writes": 0, "bytes_written": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, user_id, name):
+        return os.path.join(self.directory, user_id, f"{name}.json")
+
+    def _legacy_path(self, user_id):
+        return os.path.join(self.directory, f"{user_id}.json")
+
+    def _read(self, path):
+        self.counters["reads"] += 1
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _write(self, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value)
+        # Write then rename, so that readers never see a partial file
+        with open(f"{path}.tmp", "w") as f:
+            f.write(data)
+        os.replace(f"{path}.tmp", path)
+        self.counters["writes"] += 1
+        self.counters["bytes_written"] += len(data.encode())
+
+    def head(self, user_id):
+        try:
+            return self._read(self._path(user_id, "head"))
+        except FileNotFoundError:
+            pass
+        try:
+            state = self._read(self._legacy_path(user_id))
+        except FileNotFoundError:
+            return None
+        return {"chunks": [], "segments": [], "revision": None, "legacy": state["messages"]}
+
+    def revision(self, user_id):
+        head = self.head(user_id)
+        return head["revision"] if head else None
+
+    def get_items(self, user_id, item_ids):
+        return {item_id: self._read(self._path(user_id, item_id)) for item_id in item_ids}
+
+    def put_item(self, user_id, item_id, messages):
+        self._write(self._path(user_id, item_id), messages)
+
+    def delete_items(self, user_id, item_ids):
+        for item_id in item_ids:
+            try:
+                os.remove(self._path(user_id, item_id))
+            except FileNotFoundError:
+                pass
+
+    def append_segment(self, user_id, item_id, count):
+        """Add a segment to the head and return the new head, or None for a legacy session."""
+        with self._lock:
+            head = self.head(user_id) or {"chunks": [], "segments": [], "revision": None}
+            if "legacy" in head:
+                return None
+            head["segments"].append([item_id, count])
+            head["revision"] = uuid.uuid4().hex
+            self._write(self._path(user_id, "head"), head)
+            return head
+
+    def replace_head(self, user_id, head, expected_revision):
+        """Write a new head if the stored one still has `expected_revision`; True if written."""
+        with self._lock:
+            current = self.head(user_id)
+            if (current["revision"] if current else None) != expected_revision:
+                return False
+            self._write(self._path(user_id, "head"), head)
+            if current and "legacy" in current:
+                os.remove(self._legacy_path(user_id))
+            return True
+
+
+def _to_dynamodb(value):
+    # DynamoDB numbers are Decimals
+    return json.loads(json.dumps(value, default=str), parse_float=Decimal)
+
+
+def _from_dynamodb(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, list):
+        return [_from_dynamodb(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _from_dynamodb(v) for k, v in value.items()}
+    return value
+
+
+class DynamoDBSessionBackend:
+    """Conversations in a DynamoDB table keyed by `primary_key` only.
+
+    The head is the item keyed by the user id; chunks and segments are items keyed by
+    "{user_id}#{item_id}". "%" and "#" in user ids are escaped, so a head key never contains
+    "#" and cannot be another user's item key. Items with a `messages` attribute are read as
+    legacy sessions.
+    """
+
+    def __init__(self, table, primary_key):
+        self.table = table
+        self.primary_key = primary_key
+        self.counters = {"reads": 0, "writes": 0, "bytes_written": 0}
+
+    @staticmethod
+    def _escape(user_id):
+        return user_id.replace("%", "%25").replace("#", "%23")
+
+    def _key(self, user_id, item_id=None):
+        user_key = self._escape(user_id)
+        return {self.primary_key: user_key if item_id is None else f"{user_key}#{item_id}"}
+
+    def _head(self, item):
+        item = _from_dynamodb(item)
+        if "messages" in item and "segments" not in item:
+            return {"chunks": [], "segments": [], "revision": item.get("revision"), "legacy": item["messages"]}
+        return {
+            "chunks": item.get("chunks", []),
+            "segments": item.get("segments", []),
+            "revision": item.get("revision"),
+        }
+
+    def head(self, user_id):
+        self.counters["reads"] += 1
+        item = self.table.get_item(Key=self._key(user_id), ConsistentRead=True).get("Item")
+        return self._head(item) if item else None
+
+    def revision(self, user_id):
+        self.counters["reads"] += 1
+        item = self.table.get_item(
+            Key=self._key(user_id),
+            ProjectionExpression="#revision",
+            ExpressionAttributeNames={"#revision": "revision"},
+        ).get("Item")
+        return item.get("revision") if item else None
+
+    def get_items(self, user_id, item_ids):
+        items = {}
+        keys = [self._key(user_id, item_id) for item_id in item_ids]
+        prefix = self._escape(user_id) + "#"
+        # BatchGetItem takes at most 100 keys and may return some of them unprocessed
+        while keys:
+            request = {self.table.name: {"Keys": keys[:100], "ConsistentRead": True}}
+            keys = keys[100:]
+            while request:
+                response = self.table.meta.client.batch_get_item(RequestItems=request)
+                self.counters["reads"] += 1
+                for item in response["Responses"].get(self.table.name, []):
+                    item_id = item[self.primary_key][len(prefix):]
+                    items[item_id] = _from_dynamodb(item["messages"])
+                request = response.get("UnprocessedKeys")
+        missing = set(item_ids) - set(items)
+        if missing:
+            raise KeyError(f"Missing session items: {sorted(missing)}")
+        return items
+
+    def put_item(self, user_id, item_id, messages):
+        item = dict(self._key(user_id, item_id), messages=_to_dynamodb(messages))
+        self.table.put_item(Item=item)
+        self.counters["writes"] += 1
+        self.counters["bytes_written"] += message_bytes(messages)
+
+    def delete_items(self, user_id, item_ids):
+        with self.table.batch_writer() as batch:
+            for item_id in item_ids:
+                batch.delete_item(Key=self._key(user_id, item_id))
+
+    def append_segment(self, user_id, item_id, count):
+        """Add a segment to the head and return the new head, or None for a legacy session."""
+        revision = uuid.uuid4().hex
+        try:
+            response = self.table.update_item(
+                Key=self._key(user_id),
+                UpdateExpression=(
+                    "SET #segments = list_append(if_not_exists(#segments, :empty), :segment), "
+                    "#chunks = if_not_exists(#chunks, :empty), #revision = :revision"
+                ),
+                ConditionExpression="attribute_not_exists(#messages)",
+                ExpressionAttributeNames={
+                    "#segments": "segments", "#chunks": "chunks", "#revision": "revision", "#messages": "messages",
+                },
+                ExpressionAttributeValues={":empty": [], ":segment": [[item_id, count]], ":revision": revision},
+                ReturnValues="ALL_NEW",
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return None
+        self.counters["writes"] += 1
+        return self._head(response["Attributes"])
+
+    def replace_head(self, user_id, head, expected_revision):
+        """Write a new head if the stored one still has `expected_revision`; True if written."""
+        if expected_revision is None:
+            condition, values = "attribute_not_exists(#revision)", {}
+        else:
+            condition, values = "#revision = :expected", {":expected": expected_revision}
+        try:
+            self.table.put_item(
+                Item=dict(self._key(user_id), **_to_dynamodb(head)),
+                ConditionExpression=condition,
+                ExpressionAttributeNames={"#revision": "revision"},
+                **({"ExpressionAttributeValues": values} if values else {}),
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+        self.counters["writes"] += 1
+        self.counters["bytes_written"] += message_bytes(head)
+        return True
+
+
+class SessionStore:
+    """Append-only conversation storage with tail reads and periodic compaction.
+
+    Once a conversation has `compact_segments` segments, they are merged into chunks of about
+    `chunk_bytes` (below the 400 KB DynamoDB item limit), so reads need few items.
+    """
+
+    def __init__(self, backend, compact_segments=16, chunk_bytes=256 * 1024):
+        self.backend = backend
+        self.compact_segments = compact_segments
+        self.chunk_bytes = chunk_bytes
+
+    def load(self, user_id, limit=None, before=None):
+        """Return (messages, revision, start): up to `limit` messages ending before index `before`
+        (default: the most recent ones), the revision of the conversation and the index of the
+        first returned message."""
+        head = self.backend.head(user_id)
+        if head is None:
+            return [], None, 0
+        if "legacy" in head:
+            parts, items = [["legacy", len(head["legacy"])]], {"legacy": head["legacy"]}
+        else:
+            parts, items = head["chunks"] + head["segments"], None
+
+        total = sum(count for _, count in parts)
+        end = total if before is None else max(0, min(before, total))
+        start = 0 if limit is None else max(0, end - limit)
+
+        # Only read the chunks and segments overlapping [start, end)
+        selected, offset, first = [], 0, None
+        for item_id, count in parts:
+            if offset < end and offset + count > start:
+                selected.append(item_id)
+                first = offset if first is None else first
+            offset += count
+        if items is None:
+            items = self.backend.get_items(user_id, selected)
+        messages = [message for item_id in selected for message in items[item_id]]
+        return messages[start - (first or 0):end - (first or 0)], head["revision"], start
+
+    def revision(self, user_id):
+        return self.backend.revision(user_id)
+
+    def append(self, user_id, messages):
+        """Store the messages of one turn and return the new revision."""
+        item_id = new_item_id()
+        self.backend.put_item(user_id, item_id, messages)
+        head = self.backend.append_segment(user_id, item_id, len(messages))
+        if head is None:
+            # First save of a legacy session: move its history into the log
+            self.backend.delete_items(user_id, [item_id])
+            legacy = self.backend.head(user_id)
+            return self._rewrite(user_id, legacy, legacy["legacy"] + messages)
+        if len(head["segments"]) >= self.compact_segments:
+            try:
+                self.compact(user_id, head)
+            except Exception as e:
+                # The turn is saved; compaction is tried again after the next one
+                logger.error(f"Failed to compact session of user {user_id}: {str(e)}")
+        return head["revision"]
+
+    def _pack(self, user_id, segments):
+        """Write the given lists of messages as chunks and return their [item_id, count] entries."""
+        chunks, current, size = [], [], 0
+        for messages in segments:
+            if current and size + message_bytes(messages) > self.chunk_bytes:
+                chunks.append(current)
+                current, size = [], 0
+            current += messages
+            size += message_bytes(messages)
+        if current:
+            chunks.append(current)
+
+        entries = []
+        for messages in chunks:
+            item_id = new_item_id()
+            self.backend.put_item(user_id, item_id, messages)
+            entries.append([item_id, len(messages)])
+        return entries
+
+    def compact(self, user_id, head=None):
+        """Merge the segments of a conversation into chunks."""
+        head = head or self.backend.head(user_id)
+        if not head or "legacy" in head or not head["segments"]:
+            return
+        segment_ids = [item_id for item_id, _ in head["segments"]]
+        items = self.backend.get_items(user_id, segment_ids)
+        chunks = self._pack(user_id, [items[item_id] for item_id in segment_ids])
+        new_head = {"chunks": head["chunks"] + chunks, "segments": [], "revision": head["revision"]}
+        if self.backend.replace_head(user_id, new_head, head["revision"]):
+            self.backend.delete_items(user_id, segment_ids)
+            logger.debug(f"Compacted {len(segment_ids)} segments of user {user_id} into {len(chunks)} chunk(s)")
+        else:
+            # Another turn was saved meanwhile; compaction is tried again after a later turn
+            self.backend.delete_items(user_id, [item_id for item_id, _ in chunks])
+
+    def _rewrite(self, user_id, head, messages):
+        """Replace a stored conversation (e.g. a legacy one) with `messages` stored as chunks."""
+        chunks = self._pack(user_id, [[message] for message in messages])
+        revision = uuid.uuid4().hex
+        if not self.backend.replace_head(user_id, {"chunks": chunks, "segments": [], "revision": revision},
+                                         head["revision"]):
+            self.backend.delete_items(user_id, [item_id for item_id, _ in chunks])
+            raise RuntimeError(f"Session of user {user_id} was changed while it was being converted")
+        old_items = [item_id for item_id, _ in head["chunks"] + head["segments"]]
+        if old_items:
+            self.backend.delete_items(user_id, old_items)
+        return revision
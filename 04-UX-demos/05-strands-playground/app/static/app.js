@@ -19,12 +19,17 @@ document.addEventListener('DOMContentLoaded', () => {
     const API_BASE_URL = '';
     const GET_CONVERSATIONS_ENDPOINT = `${API_BASE_URL}/get_conversations`;
     const CS_AGENT_ENDPOINT = `${API_BASE_URL}/strandsplayground_agent`;
+    const CS_AGENT_STREAM_ENDPOINT = `${API_BASE_URL}/strandsplayground_agent/stream`;
     const SYSTEM_PROMPT_ENDPOINT = `${API_BASE_URL}/system_prompt`;
     const MODEL_SETTINGS_ENDPOINT = `${API_BASE_URL}/model_settings`;
+    // Messages fetched per page of conversation history
+    const HISTORY_PAGE_SIZE = 100;
     
     // State
     let userId = userIdInput.value || 'user1';
     let isProcessing = false;
+    // Index of the oldest displayed message in the stored conversation (0: all loaded)
+    let historyStart = 0;
     
     // Initialize chat, system prompt, and model settings
     loadConversation();
@@ -125,18 +130,26 @@ document.addEventListener('DOMContentLoaded', () => {
     });
     
     // Functions
+    async function fetchConversationPage(before) {
+        let url = `${GET_CONVERSATIONS_ENDPOINT}?userId=${encodeURIComponent(userId)}&limit=${HISTORY_PAGE_SIZE}`;
+        if (before !== undefined) {
+            url += `&before=${before}`;
+        }
+        const response = await fetch(url);
+        
+        if (!response.ok) {
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        
+        return response.json();
+    }
+    
     async function loadConversation() {
         try {
             chatMessages.innerHTML = '<div class="loading"></div>';
             
-            const response = await fetch(`${GET_CONVERSATIONS_ENDPOINT}?userId=${encodeURIComponent(userId)}`);
-            
-            if (!response.ok) {
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            
-            const data = await response.json();
-            displayConversation(data.messages);
+            const data = await fetchConversationPage();
+            displayConversation(data.messages, data.start);
         } catch (error) {
             console.error('Error loading conversation:', error);
             chatMessages.innerHTML = '';
@@ -144,8 +157,49 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
-    function displayConversation(messages) {
+    async function loadOlderMessages(button) {
+        const requestedUserId = userId;
+        button.disabled = true;
+        try {
+            const data = await fetchConversationPage(historyStart);
+            if (requestedUserId !== userId) return;
+            
+            // Keep the messages in view where they are while older ones are added above
+            const previousHeight = chatMessages.scrollHeight;
+            const fragment = document.createDocumentFragment();
+            data.messages.forEach(msg => {
+                const messageDiv = createMessageElement(msg);
+                if (messageDiv) fragment.appendChild(messageDiv);
+            });
+            button.after(fragment);
+            historyStart = data.start;
+            chatMessages.scrollTop += chatMessages.scrollHeight - previousHeight;
+            
+            if (historyStart === 0) {
+                button.remove();
+            }
+        } catch (error) {
+            console.error('Error loading older messages:', error);
+            showError('Failed to load older messages. Please try again.');
+        } finally {
+            button.disabled = false;
+        }
+    }
+    
+    function createMessageElement(msg) {
+        if (msg.role !== 'user' && msg.role !== 'assistant') return null;
+        
+        const messageDiv = document.createElement('div');
+        messageDiv.className = `message ${msg.role === 'user' ? 'user-message' : 'bot-message'}`;
+        
+        const responseText = msg.content[0].text;
+        messageDiv.textContent = responseText;
+        return messageDiv;
+    }
+    
+    function displayConversation(messages, start = 0) {
         chatMessages.innerHTML = '';
+        historyStart = start;
         
         if (!messages || messages.length === 0) {
             const welcomeMsg = document.createElement('div');
@@ -157,16 +211,18 @@ document.addEventListener('DOMContentLoaded', () => {
             return;
         }
         
+        if (historyStart > 0) {
+            // Only the latest messages are loaded, older ones on request
+            const loadOlderButton = document.createElement('button');
+            loadOlderButton.className = 'load-older-button';
+            loadOlderButton.textContent = 'Load older messages';
+            loadOlderButton.addEventListener('click', () => loadOlderMessages(loadOlderButton));
+            chatMessages.appendChild(loadOlderButton);
+        }
+        
         messages.forEach(msg => {
-            if (msg.role === 'user' || msg.role === 'assistant') {
-                const messageDiv = document.createElement('div');
-                messageDiv.className = `message ${msg.role === 'user' ? 'user-message' : 'bot-message'}`;
-                
-                const responseText = msg.content[0].text;
-                messageDiv.textContent = responseText;
-                
-                chatMessages.appendChild(messageDiv);
-            }
+            const messageDiv = createMessageElement(msg);
+            if (messageDiv) chatMessages.appendChild(messageDiv);
         });
         
         scrollToBottom();
@@ -202,7 +258,7 @@ document.addEventListener('DOMContentLoaded', () => {
         try {
             const startTime = Date.now();
             
-            const response = await fetch(CS_AGENT_ENDPOINT, {
+            const response = await fetch(CS_AGENT_STREAM_ENDPOINT, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -217,20 +273,61 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(`HTTP error! Status: ${response.status}`);
             }
             
-            const data = await response.json();
-            
-            // Remove loading indicator
-            chatMessages.removeChild(loadingDiv);
-            
-            // Add bot response
+            // Bot response, filled in as server-sent events arrive
             const botMessageDiv = document.createElement('div');
             botMessageDiv.className = 'message bot-message';
+            let data = null;
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (!data) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    throw new Error('Stream ended before the response was complete');
+                }
+                buffer += decoder.decode(value, { stream: true });
+                
+                // Events are separated by a blank line
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                for (const rawEvent of events) {
+                    let eventName = 'message';
+                    let eventData = '';
+                    for (const line of rawEvent.split('\n')) {
+                        if (line.startsWith('event: ')) {
+                            eventName = line.slice(7);
+                        } else if (line.startsWith('data: ')) {
+                            eventData += line.slice(6);
+                        }
+                    }
+                    if (!eventData) continue;  // keep-alive comment
+                    const payload = JSON.parse(eventData);
+                    
+                    if (eventName === 'text') {
+                        if (loadingDiv.parentNode) {
+                            // First text: replace the loading indicator
+                            chatMessages.replaceChild(botMessageDiv, loadingDiv);
+                        }
+                        botMessageDiv.textContent += payload.delta;
+                        scrollToBottom();
+                    } else if (eventName === 'error') {
+                        throw new Error(payload.detail);
+                    } else if (eventName === 'done') {
+                        data = payload;
+                    }
+                }
+            }
             
+            // Remove loading indicator
+            if (loadingDiv.parentNode) {
+                chatMessages.replaceChild(botMessageDiv, loadingDiv);
+            }
+            
+            // Show the final answer of the turn
             const responseText = data.messages.content[0].text;
             botMessageDiv.textContent = responseText;
             
-            chatMessages.appendChild(botMessageDiv);
-            
             // Update summary panel if available
             if (data.summary && window.updateSummaryPanel) {
                 console.log(data.summary);
@@ -240,7 +337,9 @@ document.addEventListener('DOMContentLoaded', () => {
             scrollToBottom();
         } catch (error) {
             console.error('Error sending message:', error);
-            chatMessages.removeChild(loadingDiv);
+            if (loadingDiv.parentNode) {
+                chatMessages.removeChild(loadingDiv);
+            }
             showError('Failed to send message. Please try again.');
         } finally {
             isProcessing = false;
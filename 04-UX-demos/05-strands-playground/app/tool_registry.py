@@ -0,0 +1,71 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger("agent-web-service")
+
+
+class ToolUnavailableError(Exception):
+    """Raised when a tool module cannot be imported (e.g. a missing optional dependency)."""
+
+
+class ToolRegistry:
+    """Tools by name, imported on first use instead of at process start.
+
+    `modules` maps a tool name to the module that provides it (e.g. "strands_tools.calculator"),
+    `inline` maps a tool name to an already defined tool object (e.g. a @tool function).
+    """
+
+    def __init__(self, modules, inline=None):
+        self.modules = dict(modules)
+        self.inline = dict(inline or {})
+        # name -> import time in ms of each tool module loaded so far
+        self.import_times = {}
+        self._loaded = dict(self.inline)
+        self._lock = threading.Lock()
+
+    def names(self):
+        return list(self.modules) + [name for name in self.inline if name not in self.modules]
+
+    def __contains__(self, name):
+        return name in self.modules or name in self.inline
+
+    def is_loaded(self, name):
+        return name in self._loaded
+
+    def resolve(self, name):
+        """The tool object for `name`, importing its module the first time it is asked for."""
+        tool = self._loaded.get(name)
+        if tool is not None:
+            return tool
+        if name not in self.modules:
+            raise KeyError(name)
+        with self._lock:
+            tool = self._loaded.get(name)
+            if tool is None:
+                start = time.perf_counter()
+                try:
+                    tool = importlib.import_module(self.modules[name])
+                except ImportError as e:
+                    raise ToolUnavailableError(f"Tool {name} is not available: {str(e)}") from e
+                self.import_times[name] = (time.perf_counter() - start) * 1000
+                self._loaded[name] = tool
+                logger.debug(f"Loaded tool {name} in {self.import_times[name]:.1f} ms")
+        return tool
+
+    def resolve_many(self, names):
+        return [self.resolve(name) for name in names]
+
+    def preload(self, names):
+        """Import the given tools in a background thread, skipping the ones that fail."""
+        def load():
+            for name in names:
+                try:
+                    self.resolve(name)
+                except (KeyError, ToolUnavailableError) as e:
+                    logger.warning(f"Could not preload tool {name}: {str(e)}")
+
+        thread = threading.Thread(target=load, name="tool-preload", daemon=True)
+        thread.start()
+        return thread
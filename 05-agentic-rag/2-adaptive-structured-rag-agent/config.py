@@ -36,6 +36,10 @@ def get_config() -> Dict[str, Any]:
         
         # Knowledge Base Configuration
         "knowledge_base_id": os.environ.get("KNOWLEDGE_BASE_ID", ""),
+        
+        # SQLite Configuration
+        "sqlite_max_response_bytes": int(os.environ.get("SQLITE_MAX_RESPONSE_SIZE_BYTES", 25600)),
+        "sqlite_fetch_size": int(os.environ.get("SQLITE_FETCH_SIZE_ROWS", 500)),
 
     }
     
@@ -0,0 +1,107 @@
+"""
+Streaming, size-bounded JSON serialization of SQL query results.
+"""
+import base64
+from datetime import date, time
+from decimal import Decimal
+import json
+
+
+def convert_value(value):
+    """
+    Converts a database value into a JSON serializable value.
+
+    Args:
+        value: Value returned by the database driver
+
+    Returns:
+        The value itself, a float/string for Decimal and date/time values, or a
+        base64 string for binary values (SQLite BLOB, PostgreSQL bytea)
+    """
+    if type(value) is Decimal:
+        return float(value)
+    if isinstance(value, (date, time)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+def count_remaining_rows(cursor, fetch_size: int) -> int:
+    """
+    Counts the rows left in a cursor without converting or encoding them.
+
+    Args:
+        cursor: DB-API cursor positioned after the last fetched row
+        fetch_size: Number of rows fetched per round trip
+
+    Returns:
+        int: Number of rows left in the cursor
+    """
+    remaining = 0
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return remaining
+        remaining += len(rows)
+
+
+def serialize_rows_within_budget(cursor, max_bytes: int, fetch_size: int = 500,
+                                 count_remaining=None) -> dict:
+    """
+    Streams the rows of an executed query into JSON records while tracking
+    the size of the serialized result.
+
+    Rows are fetched in batches with fetchmany and each record is encoded only
+    once, so the cost is linear in the number of returned rows. As soon as the
+    next record would push json.dumps(records) over max_bytes no more rows are
+    converted, and the remaining rows are only counted to report the total.
+
+    Args:
+        cursor: DB-API cursor on which the query has already been executed
+        max_bytes: Maximum size in bytes of json.dumps(records)
+        fetch_size: Number of rows fetched per round trip
+        count_remaining: Optional callable receiving the cursor and returning the
+            number of rows not fetched yet, e.g. a server-side MOVE for PostgreSQL
+            named cursors. Defaults to fetching and counting the remaining rows.
+
+    Returns:
+        dict: records (list of dicts), returned_rows, total_rows and truncated
+    """
+    records = []
+    column_names = None
+    # Size of "[]" plus the encoded records and their ", " separators
+    size = 2
+    skipped_rows = 0
+
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        if column_names is None:
+            column_names = [desc[0] for desc in cursor.description]
+        for index, row in enumerate(rows):
+            record = {column: convert_value(value) for column, value in zip(column_names, row)}
+            record_size = len(json.dumps(record).encode("utf-8"))
+            if records:
+                record_size += 2
+            if size + record_size > max_bytes:
+                skipped_rows = len(rows) - index
+                break
+            records.append(record)
+            size += record_size
+        if skipped_rows:
+            break
+
+    if skipped_rows:
+        if count_remaining is None:
+            skipped_rows += count_remaining_rows(cursor, fetch_size)
+        else:
+            skipped_rows += count_remaining(cursor)
+
+    return {
+        "records": records,
+        "returned_rows": len(records),
+        "total_rows": len(records) + skipped_rows,
+        "truncated": skipped_rows > 0,
+    }
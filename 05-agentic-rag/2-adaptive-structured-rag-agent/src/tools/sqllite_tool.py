@@ -7,6 +7,7 @@ import logging
 import os
 from typing import Dict, Any, Optional
 from pathlib import Path
+from src.tools.result_serializer import serialize_rows_within_budget
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,7 @@ def run_sqlite_query(query: str) -> Dict[str, Any]:
     Execute a SQL query on SQLite database.
     
     Uses sqlite3 to execute the query on local SQLite database and returns the results.
+    Results larger than the configured response size are truncated.
     
     Args:
         query: SQL query string to execute
@@ -44,8 +46,6 @@ def run_sqlite_query(query: str) -> Dict[str, Any]:
         logger.info(f"Executing SQLite query: {query}")
         
         with sqlite3.connect(database_path) as conn:
-            # Enable row factory for dictionary-like access
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             # Execute the query
@@ -54,29 +54,30 @@ def run_sqlite_query(query: str) -> Dict[str, Any]:
             # Handle different query types
             query_upper = query.strip().upper()
             if query_upper.startswith(('SELECT', 'WITH')):
-                # For SELECT queries, fetch results
-                rows = cursor.fetchall()
+                # For SELECT queries, stream results within the response size budget
+                serialized = serialize_rows_within_budget(
+                    cursor,
+                    config['sqlite_max_response_bytes'],
+                    fetch_size=config['sqlite_fetch_size']
+                )
+                data = serialized['records']
                 
-                # Get column names
-                columns = [description[0] for description in cursor.description] if cursor.description else []
+                logger.info(
+                    f"Query succeeded! Returned {serialized['returned_rows']} "
+                    f"of {serialized['total_rows']} rows"
+                )
                 
-                # Convert rows to list of dictionaries
-                data = []
-                for row in rows:
-                    item = {}
-                    for column in columns:
-                        value = row[column]
-                        # Handle None values consistently with Athena tool
-                        item[column] = value if value is not None else None
-                    data.append(item)
-                
-                logger.info(f"Query succeeded! Returned {len(data)} rows")
-                
-                return {
+                result = {
                     "success": True,
                     "data": data,
                     "query": query
                 }
+                if serialized['truncated']:
+                    result["message"] = (
+                        f"The data is too large, it has been truncated from "
+                        f"{serialized['total_rows']} to {serialized['returned_rows']} rows."
+                    )
+                return result
             else:
                 # For INSERT, UPDATE, DELETE queries
                 affected_rows = cursor.rowcount